@@ -1,10 +1,35 @@
+import argparse
+import asyncio
+import os
+import shutil
+from datetime import date
+from typing import Any, Awaitable, Callable, List, Tuple, TypeVar
+
 import uvicorn
 
 from med_backend.settings import settings
 
+ResultType = TypeVar("ResultType")
 
-def main() -> None:
-    """Entrypoint of the application."""
+
+def set_multiproc_dir() -> None:
+    """
+    Prepare directory for metrics shared between workers.
+
+    The directory is cleaned up on every start, prometheus-client
+    finds it through the environment variable, which is inherited
+    by uvicorn workers.
+    """
+    shutil.rmtree(settings.prometheus_dir, ignore_errors=True)
+    os.makedirs(settings.prometheus_dir, exist_ok=True)
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = str(
+        settings.prometheus_dir.expanduser().absolute(),
+    )
+
+
+def serve() -> None:
+    """Run the web server."""
+    set_multiproc_dir()
     uvicorn.run(
         "med_backend.web.application:get_app",
         workers=settings.workers_count,
@@ -16,5 +41,129 @@ def main() -> None:
     )
 
 
+def migrate() -> None:
+    """Apply all database migrations and prepare partitions."""
+    from med_backend.db.utils import run_migrations  # noqa: WPS433
+
+    run_migrations()
+    _maintain_partitions()
+
+
+def _run_with_session(action: Callable[[Any], Awaitable[ResultType]]) -> ResultType:
+    from sqlalchemy.ext.asyncio import (  # noqa: WPS433
+        AsyncSession,
+        create_async_engine,
+    )
+
+    async def run() -> ResultType:  # noqa: WPS430
+        engine = create_async_engine(str(settings.db_url))
+        try:
+            async with AsyncSession(engine) as session:
+                return await action(session)
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(run())
+
+
+def backfill_numbers() -> None:
+    """Fill numeric answers of existing submissions."""
+    from med_backend.forms.services import backfill_answer_numbers  # noqa: WPS433
+
+    async def backfill(session: Any) -> None:  # noqa: WPS430
+        batches = await backfill_answer_numbers(
+            session,
+            settings.backfill_batch_size,
+        )
+        print(f"Processed {batches} batches")  # noqa: WPS421
+
+    _run_with_session(backfill)
+
+
+def rebuild_stats() -> None:
+    """Recompute statistics of answers from stored submissions."""
+    from med_backend.forms.crud import rebuild_question_stats  # noqa: WPS433
+
+    _run_with_session(rebuild_question_stats)
+
+
+def _maintain_partitions() -> Tuple[List[str], List[str]]:
+    from med_backend.db.partitions import maintain_partitions  # noqa: WPS433
+
+    async def maintain(  # noqa: WPS430
+        session: Any,
+    ) -> Tuple[List[str], List[str]]:
+        connection = await session.connection()
+        names = await connection.run_sync(
+            maintain_partitions,
+            date.today(),
+            settings.partition_months_ahead,
+            settings.partition_retention_months,
+        )
+        await session.commit()
+        return names
+
+    return _run_with_session(maintain)
+
+
+def partitions() -> None:
+    """Create partitions of upcoming months and detach expired ones."""
+    current, detached = _maintain_partitions()
+    print("Partitions:", *current, sep="\n  ")  # noqa: WPS421
+    if detached:
+        print("Detached:", *detached, sep="\n  ")  # noqa: WPS421
+
+
+def worker() -> None:
+    """Write submissions queued to the ingestion stream to the database."""
+    import signal  # noqa: WPS433
+
+    from redis.asyncio import ConnectionPool  # noqa: WPS433
+    from sqlalchemy.ext.asyncio import (  # noqa: WPS433
+        AsyncSession,
+        create_async_engine,
+    )
+    from sqlalchemy.orm import sessionmaker  # noqa: WPS433
+
+    from med_backend.forms.ingest import run_worker  # noqa: WPS433
+
+    async def run() -> None:  # noqa: WPS430
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stop.set)
+        engine = create_async_engine(str(settings.db_url))
+        redis_pool = ConnectionPool.from_url(str(settings.redis_url))
+        try:
+            await run_worker(
+                redis_pool,
+                sessionmaker(engine, expire_on_commit=False, class_=AsyncSession),
+                stop,
+            )
+        finally:
+            await redis_pool.disconnect()
+            await engine.dispose()
+
+    asyncio.run(run())
+
+
+COMMANDS = {
+    "serve": serve,
+    "migrate": migrate,
+    "backfill-numbers": backfill_numbers,
+    "rebuild-stats": rebuild_stats,
+    "partitions": partitions,
+    "worker": worker,
+}
+
+
+def main() -> None:
+    """Entrypoint of the application."""
+    parser = argparse.ArgumentParser(prog="med_backend")
+    parser.add_argument("command", nargs="?", default="serve", choices=COMMANDS)
+    args = parser.parse_args()
+    COMMANDS[args.command]()
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,73 @@
+import logging
+
+from redis.asyncio import ConnectionPool, Redis
+from redis.exceptions import RedisError
+
+from med_backend.auth.schemas import User
+from med_backend.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _user_key(email: str) -> str:
+    return f"user:{email}"
+
+
+async def get_user(redis_pool: ConnectionPool, email: str) -> User | None:
+    """
+    Get user from the cache.
+
+    Errors of redis are treated as a cache miss,
+    so authentication keeps working without it.
+
+    :param redis_pool: redis connection pool.
+    :param email: email of the user, same as the "sub" of the token.
+    :return: cached user or None.
+    """
+    async with Redis(connection_pool=redis_pool) as redis:
+        try:
+            cached = await redis.get(_user_key(email))
+        except RedisError:
+            return None
+    if cached is None:
+        return None
+    return User.parse_raw(cached)
+
+
+async def set_user(redis_pool: ConnectionPool, user: User) -> None:
+    """
+    Put user to the cache for `user_cache_ttl` seconds.
+
+    The password hash isn't cached, it's only needed to log in
+    and is read from the database there.
+
+    :param redis_pool: redis connection pool.
+    :param user: user to cache.
+    """
+    async with Redis(connection_pool=redis_pool) as redis:
+        try:
+            await redis.set(
+                _user_key(user.email),
+                user.json(exclude={"hashed_password"}),
+                ex=settings.user_cache_ttl,
+            )
+        except RedisError:
+            pass  # noqa: WPS420
+
+
+async def invalidate_user(redis_pool: ConnectionPool, email: str) -> None:
+    """
+    Remove the user from the cache.
+
+    Must be called after the user is updated or deleted.
+    The change is already committed at this point, so errors
+    of redis are logged and the entry expires on its own.
+
+    :param redis_pool: redis connection pool.
+    :param email: email of the user.
+    """
+    async with Redis(connection_pool=redis_pool) as redis:
+        try:
+            await redis.delete(_user_key(email))
+        except RedisError:
+            logger.warning("Failed to invalidate cached user %s", email)
@@ -47,7 +47,9 @@ class UserPublicInfo(UserBase):
 class User(UserBase):
     id: int
     fullname: str
-    hashed_password: str
+    # not cached, only loaded from the database
+    hashed_password: str | None = None
+    born: date
     disabled: bool
     is_manager: bool
 
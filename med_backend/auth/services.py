@@ -5,11 +5,14 @@ from decouple import config
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from passlib.context import CryptContext
+from redis.asyncio import ConnectionPool
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from med_backend.auth import cache
 from med_backend.auth.schemas import TokenData, User
 from med_backend.db.dependencies import get_db_session
+from med_backend.services.hashing.pool import get_password_hasher
+from med_backend.services.redis.dependency import get_redis_pool
 from med_backend.settings import settings
 from med_backend.users.crud import get_user_by_email
 
@@ -18,17 +21,15 @@ JWT_ALGORITHM = settings.JWT_ALGORITHM
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.JWT_EAT
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await get_password_hasher().verify(plain_password, hashed_password)
 
 
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+async def get_password_hash(password: str) -> str:
+    return await get_password_hasher().hash(password)
 
 
 async def get_user(session: AsyncSession, email: str) -> User:
@@ -38,6 +39,18 @@ async def get_user(session: AsyncSession, email: str) -> User:
     return db_user
 
 
+async def get_cached_user(
+    session: AsyncSession,
+    redis_pool: ConnectionPool,
+    email: str,
+) -> User:
+    user = await cache.get_user(redis_pool, email)
+    if user is None:
+        user = User.from_orm(await get_user(session, email))
+        await cache.set_user(redis_pool, user)
+    return user
+
+
 async def authenticate_user(
     db: AsyncSession,
     username: str,
@@ -46,7 +59,7 @@ async def authenticate_user(
     user = await get_user(db, username)
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    if not await verify_password(password, user.hashed_password):
         return False
     return user
 
@@ -69,6 +82,7 @@ def create_access_token(
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     session: AsyncSession = Depends(get_db_session),
+    redis_pool: ConnectionPool = Depends(get_redis_pool),
 ) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -83,7 +97,7 @@ async def get_current_user(
         token_data = TokenData(email=email)
     except JWTError:
         raise credentials_exception
-    user = await get_user(session, token_data.email)
+    user = await get_cached_user(session, redis_pool, token_data.email)
     if user is None:
         raise credentials_exception
     return user
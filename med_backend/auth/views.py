@@ -2,9 +2,11 @@ from datetime import timedelta
 from typing import Dict
 
 from fastapi import APIRouter, Depends, HTTPException
+from redis.asyncio import ConnectionPool
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
+from med_backend.auth.cache import invalidate_user
 from med_backend.auth.schemas import (
     Token,
     UpdateUserProfile,
@@ -20,6 +22,7 @@ from med_backend.auth.services import (
     get_current_active_user,
 )
 from med_backend.db.dependencies import get_db_session
+from med_backend.services.redis.dependency import get_redis_pool
 from med_backend.users.crud import create_user, delete_user, update_user
 
 router = APIRouter()
@@ -66,8 +69,10 @@ async def update_self(
     data: UpdateUserProfile,
     current_user: User = Depends(get_current_active_user),
     session: AsyncSession = Depends(get_db_session),
+    redis_pool: ConnectionPool = Depends(get_redis_pool),
 ):
     await update_user(session, current_user.id, data)
+    await invalidate_user(redis_pool, current_user.email)
     return {"detail": "updated"}
 
 
@@ -75,6 +80,8 @@ async def update_self(
 async def update_self(
     current_user: User = Depends(get_current_active_user),
     session: AsyncSession = Depends(get_db_session),
+    redis_pool: ConnectionPool = Depends(get_redis_pool),
 ):
     await delete_user(session, current_user.id)
+    await invalidate_user(redis_pool, current_user.email)
     return {"detail": "updated"}
@@ -0,0 +1,144 @@
+import argparse
+import asyncio
+import sys
+
+from med_backend.bench.generator import generate, load_dataset, save_dataset
+from med_backend.bench.runner import (
+    compare,
+    format_results,
+    load_results,
+    run_suite,
+    save_results,
+)
+from med_backend.bench.scenarios import SCENARIOS
+from med_backend.bench.serialization import run_serialization
+
+
+def generate_command(args: argparse.Namespace) -> None:
+    """
+    Migrate the database and fill it with synthetic data.
+
+    :param args: parsed arguments.
+    """
+    from med_backend.db.utils import run_migrations  # noqa: WPS433
+
+    run_migrations()
+    dataset = asyncio.run(
+        generate(
+            managers=args.managers,
+            patients=args.patients,
+            forms=args.forms,
+            questions=args.questions,
+            assignments=args.assignments,
+            submissions=args.submissions,
+            months=args.months,
+            seed=args.seed,
+        ),
+    )
+    save_dataset(dataset, args.dataset)
+
+
+def run_command(args: argparse.Namespace) -> None:
+    """
+    Run scenarios and compare them with the baseline.
+
+    :param args: parsed arguments.
+    """
+    from med_backend.web.application import get_app  # noqa: WPS433
+
+    redis_pool = None
+    if args.fake_redis:
+        from fakeredis import FakeServer  # noqa: WPS433
+        from fakeredis.aioredis import FakeConnection  # noqa: WPS433
+        from redis.asyncio import ConnectionPool  # noqa: WPS433
+
+        redis_pool = ConnectionPool(
+            server=FakeServer(),
+            connection_class=FakeConnection,
+        )
+
+    results = asyncio.run(
+        run_suite(
+            get_app(),
+            load_dataset(args.dataset),
+            args.scenarios,
+            requests=args.requests,
+            concurrency=args.concurrency,
+            warmup=args.warmup,
+            redis_pool=redis_pool,
+        ),
+    )
+    print(format_results(results))  # noqa: WPS421
+    if args.save:
+        save_results(results, args.save)
+    if args.baseline:
+        regressions = compare(results, load_results(args.baseline), args.tolerance)
+        if regressions:
+            print("Regressions:", *regressions, sep="\n")  # noqa: WPS421
+            sys.exit(1)
+
+
+def serialize_command(args: argparse.Namespace) -> None:
+    """
+    Compare serialization paths of the answers report.
+
+    :param args: parsed arguments.
+    """
+    result = run_serialization(args.submissions, args.questions, args.repeat)
+    print(  # noqa: WPS421
+        f"validated: {result['validated_ms']:.1f}ms",
+        f"fast: {result['fast_ms']:.1f}ms",
+        f"speedup: {result['speedup']:.1f}x",
+        sep="\n",
+    )
+
+
+def main() -> None:
+    """Entrypoint of the benchmarks."""
+    parser = argparse.ArgumentParser(prog="med_backend.bench")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    gen = subparsers.add_parser("generate", help="generate synthetic data")
+    gen.add_argument("--managers", type=int, default=10)
+    gen.add_argument("--patients", type=int, default=1000)
+    gen.add_argument("--forms", type=int, default=50)
+    gen.add_argument("--questions", type=int, default=10)
+    gen.add_argument("--assignments", type=int, default=5)
+    gen.add_argument("--submissions", type=int, default=3)
+    gen.add_argument("--months", type=int, default=12)
+    gen.add_argument("--seed", type=int, default=0)
+    gen.add_argument("--dataset", default="bench_dataset.json")
+    gen.set_defaults(func=generate_command)
+
+    run = subparsers.add_parser("run", help="run benchmark scenarios")
+    run.add_argument("--dataset", default="bench_dataset.json")
+    run.add_argument(
+        "--scenarios",
+        nargs="+",
+        choices=SCENARIOS,
+        default=list(SCENARIOS),
+    )
+    run.add_argument("--requests", type=int, default=200)
+    run.add_argument("--concurrency", type=int, default=10)
+    run.add_argument("--warmup", type=int, default=10)
+    run.add_argument("--baseline", help="results to compare with")
+    run.add_argument("--tolerance", type=float, default=0.2)
+    run.add_argument("--save", help="save results to use them as a baseline")
+    run.add_argument("--fake-redis", action="store_true")
+    run.set_defaults(func=run_command)
+
+    ser = subparsers.add_parser(
+        "serialize",
+        help="compare serialization of the answers report",
+    )
+    ser.add_argument("--submissions", type=int, default=1000)
+    ser.add_argument("--questions", type=int, default=10)
+    ser.add_argument("--repeat", type=int, default=5)
+    ser.set_defaults(func=serialize_command)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
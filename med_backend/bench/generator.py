@@ -0,0 +1,215 @@
+import random
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+import ujson
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from med_backend.auth.services import get_password_hash
+from med_backend.db.models.forms import (
+    FormAssignment,
+    FormQuestion,
+    FormScheme,
+    UserFormFieldSubmission,
+    UserFormSubmission,
+)
+from med_backend.db.models.users import UserScheme
+from med_backend.db.partitions import add_months, create_monthly_partitions
+from med_backend.forms.crud import evaluate_answer
+from med_backend.settings import settings
+
+# password of every generated user
+PASSWORD = "benchmark"
+# rows per INSERT, keeps statements below the asyncpg parameter limit
+CHUNK_SIZE = 5000
+
+
+async def _insert(
+    session: AsyncSession,
+    model: Any,
+    rows: List[Dict[str, Any]],
+) -> List[int]:
+    ids: List[int] = []
+    for start in range(0, len(rows), CHUNK_SIZE):
+        r = await session.execute(
+            insert(model).values(rows[start : start + CHUNK_SIZE]).returning(model.id),
+        )
+        ids.extend(r.scalars().all())
+    return ids
+
+
+async def _create_users(
+    session: AsyncSession,
+    prefix: str,
+    count: int,
+    is_manager: bool,
+) -> List[Dict[str, Any]]:
+    hashed_password = await get_password_hash(PASSWORD)
+    emails = [f"{prefix}{number}@bench.example.com" for number in range(count)]
+    ids = await _insert(
+        session,
+        UserScheme,
+        [
+            {
+                "email": email,
+                "fullname": f"{prefix} {number}",
+                "hashed_password": hashed_password,
+                "born": date(1990, 1, 1),
+                "is_manager": is_manager,
+                "disabled": False,
+            }
+            for number, email in enumerate(emails)
+        ],
+    )
+    return [{"id": pk, "email": email} for pk, email in zip(ids, emails)]
+
+
+async def generate(  # noqa: WPS210
+    managers: int,
+    patients: int,
+    forms: int,
+    questions: int,
+    assignments: int,
+    submissions: int,
+    months: int = 12,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """
+    Fill the database with synthetic data.
+
+    :param managers: number of managers.
+    :param patients: number of patients.
+    :param forms: number of forms, owned by random managers.
+    :param questions: number of questions in every form.
+    :param assignments: number of forms assigned to every patient.
+    :param submissions: number of submissions of every assigned form.
+    :param months: submissions are spread over this many past months.
+    :param seed: seed of the random generator.
+    :return: dataset description used by the benchmark scenarios.
+    """
+    rnd = random.Random(seed)
+    engine = create_async_engine(str(settings.db_url))
+    session_factory = sessionmaker(engine, class_=AsyncSession)
+    now = datetime.now(timezone.utc)
+    async with session_factory() as session:
+        connection = await session.connection()
+        await connection.run_sync(
+            create_monthly_partitions,
+            add_months(now.date(), -months),
+            months + 1,
+        )
+        manager_rows = await _create_users(session, "manager", managers, True)
+        patient_rows = await _create_users(session, "patient", patients, False)
+
+        owners = [rnd.choice(manager_rows)["id"] for _ in range(forms)]
+        form_ids = await _insert(
+            session,
+            FormScheme,
+            [
+                {"name": f"form {number}", "user_id": owner}
+                for number, owner in enumerate(owners)
+            ],
+        )
+        question_ids = await _insert(
+            session,
+            FormQuestion,
+            [
+                {
+                    "form_id": form_id,
+                    "type": "number",
+                    "question": f"question {number}",
+                    "ref_min": 0,
+                    "ref_max": 100,
+                }
+                for form_id in form_ids
+                for number in range(questions)
+            ],
+        )
+        form_questions = {
+            form_id: question_ids[index * questions : (index + 1) * questions]
+            for index, form_id in enumerate(form_ids)
+        }
+
+        assigned = [
+            (patient["id"], form_id)
+            for patient in patient_rows
+            for form_id in rnd.sample(form_ids, min(assignments, len(form_ids)))
+        ]
+        await _insert(
+            session,
+            FormAssignment,
+            [{"form_id": form_id, "user_id": user_id} for user_id, form_id in assigned],
+        )
+        submission_forms = [
+            (user_id, form_id, now - timedelta(days=rnd.uniform(0, months * 30)))
+            for user_id, form_id in assigned
+            for _ in range(submissions)
+        ]
+        submission_ids = await _insert(
+            session,
+            UserFormSubmission,
+            [
+                {"form_id": form_id, "user_id": user_id, "created_at": created_at}
+                for user_id, form_id, created_at in submission_forms
+            ],
+        )
+        answers = [
+            (submission_id, created_at, question_id, rnd.randint(0, 120))
+            for submission_id, (_, form_id, created_at) in zip(
+                submission_ids,
+                submission_forms,
+            )
+            for question_id in form_questions[form_id]
+        ]
+        await _insert(
+            session,
+            UserFormFieldSubmission,
+            [
+                {
+                    "submission_id": submission_id,
+                    "created_at": created_at,
+                    "question_id": question_id,
+                    "answer": str(answer),
+                    "answer_number": answer,
+                    "range_flag": evaluate_answer(answer, 0, 100),
+                }
+                for submission_id, created_at, question_id, answer in answers
+            ],
+        )
+        await session.commit()
+    await engine.dispose()
+
+    return {
+        "password": PASSWORD,
+        "managers": manager_rows,
+        "patients": patient_rows,
+        "forms": [
+            {"id": form_id, "owner": owner, "questions": form_questions[form_id]}
+            for form_id, owner in zip(form_ids, owners)
+        ],
+        "assignments": [list(pair) for pair in assigned],
+    }
+
+
+def save_dataset(dataset: Dict[str, Any], path: str) -> None:
+    """
+    Save dataset description.
+
+    :param dataset: dataset returned by `generate`.
+    :param path: path of the json file.
+    """
+    with open(path, "w") as dataset_file:
+        ujson.dump(dataset, dataset_file)
+
+
+def load_dataset(path: str) -> Dict[str, Any]:
+    """
+    Load dataset description.
+
+    :param path: path of the json file.
+    :return: dataset saved by `save_dataset`.
+    """
+    with open(path) as dataset_file:
+        return ujson.load(dataset_file)
@@ -0,0 +1,177 @@
+import asyncio
+import random
+import statistics
+import time
+from typing import Any, Dict, List, Optional
+
+import ujson
+from fastapi import FastAPI
+from httpx import AsyncClient
+from redis.asyncio import ConnectionPool
+
+from med_backend.bench.scenarios import SCENARIOS
+
+
+async def run_scenario(  # noqa: WPS210
+    client: AsyncClient,
+    name: str,
+    dataset: Dict[str, Any],
+    requests: int,
+    concurrency: int,
+    seed: int = 0,
+) -> Dict[str, float]:
+    """
+    Run one scenario and measure its latency.
+
+    :param client: client of the application.
+    :param name: name of the scenario.
+    :param dataset: generated dataset.
+    :param requests: number of requests to send.
+    :param concurrency: number of requests in flight.
+    :param seed: seed of the random generator.
+    :raises RuntimeError: if the application answered with an error.
+    :return: throughput in requests per second and latency percentiles in ms.
+    """
+    scenario = SCENARIOS[name]
+    rnd = random.Random(seed)
+    latencies: List[float] = []
+    remaining = iter(range(requests))
+
+    async def worker() -> None:  # noqa: WPS430
+        for _ in remaining:
+            started = time.perf_counter()
+            response = await scenario(client, dataset, rnd)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 400:
+                raise RuntimeError(
+                    f"{name}: {response.status_code} {response.text}",
+                )
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed,
+        "p50": percentiles[49],
+        "p95": percentiles[94],
+        "p99": percentiles[98],
+    }
+
+
+async def run_suite(
+    app: FastAPI,
+    dataset: Dict[str, Any],
+    scenarios: List[str],
+    requests: int,
+    concurrency: int,
+    warmup: int = 10,
+    redis_pool: Optional[ConnectionPool] = None,
+) -> Dict[str, Dict[str, float]]:
+    """
+    Run scenarios against the application in-process.
+
+    Startup and shutdown events are run explicitly,
+    because ASGI transport doesn't send lifespan messages.
+
+    :param app: application to benchmark.
+    :param dataset: generated dataset.
+    :param scenarios: names of scenarios to run.
+    :param requests: number of requests of every scenario.
+    :param concurrency: number of requests in flight.
+    :param warmup: number of requests sent before measurements.
+    :param redis_pool: pool used instead of the configured redis.
+    :return: results of every scenario.
+    """
+    results = {}
+    await app.router.startup()
+    if redis_pool is not None:
+        app.state.redis_pool = redis_pool
+    try:
+        async with AsyncClient(app=app, base_url="http://bench") as client:
+            for name in scenarios:
+                if warmup:
+                    await run_scenario(client, name, dataset, warmup, 1, seed=-1)
+                results[name] = await run_scenario(
+                    client,
+                    name,
+                    dataset,
+                    requests,
+                    concurrency,
+                )
+    finally:
+        await app.router.shutdown()
+    return results
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    tolerance: float,
+) -> List[str]:
+    """
+    Find scenarios which became slower than the baseline.
+
+    :param results: results of the current run.
+    :param baseline: results of a previous run.
+    :param tolerance: allowed relative slowdown, 0.2 means 20%.
+    :return: descriptions of regressions.
+    """
+    regressions = []
+    for name, current in results.items():
+        previous: Optional[Dict[str, float]] = baseline.get(name)
+        if previous is None:
+            continue
+        for metric in ("p50", "p95", "p99"):
+            if current[metric] > previous[metric] * (1 + tolerance):
+                regressions.append(
+                    f"{name} {metric}: {previous[metric]:.1f}ms"
+                    f" -> {current[metric]:.1f}ms",
+                )
+        if current["rps"] < previous["rps"] * (1 - tolerance):
+            regressions.append(
+                f"{name} rps: {previous['rps']:.1f} -> {current['rps']:.1f}",
+            )
+    return regressions
+
+
+def format_results(results: Dict[str, Dict[str, float]]) -> str:
+    """
+    Render results as a table.
+
+    :param results: results of the run.
+    :return: text table.
+    """
+    lines = [
+        f"{'scenario':<16}{'requests':>10}{'rps':>10}{'p50':>10}{'p95':>10}{'p99':>10}",
+    ]
+    for name, result in results.items():
+        lines.append(
+            f"{name:<16}{result['requests']:>10}{result['rps']:>10.1f}"
+            f"{result['p50']:>10.1f}{result['p95']:>10.1f}{result['p99']:>10.1f}",
+        )
+    return "\n".join(lines)
+
+
+def save_results(results: Dict[str, Dict[str, float]], path: str) -> None:
+    """
+    Save results to use them as a baseline.
+
+    :param results: results of the run.
+    :param path: path of the json file.
+    """
+    with open(path, "w") as results_file:
+        ujson.dump(results, results_file, indent=2)
+
+
+def load_results(path: str) -> Dict[str, Dict[str, float]]:
+    """
+    Load results saved by `save_results`.
+
+    :param path: path of the json file.
+    :return: results of the run.
+    """
+    with open(path) as results_file:
+        return ujson.load(results_file)
@@ -0,0 +1,172 @@
+import random
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict
+
+from httpx import AsyncClient, Response
+
+from med_backend.auth.services import create_access_token
+
+Scenario = Callable[[AsyncClient, Dict[str, Any], random.Random], Awaitable[Response]]
+
+
+@lru_cache(maxsize=None)
+def _auth(email: str) -> Dict[str, str]:
+    token = create_access_token(data={"sub": email})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _owner_email(dataset: Dict[str, Any], form: Dict[str, Any]) -> str:
+    return next(
+        manager["email"]
+        for manager in dataset["managers"]
+        if manager["id"] == form["owner"]
+    )
+
+
+async def login(
+    client: AsyncClient,
+    dataset: Dict[str, Any],
+    rnd: random.Random,
+) -> Response:
+    """
+    Obtain an access token, dominated by password verification.
+
+    :param client: client of the application.
+    :param dataset: generated dataset.
+    :param rnd: random generator.
+    :return: response of the application.
+    """
+    patient = rnd.choice(dataset["patients"])
+    return await client.post(
+        "/api/auth/token",
+        json={"email": patient["email"], "password": dataset["password"]},
+    )
+
+
+async def form_fetch(
+    client: AsyncClient,
+    dataset: Dict[str, Any],
+    rnd: random.Random,
+) -> Response:
+    """
+    Fetch a form with its questions.
+
+    :param client: client of the application.
+    :param dataset: generated dataset.
+    :param rnd: random generator.
+    :return: response of the application.
+    """
+    patient = rnd.choice(dataset["patients"])
+    form = rnd.choice(dataset["forms"])
+    return await client.get(
+        f"/api/forms/{form['id']}",
+        headers=_auth(patient["email"]),
+    )
+
+
+async def submit(
+    client: AsyncClient,
+    dataset: Dict[str, Any],
+    rnd: random.Random,
+) -> Response:
+    """
+    Submit answers to every question of a form.
+
+    :param client: client of the application.
+    :param dataset: generated dataset.
+    :param rnd: random generator.
+    :return: response of the application.
+    """
+    patient = rnd.choice(dataset["patients"])
+    form = rnd.choice(dataset["forms"])
+    return await client.post(
+        f"/api/forms/{form['id']}/submit",
+        json=[
+            {"field_id": field_id, "answer": str(rnd.randint(0, 120))}
+            for field_id in form["questions"]
+        ],
+        headers=_auth(patient["email"]),
+    )
+
+
+async def assign(
+    client: AsyncClient,
+    dataset: Dict[str, Any],
+    rnd: random.Random,
+) -> Response:
+    """
+    Assign a form to a batch of patients with personal reference ranges.
+
+    :param client: client of the application.
+    :param dataset: generated dataset.
+    :param rnd: random generator.
+    :return: response of the application.
+    """
+    form = rnd.choice(dataset["forms"])
+    patients = rnd.sample(dataset["patients"], min(50, len(dataset["patients"])))
+    return await client.post(
+        f"/api/forms/{form['id']}/assign/bulk",
+        json={
+            "assigments": [
+                {
+                    "user_id": patient["id"],
+                    "question_refs": [
+                        {"id": field_id, "ref_min": 10, "ref_max": 90}
+                        for field_id in form["questions"]
+                    ],
+                }
+                for patient in patients
+            ],
+        },
+        headers=_auth(_owner_email(dataset, form)),
+    )
+
+
+async def answers_report(
+    client: AsyncClient,
+    dataset: Dict[str, Any],
+    rnd: random.Random,
+) -> Response:
+    """
+    Build the report of all submissions of a form.
+
+    :param client: client of the application.
+    :param dataset: generated dataset.
+    :param rnd: random generator.
+    :return: response of the application.
+    """
+    form = rnd.choice(dataset["forms"])
+    return await client.get(
+        f"/api/forms/{form['id']}/answers",
+        headers=_auth(_owner_email(dataset, form)),
+    )
+
+
+async def form_stats(
+    client: AsyncClient,
+    dataset: Dict[str, Any],
+    rnd: random.Random,
+) -> Response:
+    """
+    Get statistics of answers to a form.
+
+    :param client: client of the application.
+    :param dataset: generated dataset.
+    :param rnd: random generator.
+    :return: response of the application.
+    """
+    form = rnd.choice(dataset["forms"])
+    return await client.get(
+        f"/api/forms/{form['id']}/stats",
+        headers=_auth(_owner_email(dataset, form)),
+    )
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "login": login,
+    "form_fetch": form_fetch,
+    "submit": submit,
+    "assign": assign,
+    "answers_report": answers_report,
+    "form_stats": form_stats,
+}
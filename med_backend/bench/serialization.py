@@ -0,0 +1,123 @@
+import asyncio
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List
+
+from fastapi.responses import UJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from med_backend.forms.crud import group_submission_dicts, group_submission_rows
+from med_backend.forms.schemas import FullSubmission
+
+ReportRow = namedtuple(
+    "ReportRow",
+    [
+        "submission_id",
+        "created_at",
+        "fio",
+        "field_id",
+        "question",
+        "type",
+        "answer",
+        "ref_min",
+        "ref_max",
+    ],
+)
+
+
+def make_rows(submissions: int, questions: int) -> List[ReportRow]:
+    """
+    Build rows shaped like the answers report query.
+
+    :param submissions: number of submissions.
+    :param questions: number of answers in every submission.
+    :return: report rows.
+    """
+    created_at = datetime.now(timezone.utc)
+    return [
+        ReportRow(
+            submission_id,
+            created_at,
+            f"patient {submission_id}",
+            field_id,
+            f"question {field_id}",
+            "number",
+            str(submission_id % 120),
+            0,
+            100,
+        )
+        for submission_id in range(submissions)
+        for field_id in range(questions)
+    ]
+
+
+def validated_path(rows: List[ReportRow]) -> bytes:
+    """
+    Serialize the report through pydantic models and response_model.
+
+    :param rows: report rows.
+    :return: response body.
+    """
+    field = create_response_field(name="bench", type_=List[FullSubmission])
+    content = asyncio.run(
+        serialize_response(
+            field=field,
+            response_content=list(group_submission_rows(rows)),
+        ),
+    )
+    return UJSONResponse(content).body
+
+
+def fast_path(rows: List[ReportRow]) -> bytes:
+    """
+    Serialize the report from rows straight to bytes.
+
+    :param rows: report rows.
+    :return: response body.
+    """
+    return UJSONResponse(list(group_submission_dicts(rows))).body
+
+
+def measure(
+    serializer: Callable[[List[ReportRow]], bytes],
+    rows: List[ReportRow],
+    repeat: int,
+) -> float:
+    """
+    Measure the best time of the serializer.
+
+    :param serializer: function to measure.
+    :param rows: report rows.
+    :param repeat: number of runs.
+    :return: best time in ms.
+    """
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        serializer(rows)
+        timings.append((time.perf_counter() - started) * 1000)
+    return min(timings)
+
+
+def run_serialization(
+    submissions: int,
+    questions: int,
+    repeat: int,
+) -> Dict[str, Any]:
+    """
+    Compare serialization of the answers report.
+
+    :param submissions: number of submissions in the report.
+    :param questions: number of answers in every submission.
+    :param repeat: number of runs of every path.
+    :raises RuntimeError: if the paths produce different bodies.
+    :return: best times of both paths and the speedup.
+    """
+    rows = make_rows(submissions, questions)
+    if validated_path(rows) != fast_path(rows):
+        raise RuntimeError("Serialization paths produce different bodies")
+    validated = measure(validated_path, rows, repeat)
+    fast = measure(fast_path, rows, repeat)
+    return {"validated_ms": validated, "fast_ms": fast, "speedup": validated / fast}
@@ -1,4 +1,7 @@
-from typing import Any, AsyncGenerator
+import asyncio
+from contextlib import contextmanager
+from datetime import date
+from typing import Any, AsyncGenerator, Callable, ContextManager, Iterator
 
 import pytest
 from fakeredis import FakeServer
@@ -6,11 +9,19 @@ from fakeredis.aioredis import FakeConnection
 from fastapi import FastAPI
 from httpx import AsyncClient
 from redis.asyncio import ConnectionPool
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from med_backend.db.dependencies import get_db_session
-from med_backend.db.utils import create_database, drop_database
+from med_backend.db.instrumentation import (
+    QueryStats,
+    collect_query_stats,
+    instrument_engine,
+)
+from med_backend.db.loaders import LOADERS_KEY
+from med_backend.db.partitions import maintain_partitions
+from med_backend.db.utils import create_database, drop_database, run_migrations
 from med_backend.services.redis.dependency import get_redis_pool
 from med_backend.settings import settings
 from med_backend.web.application import get_app
@@ -31,18 +42,24 @@ async def _engine() -> AsyncGenerator[AsyncEngine, None]:
     """
     Create engine and databases.
 
+    The schema is built by migrations and partitions are prepared
+    like `migrate` does, so tests see the same tables and indexes
+    as production.
+
     :yield: new engine.
     """
-    from med_backend.db.meta import meta  # noqa: WPS433
-    from med_backend.db.models import load_all_models  # noqa: WPS433
-
-    load_all_models()
-
     await create_database()
+    await asyncio.to_thread(run_migrations)
 
     engine = create_async_engine(str(settings.db_url))
+    instrument_engine(engine)
     async with engine.begin() as conn:
-        await conn.run_sync(meta.create_all)
+        await conn.run_sync(
+            maintain_partitions,
+            date.today(),
+            settings.partition_months_ahead,
+            settings.partition_retention_months,
+        )
 
     try:
         yield engine
@@ -73,6 +90,12 @@ async def dbsession(
         class_=AsyncSession,
     )
     session = session_maker()
+    await connection.begin_nested()
+
+    @event.listens_for(session.sync_session, "after_transaction_end")
+    def restart_savepoint(*_: Any) -> None:
+        if not connection.closed and not connection.in_nested_transaction():
+            connection.sync_connection.begin_nested()
 
     try:
         yield session
@@ -82,6 +105,41 @@ async def dbsession(
         await connection.close()
 
 
+@pytest.fixture
+def assert_max_queries(
+    _engine: AsyncEngine,
+    dbsession: AsyncSession,
+) -> Callable[[int], ContextManager[QueryStats]]:
+    """
+    Check query budget of the code inside the block.
+
+    Requests of tests share one session, so its loaders and
+    identity map are dropped before the block, like every request
+    in production starts with a new session.
+
+    >>> with assert_max_queries(3):
+    >>>     await client.get("/api/forms/1")
+
+    :param _engine: current engine.
+    :param dbsession: session of the test.
+    :return: context manager factory accepting max number of queries.
+    """
+
+    @contextmanager
+    def _assert_max_queries(  # noqa: WPS430
+        max_queries: int,
+    ) -> Iterator[QueryStats]:
+        dbsession.info.pop(LOADERS_KEY, None)
+        dbsession.expunge_all()
+        with collect_query_stats() as stats:
+            yield stats
+        assert (  # noqa: S101
+            stats.count <= max_queries
+        ), f"{stats.count} queries executed, expected at most {max_queries}"
+
+    return _assert_max_queries
+
+
 @pytest.fixture
 async def fake_redis_pool() -> AsyncGenerator[ConnectionPool, None]:
     """
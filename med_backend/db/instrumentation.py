@@ -0,0 +1,81 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+class QueryStats:
+    """Number of executed statements and time spent in them."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.duration = 0.0  # noqa: WPS358
+
+    @property
+    def duration_ms(self) -> float:
+        """
+        Time spent in the database.
+
+        :return: milliseconds.
+        """
+        return self.duration * 1000
+
+
+# stats of all enclosing `collect_query_stats` blocks
+_active_stats: ContextVar[Tuple[QueryStats, ...]] = ContextVar(
+    "active_query_stats",
+    default=(),
+)
+
+
+@contextmanager
+def collect_query_stats() -> Iterator[QueryStats]:
+    """
+    Count statements executed inside the block.
+
+    Blocks can be nested, every one of them gets all
+    statements executed inside it.
+
+    :yield: stats updated while the block runs.
+    """
+    stats = QueryStats()
+    token = _active_stats.set((*_active_stats.get(), stats))
+    try:
+        yield stats
+    finally:
+        _active_stats.reset(token)
+
+
+def _before_cursor_execute(conn: Connection, *args: Any) -> None:
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn: Connection, *args: Any) -> None:
+    duration = time.perf_counter() - conn.info["query_start_time"].pop()
+    for stats in _active_stats.get():
+        stats.count += 1
+        stats.duration += duration
+
+
+def _handle_error(context: Any) -> None:
+    start_times = context.connection.info.get("query_start_time")
+    if start_times:
+        start_times.pop()
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """
+    Record all statements of the engine in the active query stats.
+
+    :param engine: engine to instrument.
+    """
+    sync_engine = engine.sync_engine
+    if event.contains(sync_engine, "after_cursor_execute", _after_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
@@ -0,0 +1,150 @@
+from typing import (
+    Any,
+    Dict,
+    Generic,
+    Iterable,
+    List,
+    Optional,
+    Protocol,
+    Tuple,
+    Type,
+    TypeVar,
+)
+
+from sqlalchemy import Table, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute, selectinload
+
+
+class Identified(Protocol):
+    """Model with an integer primary key named id."""
+
+    __table__: Table
+    id: int  # noqa: WPS125
+
+
+ModelType = TypeVar("ModelType", bound=Identified)
+
+LOADERS_KEY = "loaders"
+
+
+class Loader(Generic[ModelType]):
+    """
+    Identity cache of rows loaded by primary key in one session.
+
+    Every row is read at most once, missing rows are remembered too.
+    Rows are kept up to date by ORM-enabled UPDATEs of the session,
+    deleted ones have to be cleared.
+    """
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        model: Type[ModelType],
+        options: Iterable[Any] = (),
+    ) -> None:
+        self._session = session
+        self._model = model
+        self._options = list(options)
+        self._rows: Dict[int, Optional[ModelType]] = {}
+
+    async def load(self, pk: int) -> Optional[ModelType]:
+        """
+        Get the row by its id.
+
+        :param pk: id of the row.
+        :return: row or None if it doesn't exist.
+        """
+        rows = await self.load_many([pk])
+        return rows[0]
+
+    async def load_many(self, pks: Iterable[int]) -> List[Optional[ModelType]]:
+        """
+        Get rows by their ids, reading the missing ones with one query.
+
+        :param pks: ids of rows.
+        :return: rows or None in the order of ids.
+        """
+        pks = list(pks)
+        missing = [pk for pk in dict.fromkeys(pks) if pk not in self._rows]
+        if missing:
+            r = await self._session.execute(
+                select(self._model)
+                .options(*self._options)
+                .where(self._model.__table__.c.id.in_(missing)),
+            )
+            loaded = {row.id: row for row in r.scalars().all()}
+            for pk in missing:
+                self._rows[pk] = loaded.get(pk)
+        return [self._rows[pk] for pk in pks]
+
+    def prime(self, row: ModelType) -> None:
+        """
+        Put a row, that was loaded another way.
+
+        :param row: loaded row.
+        """
+        self._rows.setdefault(row.id, row)
+
+    def clear(self, pk: Optional[int] = None) -> None:
+        """
+        Forget the row or all rows.
+
+        :param pk: id of the row, all rows are forgotten if omitted.
+        """
+        if pk is None:
+            self._rows.clear()
+        else:
+            self._rows.pop(pk, None)
+
+
+def _loaders(session: AsyncSession) -> Dict[Tuple[type, Tuple[str, ...]], Loader[Any]]:
+    return session.info.setdefault(LOADERS_KEY, {})
+
+
+def get_loader(
+    session: AsyncSession,
+    model: Type[ModelType],
+    *relationships: InstrumentedAttribute,
+) -> Loader[ModelType]:
+    """
+    Get the loader of the model for the session.
+
+    Loaders live in the session info, so they are shared by all
+    services of a request and dropped with its session.
+    Every set of eagerly loaded relationships gets its own loader,
+    so rows are never returned without the relationships asked for.
+
+    :param session: database session.
+    :param model: model of rows.
+    :param relationships: relationships of the model to load with rows.
+    :return: loader.
+    """
+    key = (model, tuple(sorted(attr.key for attr in relationships)))
+    loaders = _loaders(session)
+    if key not in loaders:
+        loaders[key] = Loader(
+            session,
+            model,
+            [selectinload(attr) for attr in relationships],
+        )
+    return loaders[key]
+
+
+def clear_loaders(
+    session: AsyncSession,
+    model: Type[ModelType],
+    pk: Optional[int] = None,
+) -> None:
+    """
+    Forget the row or all rows in every loader of the model.
+
+    Must be called after rows of the model are deleted.
+
+    :param session: database session.
+    :param model: model of rows.
+    :param pk: id of the row, all rows are forgotten if omitted.
+    """
+    for (loader_model, _), loader in _loaders(session).items():
+        if loader_model is model:
+            loader.clear(pk)
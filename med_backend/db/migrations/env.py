@@ -0,0 +1,123 @@
+import asyncio
+from logging.config import fileConfig
+from typing import Optional
+
+from alembic import context
+from sqlalchemy.ext.asyncio.engine import create_async_engine
+from sqlalchemy.future import Connection
+from sqlalchemy.sql.schema import SchemaItem
+
+from med_backend.db.meta import meta
+from med_backend.db.models import load_all_models
+from med_backend.db.partitions import is_partition
+from med_backend.settings import settings
+
+# this is the Alembic Config object, which provides
+# access to the values within the .ini file in use.
+config = context.config
+
+
+load_all_models()
+# Interpret the config file for Python logging.
+# This line sets up loggers basically.
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+# add your model's MetaData object here
+# for 'autogenerate' support
+# from myapp import mymodel
+# target_metadata = mymodel.Base.metadata
+target_metadata = meta
+
+# other values from the config, defined by the needs of env.py,
+# can be acquired:
+# my_important_option = config.get_main_option("my_important_option")
+# ... etc.
+
+
+def include_object(  # noqa: WPS110
+    obj: SchemaItem,
+    name: Optional[str],
+    type_: str,
+    reflected: bool,
+    compare_to: Optional[SchemaItem],
+) -> bool:
+    """
+    Skip partitions of partitioned tables in autogenerate.
+
+    Postgres clones indexes and foreign keys of partitioned
+    tables to their partitions, they are not in the models either.
+
+    :param obj: schema object.
+    :param name: name of the object.
+    :param type_: type of the object.
+    :param reflected: whether the object is reflected from the database.
+    :param compare_to: object of the models it is compared to.
+    :return: whether to compare the object.
+    """
+    if type_ == "table" and name is not None:
+        return not is_partition(name)
+    if type_ == "foreign_key_constraint":
+        return not is_partition(obj.referred_table.name)
+    return True
+
+
+async def run_migrations_offline() -> None:
+    """Run migrations in 'offline' mode.
+
+    This configures the context with just a URL
+    and not an Engine, though an Engine is acceptable
+    here as well.  By skipping the Engine creation
+    we don't even need a DBAPI to be available.
+
+    Calls to context.execute() here emit the given string to the
+    script output.
+
+    """
+    context.configure(
+        url=str(settings.db_url),
+        target_metadata=target_metadata,
+        include_object=include_object,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def do_run_migrations(connection: Connection) -> None:
+    """
+    Run actual sync migrations.
+
+    :param connection: connection to the database.
+    """
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_migrations_online() -> None:
+    """
+    Run migrations in 'online' mode.
+
+    In this scenario we need to create an Engine
+    and associate a connection with the context.
+    """
+    connectable = create_async_engine(str(settings.db_url))
+
+    async with connectable.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+
+    await connectable.dispose()
+
+
+if context.is_offline_mode():
+    asyncio.run(run_migrations_offline())
+else:
+    asyncio.run(run_migrations_online())
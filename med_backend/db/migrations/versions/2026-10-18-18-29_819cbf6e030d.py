@@ -0,0 +1,62 @@
+"""Add indexes for forms queries
+
+Revision ID: 819cbf6e030d
+Revises: 2b7380507a71
+Create Date: 2026-10-18 18:29:53.537731
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "819cbf6e030d"
+down_revision = "2b7380507a71"
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    ("ix_form_assignment_user_id", "form_assignment", "user_id"),
+    ("ix_form_questions_form_id", "form_questions", "form_id"),
+    (
+        "ix_user_form_field_submission_submission_id",
+        "user_form_field_submission",
+        "submission_id",
+    ),
+    ("ix_user_form_submission_form_id", "user_form_submission", "form_id"),
+)
+UNIQUE_CONSTRAINTS = (
+    ("form_assignment_form_id_user_id_key", "form_assignment", ("form_id", "user_id")),
+    (
+        "user_form_rev_question_user_id_question_id_key",
+        "user_form_rev_question",
+        ("user_id", "question_id"),
+    ),
+)
+
+
+def upgrade() -> None:
+    """Run the upgrade migrations."""
+    # databases created by `create_all` may already have some of these
+    inspector = sa.inspect(op.get_bind())
+    for name, table, column in INDEXES:
+        op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({column})")
+
+    for name, table, columns in UNIQUE_CONSTRAINTS:
+        existing = inspector.get_unique_constraints(table)
+        if any(constraint["name"] == name for constraint in existing):
+            continue
+        # keep the oldest of the duplicated rows
+        same_values = " AND ".join(f"a.{column} = b.{column}" for column in columns)
+        op.execute(
+            f"DELETE FROM {table} a USING {table} b "  # noqa: S608
+            f"WHERE a.id > b.id AND {same_values}",
+        )
+        op.create_unique_constraint(name, table, list(columns))
+
+
+def downgrade() -> None:
+    """Run the downgrade migrations."""
+    for name, table, _ in reversed(UNIQUE_CONSTRAINTS):
+        op.drop_constraint(name, table, type_="unique")
+    for name, table, _ in reversed(INDEXES):  # noqa: WPS440
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,30 @@
+"""Add numeric answers
+
+Revision ID: 7d87bd861fee
+Revises: 819cbf6e030d
+Create Date: 2026-10-18 19:05:12.418263
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "7d87bd861fee"
+down_revision = "819cbf6e030d"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Run the upgrade migrations."""
+    # existing answers are filled by `python -m med_backend backfill-numbers`,
+    # adding a nullable column doesn't rewrite the table
+    op.add_column(
+        "user_form_field_submission",
+        sa.Column("answer_number", sa.Float(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Run the downgrade migrations."""
+    op.drop_column("user_form_field_submission", "answer_number")
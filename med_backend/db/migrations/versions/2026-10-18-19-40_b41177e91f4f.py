@@ -0,0 +1,35 @@
+"""Add range flags of answers
+
+Revision ID: b41177e91f4f
+Revises: 7d87bd861fee
+Create Date: 2026-10-18 19:40:37.902114
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b41177e91f4f"
+down_revision = "7d87bd861fee"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Run the upgrade migrations."""
+    op.add_column(
+        "user_form_field_submission",
+        sa.Column("range_flag", sa.String(), nullable=True),
+    )
+    op.create_index(
+        "ix_users_latest_form_result_id",
+        "users",
+        ["latest_form_result", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Run the downgrade migrations."""
+    op.drop_index("ix_users_latest_form_result_id", table_name="users")
+    op.drop_column("user_form_field_submission", "range_flag")
@@ -0,0 +1,44 @@
+"""Add statistics of answers
+
+Revision ID: 418cf8446ee8
+Revises: b41177e91f4f
+Create Date: 2026-10-18 20:10:04.271835
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "418cf8446ee8"
+down_revision = "b41177e91f4f"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Run the upgrade migrations."""
+    # statistics of existing answers are built by `python -m med_backend rebuild-stats`
+    op.create_table(
+        "form_question_stats",
+        sa.Column("question_id", sa.Integer(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("sum", sa.Float(), nullable=False),
+        sa.Column("min", sa.Float(), nullable=False),
+        sa.Column("max", sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(["question_id"], ["form_questions.id"]),
+        sa.PrimaryKeyConstraint("question_id"),
+    )
+    op.create_table(
+        "form_question_stats_bucket",
+        sa.Column("question_id", sa.Integer(), nullable=False),
+        sa.Column("key", sa.Integer(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["question_id"], ["form_questions.id"]),
+        sa.PrimaryKeyConstraint("question_id", "key"),
+    )
+
+
+def downgrade() -> None:
+    """Run the downgrade migrations."""
+    op.drop_table("form_question_stats_bucket")
+    op.drop_table("form_question_stats")
@@ -0,0 +1,159 @@
+"""Partition submissions by month
+
+Revision ID: b9cb260d3b2f
+Revises: 418cf8446ee8
+Create Date: 2026-10-18 20:45:51.113270
+
+"""
+from datetime import date
+
+from alembic import op
+
+from med_backend.db.partitions import create_monthly_partitions
+from med_backend.settings import settings
+
+# revision identifiers, used by Alembic.
+revision = "b9cb260d3b2f"
+down_revision = "418cf8446ee8"
+branch_labels = None
+depends_on = None
+
+SUBMISSIONS = "user_form_submission"
+ANSWERS = "user_form_field_submission"
+INDEXES = (
+    f"ix_{SUBMISSIONS}_id",
+    f"ix_{SUBMISSIONS}_form_id",
+    f"ix_{ANSWERS}_id",
+    f"ix_{ANSWERS}_submission_id",
+)
+
+
+def _detach_old_tables(answers_fkey: str) -> None:
+    # old tables keep their data until it is copied,
+    # names of their constraints and sequences are taken by the new ones
+    op.execute(f"ALTER TABLE {ANSWERS} DROP CONSTRAINT {answers_fkey}")
+    for table in (ANSWERS, SUBMISSIONS):
+        op.execute(f"ALTER TABLE {table} RENAME TO {table}_old")
+        op.execute(
+            f"ALTER TABLE {table}_old "
+            f"RENAME CONSTRAINT {table}_pkey TO {table}_old_pkey",
+        )
+        op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY NONE")
+    for index in INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {index}")
+
+
+def _drop_old_tables() -> None:
+    for table in (ANSWERS, SUBMISSIONS):
+        op.execute(f"DROP TABLE {table}_old")
+        op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+
+
+def upgrade() -> None:
+    """Run the upgrade migrations."""
+    _detach_old_tables(f"{ANSWERS}_submission_id_fkey")
+    op.execute(
+        f"""
+        CREATE TABLE {SUBMISSIONS} (
+            id INTEGER NOT NULL DEFAULT nextval('{SUBMISSIONS}_id_seq'),
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            form_id INTEGER NOT NULL
+                CONSTRAINT {SUBMISSIONS}_form_id_fkey REFERENCES forms (id),
+            user_id INTEGER NOT NULL
+                CONSTRAINT {SUBMISSIONS}_user_id_fkey REFERENCES users (id),
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+        """,
+    )
+    op.execute(
+        f"""
+        CREATE TABLE {ANSWERS} (
+            id INTEGER NOT NULL DEFAULT nextval('{ANSWERS}_id_seq'),
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            submission_id INTEGER NOT NULL,
+            question_id INTEGER NOT NULL
+                CONSTRAINT {ANSWERS}_question_id_fkey REFERENCES form_questions (id),
+            answer VARCHAR,
+            answer_number DOUBLE PRECISION,
+            range_flag VARCHAR,
+            PRIMARY KEY (id, created_at),
+            FOREIGN KEY (submission_id, created_at)
+                REFERENCES {SUBMISSIONS} (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+        """,
+    )
+    for table in (SUBMISSIONS, ANSWERS):
+        op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+    create_monthly_partitions(
+        op.get_bind(),
+        date.today(),
+        settings.partition_months_ahead + 1,
+    )
+
+    # the time of existing submissions is unknown,
+    # they are stamped with the time of the migration
+    op.execute(
+        f"INSERT INTO {SUBMISSIONS} (id, created_at, form_id, user_id) "
+        f"SELECT id, now(), form_id, user_id FROM {SUBMISSIONS}_old",
+    )
+    op.execute(
+        f"INSERT INTO {ANSWERS} "
+        "(id, created_at, submission_id, question_id, answer, answer_number, "
+        "range_flag) "
+        "SELECT id, now(), submission_id, question_id, answer, answer_number, "
+        f"range_flag FROM {ANSWERS}_old",
+    )
+    _drop_old_tables()
+
+    op.create_index(f"ix_{SUBMISSIONS}_id", SUBMISSIONS, ["id"])
+    op.create_index(f"ix_{SUBMISSIONS}_form_id", SUBMISSIONS, ["form_id"])
+    op.create_index(f"ix_{ANSWERS}_id", ANSWERS, ["id"])
+    op.create_index(f"ix_{ANSWERS}_submission_id", ANSWERS, ["submission_id"])
+
+
+def downgrade() -> None:
+    """Run the downgrade migrations."""
+    _detach_old_tables(f"{ANSWERS}_submission_id_created_at_fkey")
+    op.execute(
+        f"""
+        CREATE TABLE {SUBMISSIONS} (
+            id INTEGER NOT NULL DEFAULT nextval('{SUBMISSIONS}_id_seq'),
+            form_id INTEGER NOT NULL
+                CONSTRAINT {SUBMISSIONS}_form_id_fkey REFERENCES forms (id),
+            user_id INTEGER NOT NULL
+                CONSTRAINT {SUBMISSIONS}_user_id_fkey REFERENCES users (id),
+            PRIMARY KEY (id, form_id, user_id)
+        )
+        """,
+    )
+    op.create_index(f"ix_{SUBMISSIONS}_id", SUBMISSIONS, ["id"], unique=True)
+    op.execute(
+        f"""
+        CREATE TABLE {ANSWERS} (
+            id INTEGER NOT NULL DEFAULT nextval('{ANSWERS}_id_seq'),
+            submission_id INTEGER NOT NULL REFERENCES {SUBMISSIONS} (id),
+            question_id INTEGER NOT NULL
+                CONSTRAINT {ANSWERS}_question_id_fkey REFERENCES form_questions (id),
+            answer VARCHAR,
+            answer_number DOUBLE PRECISION,
+            range_flag VARCHAR,
+            PRIMARY KEY (id, submission_id, question_id)
+        )
+        """,
+    )
+    op.execute(
+        f"INSERT INTO {SUBMISSIONS} (id, form_id, user_id) "
+        f"SELECT id, form_id, user_id FROM {SUBMISSIONS}_old",
+    )
+    op.execute(
+        f"INSERT INTO {ANSWERS} "
+        "(id, submission_id, question_id, answer, answer_number, range_flag) "
+        "SELECT id, submission_id, question_id, answer, answer_number, range_flag "
+        f"FROM {ANSWERS}_old",
+    )
+    # partitions are dropped with their parent tables
+    _drop_old_tables()
+
+    op.create_index(f"ix_{SUBMISSIONS}_form_id", SUBMISSIONS, ["form_id"])
+    op.create_index(f"ix_{ANSWERS}_id", ANSWERS, ["id"], unique=True)
+    op.create_index(f"ix_{ANSWERS}_submission_id", ANSWERS, ["submission_id"])
@@ -0,0 +1,32 @@
+"""Add index of submissions by user and form
+
+Revision ID: 5c0e2d9a41f7
+Revises: b9cb260d3b2f
+Create Date: 2026-10-18 21:20:11.482930
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5c0e2d9a41f7"
+down_revision = "b9cb260d3b2f"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Run the upgrade migrations."""
+    op.create_index(
+        "ix_user_form_submission_user_id_form_id_created_at",
+        "user_form_submission",
+        ["user_id", "form_id", "created_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Run the downgrade migrations."""
+    op.drop_index(
+        "ix_user_form_submission_user_id_form_id_created_at",
+        table_name="user_form_submission",
+    )
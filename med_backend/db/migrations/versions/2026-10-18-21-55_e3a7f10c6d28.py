@@ -0,0 +1,39 @@
+"""Add ingest ids of submissions
+
+Revision ID: e3a7f10c6d28
+Revises: 5c0e2d9a41f7
+Create Date: 2026-10-18 21:55:42.107315
+
+"""
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "e3a7f10c6d28"
+down_revision = "5c0e2d9a41f7"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Run the upgrade migrations."""
+    op.add_column(
+        "user_form_submission",
+        sa.Column("ingest_id", postgresql.UUID(as_uuid=True), nullable=True),
+    )
+    op.create_unique_constraint(
+        "user_form_submission_ingest_id_created_at_key",
+        "user_form_submission",
+        ["ingest_id", "created_at"],
+    )
+
+
+def downgrade() -> None:
+    """Run the downgrade migrations."""
+    op.drop_constraint(
+        "user_form_submission_ingest_id_created_at_key",
+        "user_form_submission",
+        type_="unique",
+    )
+    op.drop_column("user_form_submission", "ingest_id")
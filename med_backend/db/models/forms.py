@@ -1,10 +1,26 @@
+from datetime import datetime
 from typing import List
-
-from sqlalchemy import Column, ForeignKey, Integer, String
+from uuid import UUID
+
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    ForeignKeyConstraint,
+    Index,
+    Integer,
+    String,
+    UniqueConstraint,
+    event,
+    func,
+)
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy.orm import relationship
 
 from med_backend.db.base import Base
 from med_backend.db.models.users import UserScheme
+from med_backend.db.partitions import create_default_partition
 
 
 class FormScheme(Base):
@@ -41,7 +57,12 @@ class FormQuestion(Base):
     )
 
     # form
-    form_id: int = Column(Integer, ForeignKey(FormScheme.id), primary_key=True)
+    form_id: int = Column(
+        Integer,
+        ForeignKey(FormScheme.id),
+        primary_key=True,
+        index=True,
+    )
     form: FormScheme = relationship("FormScheme", foreign_keys="FormQuestion.form_id")
 
     type: str = Column(String, default="number")
@@ -52,6 +73,8 @@ class FormQuestion(Base):
 
 class FormAssignment(Base):
     __tablename__ = "form_assignment"
+    __table_args__ = (UniqueConstraint("form_id", "user_id"),)
+
     id: int = Column(
         Integer,
         primary_key=True,
@@ -63,12 +86,19 @@ class FormAssignment(Base):
     form_id: int = Column(Integer, ForeignKey(FormScheme.id), primary_key=True)
     form: FormScheme = relationship("FormScheme", foreign_keys="FormAssignment.form_id")
 
-    user_id: int = Column(Integer, ForeignKey(UserScheme.id), primary_key=True)
+    user_id: int = Column(
+        Integer,
+        ForeignKey(UserScheme.id),
+        primary_key=True,
+        index=True,
+    )
     user: UserScheme = relationship("UserScheme", foreign_keys="FormAssignment.user_id")
 
 
 class UserRevQuestion(Base):
     __tablename__ = "user_form_rev_question"
+    __table_args__ = (UniqueConstraint("user_id", "question_id"),)
+
     id: int = Column(
         Integer,
         primary_key=True,
@@ -97,28 +127,54 @@ class UserRevQuestion(Base):
 
 class UserFormSubmission(Base):
     __tablename__ = "user_form_submission"
+    # partitioned by month, so primary key has to include created_at
+    __table_args__ = (
+        # time series of a patient answers to a form
+        Index(
+            "ix_user_form_submission_user_id_form_id_created_at",
+            "user_id",
+            "form_id",
+            "created_at",
+        ),
+        # submissions written by the ingestion worker are stored once
+        UniqueConstraint("ingest_id", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
     id: int = Column(
         Integer,
         primary_key=True,
         autoincrement=True,
-        unique=True,
         index=True,
     )
+    created_at: datetime = Column(
+        DateTime(timezone=True),
+        primary_key=True,
+        server_default=func.now(),
+    )
 
     # form
-    form_id: int = Column(Integer, ForeignKey(FormScheme.id), primary_key=True)
+    form_id: int = Column(
+        Integer,
+        ForeignKey(FormScheme.id),
+        nullable=False,
+        index=True,
+    )
     form: FormScheme = relationship(
         "FormScheme",
         foreign_keys="UserFormSubmission.form_id",
     )
 
     # user
-    user_id: int = Column(Integer, ForeignKey(UserScheme.id), primary_key=True)
+    user_id: int = Column(Integer, ForeignKey(UserScheme.id), nullable=False)
     user: UserScheme = relationship(
         "UserScheme",
         foreign_keys="UserFormSubmission.user_id",
     )
 
+    # set for submissions queued to the ingestion stream
+    ingest_id: UUID | None = Column(PG_UUID(as_uuid=True), nullable=True)
+
     answers: List["UserFormFieldSubmission"] = relationship(
         "UserFormFieldSubmission",
         back_populates="submission",
@@ -127,30 +183,67 @@ class UserFormSubmission(Base):
 
 class UserFormFieldSubmission(Base):
     __tablename__ = "user_form_field_submission"
+    # answers share created_at with their submission and its partition month
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ["submission_id", "created_at"],
+            [UserFormSubmission.id, UserFormSubmission.created_at],
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
     id: int = Column(
         Integer,
         primary_key=True,
         autoincrement=True,
-        unique=True,
         index=True,
     )
+    created_at: datetime = Column(DateTime(timezone=True), primary_key=True)
 
     # submission
-    submission_id: int = Column(
-        Integer,
-        ForeignKey(UserFormSubmission.id),
-        primary_key=True,
-    )
+    submission_id: int = Column(Integer, nullable=False, index=True)
     submission: UserFormSubmission = relationship(
         "UserFormSubmission",
-        foreign_keys="UserFormFieldSubmission.submission_id",
+        back_populates="answers",
     )
 
     # question
-    question_id: int = Column(Integer, ForeignKey(FormQuestion.id), primary_key=True)
+    question_id: int = Column(Integer, ForeignKey(FormQuestion.id), nullable=False)
     question: FormQuestion = relationship(
         "FormQuestion",
         foreign_keys="UserFormFieldSubmission.question_id",
     )
 
     answer: str = Column(String)
+    # answer parsed as a number, filled for questions with the "number" type
+    answer_number: float | None = Column(Float, nullable=True)
+    # low, normal or high, compared with the effective reference range
+    range_flag: str | None = Column(String, nullable=True)
+
+
+# partitions are maintained by `python -m med_backend partitions`,
+# rows without a monthly partition land in the default one
+for _table in (UserFormSubmission.__table__, UserFormFieldSubmission.__table__):
+    event.listen(_table, "after_create", create_default_partition)
+
+
+class FormQuestionStats(Base):
+    """Running aggregates of numeric answers to a question."""
+
+    __tablename__ = "form_question_stats"
+
+    question_id: int = Column(Integer, ForeignKey(FormQuestion.id), primary_key=True)
+    count: int = Column(Integer, nullable=False, default=0)
+    sum: float = Column(Float, nullable=False, default=0)
+    min: float = Column(Float, nullable=False)
+    max: float = Column(Float, nullable=False)
+
+
+class FormQuestionStatsBucket(Base):
+    """Number of answers to a question in a bucket of the quantile sketch."""
+
+    __tablename__ = "form_question_stats_bucket"
+
+    question_id: int = Column(Integer, ForeignKey(FormQuestion.id), primary_key=True)
+    key: int = Column(Integer, primary_key=True)
+    count: int = Column(Integer, nullable=False, default=0)
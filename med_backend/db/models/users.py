@@ -1,7 +1,7 @@
 from datetime import date
 
 from pydantic import EmailStr
-from sqlalchemy import Boolean, Column, Date, Integer, String
+from sqlalchemy import Boolean, Column, Date, Index, Integer, String
 
 from med_backend.db.base import Base
 
@@ -10,6 +10,10 @@ class UserScheme(Base):
     """Class to store base info about users"""
 
     __tablename__ = "users"
+    # abnormal patients are listed by result with keyset pagination by id
+    __table_args__ = (
+        Index("ix_users_latest_form_result_id", "latest_form_result", "id"),
+    )
 
     id: int = Column(
         Integer,
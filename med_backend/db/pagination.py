@@ -0,0 +1,83 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from typing import Any, Generic, List, Optional, Tuple, TypeVar
+
+import ujson
+from fastapi import HTTPException
+from pydantic.generics import GenericModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+from sqlalchemy.sql import Select
+
+ItemType = TypeVar("ItemType")
+
+# largest page list endpoints return
+MAX_PAGE_SIZE = 1000
+
+
+class Page(GenericModel, Generic[ItemType]):
+    """Page of a list endpoint with the cursor of the next one."""
+
+    items: List[ItemType]
+    next_cursor: Optional[str]
+
+
+def encode_cursor(last_id: int) -> str:
+    """
+    Build opaque cursor pointing after the row.
+
+    :param last_id: id of the last row of the page.
+    :return: cursor.
+    """
+    return urlsafe_b64encode(ujson.dumps({"id": last_id}).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> int:
+    """
+    Get id of the last row of the previous page.
+
+    :param cursor: cursor returned with the previous page.
+    :raises HTTPException: if cursor is malformed.
+    :return: id of the row.
+    """
+    try:
+        last_id = ujson.loads(urlsafe_b64decode(cursor.encode()))["id"]
+    except (BinasciiError, ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=422, detail="Invalid cursor")
+    if not isinstance(last_id, int):
+        raise HTTPException(status_code=422, detail="Invalid cursor")
+    return last_id
+
+
+async def paginate(
+    session: AsyncSession,
+    query: Select,
+    column: InstrumentedAttribute,
+    cursor: Optional[str],
+    limit: int,
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Fetch one page of the query using keyset pagination.
+
+    Rows are ordered by the indexed unique `column` and the page starts
+    right after the row the cursor points to, so any page costs
+    the same as the first one and doesn't shift when rows are added.
+
+    :param session: database session.
+    :param query: query selecting the entities.
+    :param column: unique integer column to order by.
+    :param cursor: cursor of the previous page or None for the first one.
+    :param limit: maximum number of rows.
+    :raises HTTPException: if limit isn't positive.
+    :return: entities of the page and cursor of the next one.
+    """
+    if limit < 1:
+        raise HTTPException(status_code=422, detail="Invalid limit")
+    if cursor is not None:
+        query = query.where(column > decode_cursor(cursor))
+    r = await session.execute(query.order_by(column).limit(limit + 1))
+    items = r.scalars().all()
+    if len(items) <= limit:
+        return items, None
+    items = items[:limit]
+    return items, encode_cursor(getattr(items[-1], column.key))
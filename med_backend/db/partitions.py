@@ -0,0 +1,175 @@
+"""
+Monthly range partitions of the submission tables.
+
+Submissions and their answers are partitioned by created_at,
+every month gets its own partition named like
+``user_form_submission_y2026m10``. Rows which don't fit into any
+monthly partition are stored in the default one, so partitions
+must be created ahead of time while the default partition is empty.
+"""
+import re
+from datetime import date
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import Table, text
+from sqlalchemy.engine import Connection
+
+# referenced tables go first, answers reference submissions
+PARTITIONED_TABLES = ("user_form_submission", "user_form_field_submission")
+_MONTHLY_PARTITION = re.compile(r"_y(\d{4})m(\d{2})$")
+
+
+def is_partition(name: str) -> bool:
+    """
+    Check if the table is a partition of a partitioned table.
+
+    Partitions are not described by models,
+    so autogenerate must not try to drop them.
+
+    :param name: name of the table.
+    :return: True if the table is a partition.
+    """
+    return any(
+        name == f"{table}_default"
+        or (name.startswith(table) and _MONTHLY_PARTITION.search(name) is not None)
+        for table in PARTITIONED_TABLES
+    )
+
+
+def create_default_partition(
+    target: Table,
+    connection: Connection,
+    **kwargs: Any,
+) -> None:
+    """
+    Create default partition right after the partitioned table.
+
+    Used as `after_create` listener, so tables created
+    by `create_all` accept rows without maintenance.
+
+    :param target: partitioned table.
+    :param connection: connection creating the table.
+    :param kwargs: other arguments of the event.
+    """
+    connection.execute(
+        text(
+            f"CREATE TABLE IF NOT EXISTS {target.name}_default "
+            f"PARTITION OF {target.name} DEFAULT",
+        ),
+    )
+
+
+def add_months(month: date, count: int) -> date:
+    """
+    Get the first day of a month relative to the given one.
+
+    :param month: any day of the month.
+    :param count: number of months to add, may be negative.
+    :return: first day of the resulting month.
+    """
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    """
+    Name of the monthly partition.
+
+    :param table: name of the partitioned table.
+    :param month: any day of the month.
+    :return: name of the partition.
+    """
+    return f"{table}_y{month.year}m{month.month:02d}"
+
+
+def create_monthly_partitions(
+    connection: Connection,
+    first_month: date,
+    count: int,
+) -> List[str]:
+    """
+    Create missing monthly partitions of all partitioned tables.
+
+    Fails if the default partition already has rows of these months.
+
+    :param connection: database connection.
+    :param first_month: any day of the first month.
+    :param count: number of months.
+    :return: names of partitions, both created and existing.
+    """
+    names = []
+    for offset in range(count):
+        start = add_months(first_month, offset)
+        end = add_months(start, 1)
+        for table in PARTITIONED_TABLES:
+            name = partition_name(table, start)
+            connection.execute(
+                text(
+                    f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} "
+                    f"FOR VALUES FROM ('{start}') TO ('{end}')",
+                ),
+            )
+            names.append(name)
+    return names
+
+
+def detach_monthly_partitions(connection: Connection, before: date) -> List[str]:
+    """
+    Detach monthly partitions of months before the given one.
+
+    Detached partitions become plain tables, which can be
+    archived or dropped without touching the live data.
+
+    :param connection: database connection.
+    :param before: any day of the first month to keep.
+    :return: names of detached partitions.
+    """
+    keep_from = add_months(before, 0)
+    detached = []
+    # answers are detached first, they reference submissions
+    for table in reversed(PARTITIONED_TABLES):
+        partitions = connection.execute(
+            text(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+                "WHERE parent.relname = :table",
+            ),
+            {"table": table},
+        ).scalars()
+        for name in sorted(partitions):
+            match = _MONTHLY_PARTITION.search(name)
+            if not match:
+                continue
+            if date(int(match[1]), int(match[2]), 1) < keep_from:
+                connection.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+                detached.append(name)
+    return detached
+
+
+def maintain_partitions(
+    connection: Connection,
+    today: date,
+    months_ahead: int,
+    retention_months: Optional[int] = None,
+) -> Tuple[List[str], List[str]]:
+    """
+    Create partitions of upcoming months and detach expired ones.
+
+    Meant to run regularly, e.g. on every deploy and by cron.
+
+    :param connection: database connection.
+    :param today: current date.
+    :param months_ahead: number of months after the current one to prepare.
+    :param retention_months: number of past months to keep attached,
+        None keeps all of them.
+    :return: names of current partitions and of detached ones.
+    """
+    current = create_monthly_partitions(connection, today, months_ahead + 1)
+    detached: List[str] = []
+    if retention_months is not None:
+        detached = detach_monthly_partitions(
+            connection,
+            add_months(today, -retention_months),
+        )
+    return current, detached
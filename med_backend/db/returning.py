@@ -0,0 +1,51 @@
+from typing import Optional, Type, TypeVar
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.dml import UpdateBase
+
+from med_backend.db.base import Base
+
+ModelType = TypeVar("ModelType", bound=Base)
+
+UNIQUE_VIOLATION = "23505"
+FOREIGN_KEY_VIOLATION = "23503"
+
+
+async def returning_one(
+    session: AsyncSession,
+    model: Type[ModelType],
+    stmt: UpdateBase,
+) -> Optional[ModelType]:
+    """
+    Run INSERT, UPDATE or DELETE and get the affected row.
+
+    The row is returned by the statement itself, so a write costs
+    one round trip without a SELECT before or after it. Conditions
+    of the statement replace existence checks: no row means
+    nothing matched them. Instances already in the session
+    are updated with the returned values.
+
+    :param session: database session.
+    :param model: model of the written table.
+    :param stmt: statement without RETURNING.
+    :return: affected row or None.
+    """
+    r = await session.execute(
+        select(model)
+        .from_statement(stmt.returning(*model.__table__.columns))
+        .execution_options(populate_existing=True),
+    )
+    return r.scalars().first()
+
+
+def is_violation(error: IntegrityError, code: str) -> bool:
+    """
+    Check the SQLSTATE of the constraint violation.
+
+    :param error: raised error.
+    :param code: expected SQLSTATE, e.g. UNIQUE_VIOLATION.
+    :return: whether the error has this code.
+    """
+    return getattr(error.orig, "pgcode", None) == code
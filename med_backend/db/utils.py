@@ -1,9 +1,20 @@
-from sqlalchemy import text
-from sqlalchemy.engine import make_url
-from sqlalchemy.ext.asyncio import create_async_engine
+import asyncio
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 
 from med_backend.settings import settings
 
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+# revision describing the schema created by `create_all` before migrations
+BASELINE_REVISION = "2b7380507a71"
+
 
 async def create_database() -> None:
     """Create a databse."""
@@ -42,3 +53,60 @@ async def drop_database() -> None:
         )
         await conn.execute(text(disc_users))
         await conn.execute(text(f'DROP DATABASE "{settings.db_base}"'))
+
+
+def get_alembic_config() -> Config:
+    """
+    Alembic config that doesn't depend on the working directory.
+
+    :return: alembic config.
+    """
+    config = Config()
+    config.set_main_option("script_location", str(MIGRATIONS_DIR))
+    return config
+
+
+def _has_unversioned_tables(connection: Connection) -> bool:
+    tables = inspect(connection).get_table_names()
+    return "users" in tables and "alembic_version" not in tables
+
+
+async def _is_unversioned() -> bool:
+    engine = create_async_engine(str(settings.db_url))
+    async with engine.connect() as conn:
+        unversioned = await conn.run_sync(_has_unversioned_tables)
+    await engine.dispose()
+    return unversioned
+
+
+def run_migrations() -> None:
+    """
+    Upgrade the database to the latest revision.
+
+    Databases created with `create_all` before migrations were
+    introduced are stamped with the baseline revision first.
+    """
+    config = get_alembic_config()
+    if asyncio.run(_is_unversioned()):
+        command.stamp(config, BASELINE_REVISION)
+    command.upgrade(config, "head")
+
+
+def _get_current_revisions(connection: Connection) -> set[str]:
+    return set(MigrationContext.configure(connection).get_current_heads())
+
+
+async def check_schema_version(engine: AsyncEngine) -> None:
+    """
+    Check that all migrations are applied.
+
+    :param engine: database engine.
+    :raises RuntimeError: if the database is not at the latest revision.
+    """
+    script = ScriptDirectory.from_config(get_alembic_config())
+    async with engine.connect() as conn:
+        current = await conn.run_sync(_get_current_revisions)
+    if current != set(script.get_heads()):
+        raise RuntimeError(
+            "Database schema is outdated, run `python -m med_backend migrate`",
+        )
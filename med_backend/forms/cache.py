@@ -0,0 +1,158 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import Generic, Hashable, Optional, TypeVar
+
+from redis.asyncio import ConnectionPool, Redis
+from redis.exceptions import RedisError
+
+from med_backend.settings import settings
+
+logger = logging.getLogger(__name__)
+
+ValueType = TypeVar("ValueType")
+
+
+class LRUCache(Generic[ValueType]):
+    """Dict with limited size that drops least recently used items."""
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._items: "OrderedDict[Hashable, ValueType]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[ValueType]:
+        """
+        Get item and mark it as recently used.
+
+        :param key: key of the item.
+        :return: item or None.
+        """
+        value = self._items.get(key)
+        if value is not None:
+            self._items.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: ValueType) -> None:
+        """
+        Put item, dropping the oldest one if the cache is full.
+
+        :param key: key of the item.
+        :param value: item.
+        """
+        self._items[key] = value
+        self._items.move_to_end(key)
+        if len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all items."""
+        self._items.clear()
+
+
+# serialized forms of the current process, keyed by (form_id, version)
+local_forms: LRUCache[bytes] = LRUCache(settings.form_cache_size)
+
+
+def _version_key(form_id: int) -> str:
+    return f"form:{form_id}:version"
+
+
+def _form_key(form_id: int, version: int) -> str:
+    return f"form:{form_id}:{version}"
+
+
+def form_etag(form_id: int, version: int) -> str:
+    """
+    ETag of the form version.
+
+    :param form_id: id of the form.
+    :param version: version of the form.
+    :return: quoted ETag.
+    """
+    return f'"form-{form_id}-{version}"'
+
+
+async def _seed_version(redis: Redis, form_id: int) -> None:
+    await redis.set(
+        _version_key(form_id),
+        time.time_ns(),
+        nx=True,
+        ex=settings.form_version_ttl,
+    )
+
+
+async def get_version(redis: Redis, form_id: int) -> int:
+    """
+    Get current version of the form.
+
+    Version is bumped on every change of the form or its fields.
+    A missing version is initialized with the current time,
+    so versions don't repeat if redis loses its data
+    or the version expires after `form_version_ttl` seconds.
+
+    :param redis: redis connection.
+    :param form_id: id of the form.
+    :return: version.
+    """
+    version = await redis.get(_version_key(form_id))
+    if version is None:
+        await _seed_version(redis, form_id)
+        version = await redis.get(_version_key(form_id))
+    return int(version)
+
+
+async def get_form(redis: Redis, form_id: int, version: int) -> Optional[bytes]:
+    """
+    Get serialized form from the local LRU or from redis.
+
+    :param redis: redis connection.
+    :param form_id: id of the form.
+    :param version: current version of the form.
+    :return: JSON of the form or None if it isn't cached.
+    """
+    body = local_forms.get((form_id, version))
+    if body is not None:
+        return body
+    body = await redis.get(_form_key(form_id, version))
+    if body is None:
+        return None
+    local_forms.set((form_id, version), body)
+    return body
+
+
+async def set_form(redis: Redis, form_id: int, version: int, body: bytes) -> None:
+    """
+    Put serialized form to the local LRU and to redis.
+
+    :param redis: redis connection.
+    :param form_id: id of the form.
+    :param version: version of the form, the form was loaded at.
+    :param body: JSON of the form.
+    """
+    local_forms.set((form_id, version), body)
+    await redis.set(_form_key(form_id, version), body, ex=settings.form_cache_ttl)
+
+
+async def invalidate_form(redis_pool: ConnectionPool, form_id: int) -> None:
+    """
+    Bump version of the form.
+
+    Must be called after the form or any of its fields is changed.
+    Cached entries of the previous versions are not read anymore
+    and expire on their own. A missing version is seeded
+    the same way as in `get_version` before it's bumped,
+    so the bumped one isn't a version used before.
+
+    The change is already committed at this point, so errors
+    of redis are logged. If redis comes back with the old version,
+    the stale form is served until it expires from the cache.
+
+    :param redis_pool: redis connection pool.
+    :param form_id: id of the form.
+    """
+    async with Redis(connection_pool=redis_pool) as redis:
+        try:
+            await _seed_version(redis, form_id)
+            await redis.incr(_version_key(form_id))
+        except RedisError:
+            logger.warning("Failed to invalidate cached form %d", form_id)
@@ -1,60 +1,112 @@
-from typing import List
+import logging
+import re
+from collections import Counter
+from datetime import datetime
+from itertools import groupby
+from operator import attrgetter
+from types import SimpleNamespace
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NoReturn,
+    Optional,
+    Set,
+    Tuple,
+)
+from uuid import UUID
 
 from fastapi import HTTPException
-from sqlalchemy import delete, literal_column, select, update
+from sqlalchemy import (
+    Float,
+    Integer,
+    and_,
+    cast,
+    delete,
+    func,
+    insert,
+    literal,
+    select,
+    text,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.sql import Select
 
+from med_backend.db.loaders import clear_loaders, get_loader
 from med_backend.db.models.forms import (
     FormAssignment,
     FormQuestion,
+    FormQuestionStats,
+    FormQuestionStatsBucket,
     FormScheme,
     UserFormFieldSubmission,
     UserFormSubmission,
     UserRevQuestion,
 )
+from med_backend.db.models.users import UserScheme
+from med_backend.db.pagination import paginate
+from med_backend.db.returning import (
+    FOREIGN_KEY_VIOLATION,
+    is_violation,
+    returning_one,
+)
 from med_backend.forms.schemas import (
     BaseForm,
     CreateFormField,
-    FullAnswer,
+    FormAnswer,
+    FormAssigment,
     FullSubmission,
+    IngestedSubmission,
+    RangeFlag,
+)
+from med_backend.forms.sketch import bucket_key, bucket_key_sql
+from med_backend.users.schemas import FormResult
+
+logger = logging.getLogger(__name__)
+
+# rows per multi-row INSERT, keeps statements below the asyncpg parameter limit
+BULK_CHUNK_SIZE = 5000
+NUMBER_QUESTION_TYPE = "number"
+# numeric answers, both decimal point and comma are allowed;
+# digits are limited so every match fits into double precision
+NUMBER_PATTERN = (
+    r"^\s*[-+]?(\d{1,30}([.,]\d{0,30})?|[.,]\d{1,30})([eE][-+]?\d{1,2})?\s*$"
 )
-from med_backend.users.crud import get_user
 
 
 async def get_forms(
     session: AsyncSession,
-    skip: int = 0,
+    cursor: Optional[str] = None,
     limit: int = 100,
-) -> List[FormScheme] | None:
-    r = await session.execute(
-        select(FormScheme).offset(skip).limit(limit),
-    )
-    forms = r.scalars().all()
-    return forms
+) -> Tuple[List[FormScheme], Optional[str]]:
+    return await paginate(session, select(FormScheme), FormScheme.id, cursor, limit)
 
 
 async def get_form(session: AsyncSession, form_id: int) -> FormScheme | None:
-    r = await session.execute(select(FormScheme).where(FormScheme.id == form_id))
-    form = r.scalars().first()
-    return form
+    return await get_loader(session, FormScheme).load(form_id)
 
 
 async def filter_form_assigment(
     session: AsyncSession,
     user_id: int,
-    skip: int = 0,
+    cursor: Optional[str] = None,
     limit: int = 100,
-) -> List[FormScheme] | None:
-    r = await session.execute(
+) -> Tuple[List[FormScheme], Optional[str]]:
+    return await paginate(
+        session,
         select(FormScheme)
-        .outerjoin(FormAssignment)
-        .where(FormAssignment.user_id == user_id)
-        .offset(skip)
-        .limit(limit),
+        .join(FormAssignment, FormAssignment.form_id == FormScheme.id)
+        .where(FormAssignment.user_id == user_id),
+        FormScheme.id,
+        cursor,
+        limit,
     )
-    forms = r.scalars().fetchall()
-    return forms
 
 
 async def get_questions(session: AsyncSession, form_id: int) -> List[FormQuestion]:
@@ -65,19 +117,53 @@ async def get_questions(session: AsyncSession, form_id: int) -> List[FormQuestio
     return questions
 
 
+async def _raise_write_error(
+    session: AsyncSession,
+    form_id: int,
+    user_id: int,
+) -> NoReturn:
+    """
+    Explain why a write to the form matched no rows.
+
+    Writes check the user and the form in their own conditions,
+    so these lookups only run when a write fails.
+
+    :param session: database session.
+    :param form_id: id of the form.
+    :param user_id: id of the writing user.
+    :raises HTTPException: always.
+    """
+    form = await get_form(session, form_id)
+    if not form:
+        raise HTTPException(status_code=422, detail="Form can't be used")
+    if form.user_id != user_id:
+        raise HTTPException(
+            status_code=401,
+            detail="You are not allowed to access this form",
+        )
+    raise HTTPException(status_code=422, detail="User can't be used")
+
+
 async def create_form(
     session: AsyncSession,
     form: BaseForm,
     user_id: int,
 ) -> FormScheme:
-    user = await get_user(session, user_id)
-    if not user or not user.is_manager:
+    db_form = await returning_one(
+        session,
+        FormScheme,
+        insert(FormScheme).from_select(
+            ["name", "user_id"],
+            select(literal(form.name), UserScheme.id).where(
+                UserScheme.id == user_id,
+                UserScheme.is_manager,
+            ),
+        ),
+    )
+    if not db_form:
         raise HTTPException(status_code=422, detail="User can't be used")
-
-    db_form = FormScheme(name=form.name, user_id=user_id)
-    session.add(db_form)
     await session.commit()
-    await session.refresh(db_form)
+    get_loader(session, FormScheme).prime(db_form)
     return db_form
 
 
@@ -87,236 +173,1053 @@ async def create_form_field(
     user_id: int,
     form_id: int,
 ) -> FormQuestion:
-    user = await get_user(session, user_id)
-    if not user or not user.is_manager:
-        raise HTTPException(status_code=422, detail="User can't be used")
+    obj = await returning_one(
+        session,
+        FormQuestion,
+        insert(FormQuestion).from_select(
+            ["form_id", "type", "question", "ref_min", "ref_max"],
+            select(
+                FormScheme.id,
+                literal(field.type),
+                literal(field.question),
+                literal(field.ref_min, Integer),
+                literal(field.ref_max, Integer),
+            )
+            .join(UserScheme, UserScheme.id == FormScheme.user_id)
+            .where(
+                FormScheme.id == form_id,
+                UserScheme.id == user_id,
+                UserScheme.is_manager,
+            ),
+        ),
+    )
+    if not obj:
+        await _raise_write_error(session, form_id, user_id)
+    await session.commit()
+    return obj
+
+
+def _chunks(rows: List[Dict[str, Any]]) -> Iterator[List[Dict[str, Any]]]:
+    for start in range(0, len(rows), BULK_CHUNK_SIZE):
+        yield rows[start : start + BULK_CHUNK_SIZE]
 
-    form = await get_form(session, form_id)
-    if not form:
-        raise HTTPException(status_code=422, detail="Form can't be used")
 
-    if user.id != form.user_id:
+async def _check_assigments(
+    session: AsyncSession,
+    form_id: int,
+    user_ids: Set[int],
+    refs: Dict[Tuple[int, int], Any],
+) -> None:
+    """
+    Check users and reference ranges of assignments with one query each.
+
+    :param session: database session.
+    :param form_id: id of the form.
+    :param user_ids: ids of assigned users.
+    :param refs: reference ranges by pairs of user id and question id.
+    :raises HTTPException: if a user, question or range can't be used.
+    """
+    if any(ref.ref_min is None or ref.ref_max is None for ref in refs.values()):
         raise HTTPException(
-            status_code=401,
-            detail="You are not allowed to access this form",
+            status_code=422,
+            detail="Reference range must have both bounds",
         )
 
-    obj = FormQuestion(
-        form_id=form_id,
-        type=field.type,
-        question=field.question,
-        ref_min=field.ref_min,
-        ref_max=field.ref_max,
-    )
-    session.add(obj)
-    await session.commit()
-    await session.refresh(obj)
-    return obj
+    r = await session.execute(select(UserScheme.id).where(UserScheme.id.in_(user_ids)))
+    if user_ids - set(r.scalars().all()):
+        raise HTTPException(status_code=422, detail="User can't be used")
 
+    field_ids = {field_id for _, field_id in refs}
+    if field_ids:
+        r = await session.execute(
+            select(FormQuestion.id)
+            .where(FormQuestion.form_id == form_id)
+            .where(FormQuestion.id.in_(field_ids)),
+        )
+        if field_ids - set(r.scalars().all()):
+            raise HTTPException(status_code=422, detail="Such field doesn't exist")
 
-async def create_form_assigment(session: AsyncSession, form_id: int, user_id: int):
-    user = await get_user(session, user_id)
-    if not user:
-        raise HTTPException(status_code=422, detail="User can't be used")
 
-    form = await get_form(session, form_id)
-    if not form:
-        raise HTTPException(status_code=422, detail="Form can't be used")
+async def create_form_assigments(
+    session: AsyncSession,
+    form_id: int,
+    assigments: List[FormAssigment],
+) -> int:
+    """
+    Assign the form to many users at once.
 
-    assigment = await session.execute(
-        select(FormAssignment)
-        .where(FormAssignment.form_id == form_id)
-        .where(FormAssignment.user_id == user_id),
-    )
+    Users and questions are validated with one query each, then
+    assignments and per-user reference ranges are upserted with
+    INSERT ... ON CONFLICT in chunks of BULK_CHUNK_SIZE rows.
+    Everything is committed in a single transaction.
 
-    if assigment.scalars().first():
-        return True
+    :param session: database session.
+    :param form_id: id of the form.
+    :param assigments: users with their reference ranges.
+    :return: number of assigned users.
+    """
+    user_ids = {assigment.user_id for assigment in assigments}
+    refs = {
+        (assigment.user_id, ref.id): ref
+        for assigment in assigments
+        for ref in assigment.question_refs
+    }
+    await _check_assigments(session, form_id, user_ids, refs)
 
-    obj = FormAssignment(form_id=form_id, user_id=user_id)
-    session.add(obj)
+    assigment_rows = [{"form_id": form_id, "user_id": user_id} for user_id in user_ids]
+    for chunk in _chunks(assigment_rows):
+        await session.execute(
+            pg_insert(FormAssignment)
+            .values(chunk)
+            .on_conflict_do_nothing(index_elements=["form_id", "user_id"]),
+        )
+
+    ref_rows = [
+        {
+            "user_id": user_id,
+            "question_id": field_id,
+            "ref_min": ref.ref_min,
+            "ref_max": ref.ref_max,
+        }
+        for (user_id, field_id), ref in refs.items()
+    ]
+    for chunk in _chunks(ref_rows):
+        stmt = pg_insert(UserRevQuestion).values(chunk)
+        await session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["user_id", "question_id"],
+                set_={
+                    "ref_min": stmt.excluded.ref_min,
+                    "ref_max": stmt.excluded.ref_max,
+                },
+            ),
+        )
     await session.commit()
-    await session.refresh(obj)
-    return True
+    return len(user_ids)
+
+
+def parse_number(answer: str) -> Optional[float]:
+    """
+    Parse answer to a "number" question.
+
+    Accepts the same strings as :data:`NUMBER_PATTERN`,
+    so submitted and backfilled answers are parsed alike.
+
+    :param answer: raw answer.
+    :return: number or None if the answer isn't a number.
+    """
+    if not re.match(NUMBER_PATTERN, answer):
+        return None
+    return float(answer.replace(",", "."))
+
+
+def evaluate_answer(
+    value: Optional[float],
+    ref_min: Optional[int],
+    ref_max: Optional[int],
+) -> Optional[RangeFlag]:
+    """
+    Compare a numeric answer with its reference range.
+
+    A missing bound isn't checked.
+
+    :param value: numeric answer.
+    :param ref_min: lower bound of the range.
+    :param ref_max: upper bound of the range.
+    :return: flag or None if the answer or the whole range is missing.
+    """
+    if value is None or (ref_min is None and ref_max is None):
+        return None
+    if ref_min is not None and value < ref_min:
+        return RangeFlag.LOW
+    if ref_max is not None and value > ref_max:
+        return RangeFlag.HIGH
+    return RangeFlag.NORMAL
 
 
-async def create_user_form_rev_question(
+async def get_submission_questions(
     session: AsyncSession,
-    field_id: int,
+    form_id: int,
     user_id: int,
-    ref_min: int,
-    ref_max: int,
-):
-    r = await session.execute(select(FormQuestion).where(FormQuestion.id == field_id))
-    field = r.scalars().first()
-    if not field:
-        raise HTTPException(status_code=422, detail="Such field doesn't exist")
+    field_ids: Set[int],
+) -> Dict[int, Row]:
+    """
+    Check that the fields belong to the form and load their types.
+
+    All field ids are checked with a single query, which also loads
+    the effective reference ranges of the user.
 
+    :param session: database session.
+    :param form_id: id of the submitted form.
+    :param user_id: id of the submitting user.
+    :param field_ids: ids of the answered fields.
+    :return: questions by their ids.
+    :raises HTTPException: if the form or any of the fields doesn't exist.
+    """
     r = await session.execute(
-        select(UserRevQuestion)
-        .where(UserRevQuestion.user_id == user_id)
-        .where(UserRevQuestion.question_id == field_id),
-    )
-    rev = r.scalars().first()
-    if rev:
-        await session.execute(
-            update(UserRevQuestion)
-            .where(UserRevQuestion.id == rev.id)
-            .values(ref_max=ref_max, ref_min=ref_min),
+        select(
+            FormScheme.id,
+            FormQuestion.id.label("question_id"),
+            FormQuestion.type,
+            func.coalesce(UserRevQuestion.ref_min, FormQuestion.ref_min).label(
+                "ref_min",
+            ),
+            func.coalesce(UserRevQuestion.ref_max, FormQuestion.ref_max).label(
+                "ref_max",
+            ),
         )
-    else:
-        rev = UserRevQuestion(
-            question_id=field_id,
-            user_id=user_id,
-            ref_max=ref_max,
-            ref_min=ref_min,
+        .outerjoin(
+            FormQuestion,
+            and_(
+                FormQuestion.form_id == FormScheme.id,
+                FormQuestion.id.in_(field_ids),
+            ),
         )
-        session.add(rev)
-    await session.commit()
-    await session.refresh(rev)
-    return rev
+        .outerjoin(
+            UserRevQuestion,
+            and_(
+                UserRevQuestion.question_id == FormQuestion.id,
+                UserRevQuestion.user_id == user_id,
+            ),
+        )
+        .where(FormScheme.id == form_id),
+    )
+    rows = r.all()
+    if not rows:
+        raise HTTPException(status_code=422, detail="Form can't be used")
+    questions = {row.question_id: row for row in rows}
+    if field_ids - questions.keys():
+        raise HTTPException(status_code=422, detail="Such field doesn't exist")
+    return questions
 
 
-async def create_submission(session: AsyncSession, form_id: int, user_id: int):
-    user = await get_user(session, user_id)
-    if not user:
-        raise HTTPException(status_code=422, detail="User can't be used")
+def _answer_values(
+    questions: Dict[int, Any],
+    answers: List[FormAnswer],
+    submission_id: int,
+    created_at: datetime,
+) -> List[Dict[str, Any]]:
+    values = []
+    for answer in answers:
+        question = questions[answer.field_id]
+        number = None
+        if question.type == NUMBER_QUESTION_TYPE:
+            number = parse_number(answer.answer)
+        values.append(
+            {
+                "submission_id": submission_id,
+                "created_at": created_at,
+                "question_id": answer.field_id,
+                "answer": answer.answer,
+                "answer_number": number,
+                "range_flag": evaluate_answer(
+                    number,
+                    question.ref_min,
+                    question.ref_max,
+                ),
+            },
+        )
+    return values
 
-    form = await get_form(session, form_id)
-    if not form:
-        raise HTTPException(status_code=422, detail="Form can't be used")
 
-    obj = UserFormSubmission(form_id=form_id, user_id=user_id)
-    session.add(obj)
-    await session.commit()
-    await session.refresh(obj)
-    return obj
+def _form_result(values: List[Dict[str, Any]]) -> Optional[FormResult]:
+    flags = {row["range_flag"] for row in values} - {None}
+    if not flags:
+        return None
+    if flags & {RangeFlag.LOW, RangeFlag.HIGH}:
+        return FormResult.ABNORMAL
+    return FormResult.OK
 
 
-async def create_submission_answer(
+async def create_submission(
     session: AsyncSession,
-    sumb_id: int,
-    field_id: int,
-    data: str,
-):
+    form_id: int,
+    user_id: int,
+    answers: List[FormAnswer],
+) -> Tuple[int, List[int]]:
+    """
+    Create a submission with all of its answers in one transaction.
 
-    r = await session.execute(select(FormQuestion).where(FormQuestion.id == field_id))
-    field = r.scalars().first()
-    if not field:
-        raise HTTPException(status_code=422, detail="Such field doesn't exist")
+    Numeric answers are flagged against the effective reference
+    ranges and the result of the submission is written to the user's
+    latest_form_result, so abnormal patients can be listed
+    without scanning submissions.
+
+    The answers are written with one multi-row INSERT
+    and the transaction is committed once, so either
+    the whole submission is stored or nothing is.
+
+    :param session: database session.
+    :param form_id: id of the submitted form.
+    :param user_id: id of the submitting user.
+    :param answers: answers of the submission.
+    :return: id of the submission and ids of the created answers.
+    """
+    questions = await get_submission_questions(
+        session,
+        form_id,
+        user_id,
+        {answer.field_id for answer in answers},
+    )
+
+    r = await session.execute(
+        insert(UserFormSubmission)
+        .values(form_id=form_id, user_id=user_id)
+        .returning(UserFormSubmission.id, UserFormSubmission.created_at),
+    )
+    submission_id, created_at = r.one()
+    values = _answer_values(questions, answers, submission_id, created_at)
+
+    answer_ids: List[int] = []
+    if values:
+        r = await session.execute(
+            insert(UserFormFieldSubmission)
+            .values(values)
+            .returning(UserFormFieldSubmission.id),
+        )
+        answer_ids = list(r.scalars().all())
 
-    obj = UserFormFieldSubmission(
-        submission_id=sumb_id,
-        question_id=field_id,
-        answer=data,
+    await update_question_stats(
+        session,
+        [
+            (row["question_id"], row["answer_number"])
+            for row in values
+            if row["answer_number"] is not None
+        ],
     )
-    session.add(obj)
+
+    result = _form_result(values)
+    if result is not None:
+        await session.execute(
+            update(UserScheme)
+            .where(UserScheme.id == user_id)
+            .values(latest_form_result=result),
+        )
     await session.commit()
-    await session.refresh(obj)
-    return obj
+    return submission_id, answer_ids
 
 
-async def get_submissions(session: AsyncSession, form_id: int) -> List[FullSubmission]:
+async def _get_batch_questions(
+    session: AsyncSession,
+    submissions: List[IngestedSubmission],
+) -> Dict[Tuple[int, int], Any]:
+    """
+    Load questions answered in the batch with the reference ranges of users.
+
+    :param session: database session.
+    :param submissions: submissions of the batch.
+    :return: questions by pairs of user id and question id.
+    """
+    field_ids = {
+        answer.field_id for submission in submissions for answer in submission.answers
+    }
+    user_ids = {submission.user_id for submission in submissions}
+    r = await session.execute(
+        select(
+            FormQuestion.id,
+            FormQuestion.form_id,
+            FormQuestion.type,
+            FormQuestion.ref_min,
+            FormQuestion.ref_max,
+        ).where(FormQuestion.id.in_(field_ids)),
+    )
+    base = {row.id: row for row in r.all()}
     r = await session.execute(
-        select(UserFormSubmission)
-        .options(selectinload(UserFormSubmission.answers))
-        .options(selectinload(UserFormSubmission.user))
-        .where(UserFormSubmission.form_id == form_id),
+        select(
+            UserRevQuestion.user_id,
+            UserRevQuestion.question_id,
+            UserRevQuestion.ref_min,
+            UserRevQuestion.ref_max,
+        ).where(
+            UserRevQuestion.question_id.in_(base.keys()),
+            UserRevQuestion.user_id.in_(user_ids),
+        ),
     )
-    submissions = r.scalars().all()
-    res: List[FullSubmission] = []
+    overrides = {(row.user_id, row.question_id): row for row in r.all()}
+
+    questions = {}
     for submission in submissions:
-        answers: List[FullAnswer] = []
         for answer in submission.answers:
-            r = await session.execute(
-                select(UserRevQuestion)
-                .where(UserRevQuestion.user_id == submission.user.id)
-                .where(UserRevQuestion.question_id == answer.question_id),
+            question = base.get(answer.field_id)
+            if question is None:
+                continue
+            override = overrides.get((submission.user_id, question.id))
+            ref_min, ref_max = question.ref_min, question.ref_max
+            if override is not None:
+                ref_min = _coalesce(override.ref_min, ref_min)
+                ref_max = _coalesce(override.ref_max, ref_max)
+            questions[submission.user_id, question.id] = SimpleNamespace(
+                form_id=question.form_id,
+                type=question.type,
+                ref_min=ref_min,
+                ref_max=ref_max,
             )
-            obj = r.scalars().first()
-            ref_min = None
-            ref_max = None
-            if obj:
-                ref_min = obj.ref_min
-                ref_max = obj.ref_max
-
-            r = await session.execute(
-                select(FormQuestion).where(FormQuestion.id == answer.question_id),
+    return questions
+
+
+def _coalesce(value: Any, default: Any) -> Any:
+    return default if value is None else value
+
+
+def _valid_submissions(
+    submissions: List[IngestedSubmission],
+    questions: Dict[Tuple[int, int], Any],
+) -> Dict[UUID, Tuple[IngestedSubmission, Dict[int, Any]]]:
+    """
+    Drop submissions referencing fields, that no longer belong to the form.
+
+    :param submissions: queued submissions in the order of arrival.
+    :param questions: questions by pairs of user id and question id.
+    :return: submissions with their questions by ingest_id.
+    """
+    valid = {}
+    for submission in submissions:
+        user_questions = {
+            answer.field_id: questions.get((submission.user_id, answer.field_id))
+            for answer in submission.answers
+        }
+        if all(
+            question is not None and question.form_id == submission.form_id
+            for question in user_questions.values()
+        ):
+            valid[submission.ingest_id] = (submission, user_questions)
+        else:
+            logger.warning("Dropped submission %s", submission.ingest_id)
+    return valid
+
+
+async def _insert_ingested(
+    session: AsyncSession,
+    submissions: List[IngestedSubmission],
+) -> Dict[UUID, int]:
+    """
+    Insert submissions, that are not stored yet.
+
+    :param session: database session.
+    :param submissions: submissions to insert.
+    :return: ids of created submissions by ingest_id.
+    """
+    created = {}
+    for chunk in _chunks(
+        [
+            {
+                "ingest_id": submission.ingest_id,
+                "created_at": submission.created_at,
+                "form_id": submission.form_id,
+                "user_id": submission.user_id,
+            }
+            for submission in submissions
+        ],
+    ):
+        r = await session.execute(
+            pg_insert(UserFormSubmission)
+            .values(chunk)
+            .on_conflict_do_nothing(
+                index_elements=[
+                    UserFormSubmission.ingest_id,
+                    UserFormSubmission.created_at,
+                ],
             )
-            obj = r.scalars().first()
-            answers.append(
-                FullAnswer(
-                    field_id=obj.id,
-                    question=obj.question,
-                    type=obj.type,
-                    answer=answer.answer,
-                    ref_min=ref_min if ref_min else obj.ref_min,
-                    ref_max=ref_max if ref_max else obj.ref_max,
-                ),
+            .returning(UserFormSubmission.id, UserFormSubmission.ingest_id),
+        )
+        created.update((row.ingest_id, row.id) for row in r.all())
+    return created
+
+
+def _ingested_answers(
+    valid: Dict[UUID, Tuple[IngestedSubmission, Dict[int, Any]]],
+    created: Dict[UUID, int],
+) -> Tuple[List[Dict[str, Any]], Dict[int, FormResult]]:
+    """
+    Build answer rows and latest results of users for created submissions.
+
+    :param valid: submissions with their questions by ingest_id.
+    :param created: ids of created submissions by ingest_id.
+    :return: answer rows and results by user id.
+    """
+    values = []
+    results = {}
+    # arrival order, so the latest submission of the user sets the result
+    for ingest_id, (submission, user_questions) in valid.items():
+        submission_id = created.get(ingest_id)
+        if submission_id is None:
+            continue
+        submission_values = _answer_values(
+            user_questions,
+            submission.answers,
+            submission_id,
+            submission.created_at,
+        )
+        values.extend(submission_values)
+        result = _form_result(submission_values)
+        if result is not None:
+            results[submission.user_id] = result
+    return values, results
+
+
+async def _set_latest_results(
+    session: AsyncSession,
+    results: Dict[int, FormResult],
+) -> None:
+    for result in FormResult:
+        user_ids = sorted(
+            user_id for user_id, user_result in results.items() if user_result == result
+        )
+        if user_ids:
+            await session.execute(
+                update(UserScheme)
+                .where(UserScheme.id.in_(user_ids))
+                .values(latest_form_result=result),
             )
-        res.append(FullSubmission(fio=submission.user.fullname, answers=answers))
-    return res
 
 
-async def update_form(session: AsyncSession, data: BaseForm, form_id: int):
-    form = await get_form(session, form_id)
-    if not form:
-        raise HTTPException(status_code=422, detail="Form can't be used")
+async def create_ingested_submissions(
+    session: AsyncSession,
+    submissions: List[IngestedSubmission],
+) -> int:
+    """
+    Write a batch of queued submissions in one transaction.
 
+    Submissions are written with multi-row INSERTs returning their ids,
+    answers with a single executemany.
+    Every queued submission carries its ingest_id and created_at, so
+    a batch delivered again after a failure skips submissions,
+    that are already stored. Submissions referencing fields, that
+    no longer belong to the form, are dropped.
+
+    :param session: database session.
+    :param submissions: queued submissions in the order of arrival.
+    :return: number of created submissions.
+    """
+    if not submissions:
+        return 0
+    questions = await _get_batch_questions(session, submissions)
+    valid = _valid_submissions(submissions, questions)
+    created = await _insert_ingested(
+        session,
+        [submission for submission, _ in valid.values()],
+    )
+    values, results = _ingested_answers(valid, created)
+    if values:
+        await session.execute(insert(UserFormFieldSubmission), values)
+    await update_question_stats(
+        session,
+        [
+            (row["question_id"], row["answer_number"])
+            for row in values
+            if row["answer_number"] is not None
+        ],
+    )
+    await _set_latest_results(session, results)
+    await session.commit()
+    return len(created)
+
+
+async def update_question_stats(
+    session: AsyncSession,
+    numbers: List[Tuple[int, float]],
+) -> None:
+    """
+    Add numeric answers to the statistics of their questions.
+
+    Aggregates and sketch buckets are updated with upserts
+    in the current transaction. Rows are written in the order
+    of their keys, so concurrent submissions lock them
+    in the same order and don't deadlock.
+
+    :param session: database session.
+    :param numbers: pairs of question id and numeric answer.
+    """
+    if not numbers:
+        return
+    by_question: Dict[int, List[float]] = {}
+    for question_id, number in numbers:
+        by_question.setdefault(question_id, []).append(number)
+
+    stats = pg_insert(FormQuestionStats)
+    await session.execute(
+        stats.on_conflict_do_update(
+            index_elements=[FormQuestionStats.question_id],
+            set_={
+                "count": FormQuestionStats.count + stats.excluded.count,
+                "sum": FormQuestionStats.sum + stats.excluded.sum,
+                "min": func.least(FormQuestionStats.min, stats.excluded.min),
+                "max": func.greatest(FormQuestionStats.max, stats.excluded.max),
+            },
+        ),
+        [
+            {
+                "question_id": question_id,
+                "count": len(question_numbers),
+                "sum": sum(question_numbers),
+                "min": min(question_numbers),
+                "max": max(question_numbers),
+            }
+            for question_id, question_numbers in sorted(by_question.items())
+        ],
+    )
+
+    buckets = Counter(
+        (question_id, bucket_key(number)) for question_id, number in numbers
+    )
+    bucket_rows = pg_insert(FormQuestionStatsBucket)
+    await session.execute(
+        bucket_rows.on_conflict_do_update(
+            index_elements=[
+                FormQuestionStatsBucket.question_id,
+                FormQuestionStatsBucket.key,
+            ],
+            set_={
+                "count": FormQuestionStatsBucket.count + bucket_rows.excluded.count,
+            },
+        ),
+        [
+            {"question_id": question_id, "key": key, "count": count}
+            for (question_id, key), count in sorted(buckets.items())
+        ],
+    )
+
+
+async def get_question_stats(session: AsyncSession, form_id: int) -> List[Row]:
+    r = await session.execute(
+        select(
+            FormQuestion.id,
+            FormQuestion.question,
+            FormQuestionStats.count,
+            FormQuestionStats.sum,
+            FormQuestionStats.min,
+            FormQuestionStats.max,
+        )
+        .outerjoin(FormQuestionStats, FormQuestionStats.question_id == FormQuestion.id)
+        .where(FormQuestion.form_id == form_id)
+        .order_by(FormQuestion.id),
+    )
+    return r.all()
+
+
+async def get_question_stats_buckets(
+    session: AsyncSession,
+    form_id: int,
+) -> List[Row]:
+    r = await session.execute(
+        select(
+            FormQuestionStatsBucket.question_id,
+            FormQuestionStatsBucket.key,
+            FormQuestionStatsBucket.count,
+        )
+        .join(FormQuestion, FormQuestion.id == FormQuestionStatsBucket.question_id)
+        .where(FormQuestion.form_id == form_id),
+    )
+    return r.all()
+
+
+async def rebuild_question_stats(session: AsyncSession) -> None:
+    """
+    Recompute statistics of all questions from stored numeric answers.
+
+    Needed once after numeric answers are backfilled.
+    Submissions arriving during the rebuild wait for it to finish.
+
+    :param session: database session.
+    """
+    number = UserFormFieldSubmission.answer_number
+    await session.execute(
+        text(
+            "LOCK TABLE form_question_stats, form_question_stats_bucket "
+            "IN EXCLUSIVE MODE",
+        ),
+    )
+    await session.execute(delete(FormQuestionStatsBucket))
+    await session.execute(delete(FormQuestionStats))
     await session.execute(
-        update(FormScheme).where(FormScheme.id == form_id).values(**dict(data)),
+        insert(FormQuestionStats).from_select(
+            ["question_id", "count", "sum", "min", "max"],
+            select(
+                UserFormFieldSubmission.question_id,
+                func.count(number),
+                func.sum(number),
+                func.min(number),
+                func.max(number),
+            )
+            .where(number.isnot(None))
+            .group_by(UserFormFieldSubmission.question_id),
+        ),
+    )
+    keys = (
+        select(
+            UserFormFieldSubmission.question_id,
+            bucket_key_sql(number).label("key"),
+        )
+        .where(number.isnot(None))
+        .subquery()
+    )
+    await session.execute(
+        insert(FormQuestionStatsBucket).from_select(
+            ["question_id", "key", "count"],
+            select(keys.c.question_id, keys.c.key, func.count()).group_by(
+                keys.c.question_id,
+                keys.c.key,
+            ),
+        ),
     )
     await session.commit()
-    return
 
 
-async def delete_form(session: AsyncSession, form_id: int):
-    form = await get_form(session, form_id)
-    if not form:
-        raise HTTPException(status_code=422, detail="Form can't be used")
+async def backfill_answer_numbers_batch(
+    session: AsyncSession,
+    after_id: int,
+    batch_size: int,
+) -> Optional[int]:
+    """
+    Fill numeric answers of the next batch of "number" answers.
+
+    Parsing is done in SQL with :data:`NUMBER_PATTERN`,
+    answers which are not numbers stay NULL.
+
+    :param session: database session.
+    :param after_id: last answer id of the previous batch.
+    :param batch_size: number of answers in the batch.
+    :return: last answer id of the batch or None if there are no more answers.
+    """
+    r = await session.execute(
+        select(UserFormFieldSubmission.id)
+        .join(FormQuestion, FormQuestion.id == UserFormFieldSubmission.question_id)
+        .where(
+            UserFormFieldSubmission.id > after_id,
+            FormQuestion.type == NUMBER_QUESTION_TYPE,
+        )
+        .order_by(UserFormFieldSubmission.id)
+        .limit(batch_size),
+    )
+    ids = r.scalars().all()
+    if not ids:
+        return None
 
     await session.execute(
-        delete(FormScheme).where(FormScheme.id == form_id),
+        update(UserFormFieldSubmission)
+        .where(
+            UserFormFieldSubmission.id.in_(ids),
+            UserFormFieldSubmission.answer_number.is_(None),
+            UserFormFieldSubmission.answer.regexp_match(NUMBER_PATTERN),
+        )
+        .values(
+            answer_number=cast(
+                func.replace(UserFormFieldSubmission.answer, ",", "."),
+                Float,
+            ),
+        )
+        .execution_options(synchronize_session=False),
     )
     await session.commit()
-    return
+    return ids[-1]
 
 
-async def get_form_field(session: AsyncSession, field_id: int) -> FormQuestion | None:
+def submission_report_query(
+    form_id: int,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> Select:
+    """
+    Build the flat report query for form submissions.
+
+    Every row is a single answer joined with its submission, author and
+    question. The per-user reference range override is resolved in the same
+    query, so the report costs one round trip regardless of its size.
+    Submissions without answers are returned as a single row with empty
+    answer columns.
+
+    The time window is applied to both partitioned tables,
+    so only partitions of the requested months are scanned.
+
+    :param form_id: id of the form.
+    :param since: only submissions created at or after this time.
+    :param until: only submissions created before this time.
+    :return: select statement ordered by submission and answer.
+    """
+    answers_on = [
+        UserFormFieldSubmission.submission_id == UserFormSubmission.id,
+        UserFormFieldSubmission.created_at == UserFormSubmission.created_at,
+    ]
+    query = (
+        select(
+            UserFormSubmission.id.label("submission_id"),
+            UserFormSubmission.created_at,
+            UserScheme.fullname.label("fio"),
+            FormQuestion.id.label("field_id"),
+            FormQuestion.question,
+            FormQuestion.type,
+            UserFormFieldSubmission.answer,
+            func.coalesce(UserRevQuestion.ref_min, FormQuestion.ref_min).label(
+                "ref_min",
+            ),
+            func.coalesce(UserRevQuestion.ref_max, FormQuestion.ref_max).label(
+                "ref_max",
+            ),
+        )
+        .join(UserScheme, UserScheme.id == UserFormSubmission.user_id)
+        .where(UserFormSubmission.form_id == form_id)
+    )
+    if since is not None:
+        query = query.where(UserFormSubmission.created_at >= since)
+        answers_on.append(UserFormFieldSubmission.created_at >= since)
+    if until is not None:
+        query = query.where(UserFormSubmission.created_at < until)
+        answers_on.append(UserFormFieldSubmission.created_at < until)
+    return (
+        query.outerjoin(UserFormFieldSubmission, and_(*answers_on))
+        .outerjoin(
+            FormQuestion,
+            FormQuestion.id == UserFormFieldSubmission.question_id,
+        )
+        .outerjoin(
+            UserRevQuestion,
+            and_(
+                UserRevQuestion.user_id == UserFormSubmission.user_id,
+                UserRevQuestion.question_id == UserFormFieldSubmission.question_id,
+            ),
+        )
+        .order_by(UserFormSubmission.id, UserFormFieldSubmission.id)
+    )
+
+
+def build_submission_dict(rows: List[Row]) -> Dict[str, Any]:
+    """
+    Build a JSON-ready submission from its report rows.
+
+    Rows are already typed by the database, so the result
+    is serialized as is, without validation.
+
+    :param rows: rows of :func:`submission_report_query` of one submission.
+    :return: submission with all of its answers.
+    """
+    return {
+        "fio": rows[0].fio,
+        "created_at": rows[0].created_at.isoformat(),
+        "answers": [
+            {
+                "field_id": row.field_id,
+                "question": row.question,
+                "type": row.type,
+                "answer": row.answer,
+                "ref_min": row.ref_min,
+                "ref_max": row.ref_max,
+            }
+            for row in rows
+            if row.field_id is not None
+        ],
+    }
+
+
+def build_submission(rows: List[Row]) -> FullSubmission:
+    """
+    Build a submission from its report rows.
+
+    :param rows: rows of :func:`submission_report_query` of one submission.
+    :return: submission with all of its answers.
+    """
+    return FullSubmission.parse_obj(build_submission_dict(rows))
+
+
+def group_submission_dicts(rows: Iterable[Row]) -> Iterator[Dict[str, Any]]:
+    """
+    Fold flat report rows into JSON-ready submissions.
+
+    :param rows: rows of :func:`submission_report_query`.
+    :yield: submissions in the order of the rows.
+    """
+    for _, group in groupby(rows, key=attrgetter("submission_id")):
+        yield build_submission_dict(list(group))
+
+
+def group_submission_rows(rows: Iterable[Row]) -> Iterator[FullSubmission]:
+    """
+    Fold flat report rows into submissions.
+
+    :param rows: rows of :func:`submission_report_query`.
+    :yield: submissions in the order of the rows.
+    """
+    for _, group in groupby(rows, key=attrgetter("submission_id")):
+        yield build_submission(list(group))
+
+
+async def get_submissions(
+    session: AsyncSession,
+    form_id: int,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> List[FullSubmission]:
+    r = await session.execute(submission_report_query(form_id, since, until))
+    return list(group_submission_rows(r.all()))
+
+
+async def get_submission_dicts(
+    session: AsyncSession,
+    form_id: int,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> List[Dict[str, Any]]:
+    r = await session.execute(submission_report_query(form_id, since, until))
+    return list(group_submission_dicts(r.all()))
+
+
+async def get_series_points(
+    session: AsyncSession,
+    form_id: int,
+    field_id: int,
+    user_id: int,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> List[Row]:
+    """
+    Get numeric answers of the user to the question ordered by time.
+
+    Submissions are found by the (user_id, form_id, created_at) index
+    and the time window prunes partitions of both tables.
+
+    :param session: database session.
+    :param form_id: id of the form of the question.
+    :param field_id: id of the question.
+    :param user_id: id of the patient.
+    :param since: only answers submitted at or after this time.
+    :param until: only answers submitted before this time.
+    :return: rows with created_at and answer_number.
+    """
+    answers_on = [
+        UserFormFieldSubmission.submission_id == UserFormSubmission.id,
+        UserFormFieldSubmission.created_at == UserFormSubmission.created_at,
+        UserFormFieldSubmission.question_id == field_id,
+        UserFormFieldSubmission.answer_number.isnot(None),
+    ]
+    query = select(
+        UserFormSubmission.created_at,
+        UserFormFieldSubmission.answer_number,
+    ).where(
+        UserFormSubmission.user_id == user_id,
+        UserFormSubmission.form_id == form_id,
+    )
+    if since is not None:
+        query = query.where(UserFormSubmission.created_at >= since)
+        answers_on.append(UserFormFieldSubmission.created_at >= since)
+    if until is not None:
+        query = query.where(UserFormSubmission.created_at < until)
+        answers_on.append(UserFormFieldSubmission.created_at < until)
     r = await session.execute(
-        select(FormQuestion)
-        .options(selectinload(FormQuestion.form))
-        .where(FormQuestion.id == field_id),
+        query.join(UserFormFieldSubmission, and_(*answers_on)).order_by(
+            UserFormSubmission.created_at,
+            UserFormFieldSubmission.id,
+        ),
     )
-    form = r.scalars().first()
+    return r.all()
+
+
+async def update_form(
+    session: AsyncSession,
+    data: BaseForm,
+    form_id: int,
+    user_id: int,
+) -> FormScheme:
+    form = await returning_one(
+        session,
+        FormScheme,
+        update(FormScheme)
+        .where(FormScheme.id == form_id, FormScheme.user_id == user_id)
+        .values(**dict(data)),
+    )
+    if not form:
+        await _raise_write_error(session, form_id, user_id)
+    await session.commit()
     return form
 
 
-async def update_form_field(
+async def delete_form(session: AsyncSession, form_id: int, user_id: int):
+    try:
+        form = await returning_one(
+            session,
+            FormScheme,
+            delete(FormScheme).where(
+                FormScheme.id == form_id,
+                FormScheme.user_id == user_id,
+            ),
+        )
+    except IntegrityError as error:
+        await session.rollback()
+        if is_violation(error, FOREIGN_KEY_VIOLATION):
+            raise HTTPException(status_code=422, detail="Form is in use")
+        raise
+    if not form:
+        await _raise_write_error(session, form_id, user_id)
+    await session.commit()
+    clear_loaders(session, FormScheme, form_id)
+    return
+
+
+async def get_form_field(session: AsyncSession, field_id: int) -> FormQuestion | None:
+    loader = get_loader(session, FormQuestion, FormQuestion.form)
+    field = await loader.load(field_id)
+    if field:
+        get_loader(session, FormScheme).prime(field.form)
+    return field
+
+
+async def _raise_field_write_error(
     session: AsyncSession,
-    data: CreateFormField,
     field_id: int,
-):
+    detail: str,
+) -> NoReturn:
     field = await get_form_field(session, field_id)
     if not field:
-        raise HTTPException(status_code=422, detail="No such field")
-    r = await session.execute(
+        raise HTTPException(status_code=422, detail=detail)
+    raise HTTPException(
+        status_code=401,
+        detail="You are not allowed to access this form",
+    )
+
+
+async def update_form_field(
+    session: AsyncSession,
+    data: CreateFormField,
+    field_id: int,
+    user_id: int,
+) -> FormQuestion:
+    field = await returning_one(
+        session,
+        FormQuestion,
         update(FormQuestion)
-        .where(FormQuestion.id == field_id)
-        .values(**dict(data))
-        .returning(literal_column("*")),
+        .where(
+            FormQuestion.id == field_id,
+            FormQuestion.form_id == FormScheme.id,
+            FormScheme.user_id == user_id,
+        )
+        .values(**dict(data)),
     )
+    if not field:
+        await _raise_field_write_error(session, field_id, "No such field")
     await session.commit()
-    field = r.scalars().first()
     return field
 
 
-async def delete_form_field(session: AsyncSession, field_id: int):
-    field = await get_form_field(session, field_id)
+async def delete_form_field(
+    session: AsyncSession,
+    field_id: int,
+    user_id: int,
+) -> FormQuestion:
+    try:
+        field = await returning_one(
+            session,
+            FormQuestion,
+            delete(FormQuestion).where(
+                FormQuestion.id == field_id,
+                FormQuestion.form_id == FormScheme.id,
+                FormScheme.user_id == user_id,
+            ),
+        )
+    except IntegrityError as error:
+        await session.rollback()
+        if is_violation(error, FOREIGN_KEY_VIOLATION):
+            raise HTTPException(status_code=422, detail="Field is in use")
+        raise
     if not field:
-        raise HTTPException(status_code=422, detail="Field can't be used")
-
-    await session.execute(
-        delete(FormQuestion).where(FormQuestion.id == field_id),
-    )
+        await _raise_field_write_error(session, field_id, "Field can't be used")
     await session.commit()
-    return
+    clear_loaders(session, FormQuestion, field_id)
+    return field
@@ -0,0 +1,89 @@
+"""
+Downsampling of numeric time series for charts.
+
+Both functions take points ordered by time as pairs of
+unix timestamp and value and return at most `threshold` points.
+"""
+from typing import List, Sequence, Tuple
+
+Point = Tuple[float, float]
+# time of the bucket start, mean, min and max
+Bucket = Tuple[float, float, float, float]
+
+
+def lttb(points: Sequence[Point], threshold: int) -> List[Point]:
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    Keeps the first and the last points and picks one point of every
+    bucket in between, the one forming the largest triangle with
+    the previously picked point and the mean of the next bucket,
+    so peaks and the overall shape of the series are preserved.
+
+    :param points: points ordered by time.
+    :param threshold: maximum number of points, at least 2.
+    :return: selected points.
+    """
+    if len(points) <= threshold:
+        return list(points)
+    if threshold < 3:
+        return [points[0], points[-1]]
+
+    sampled = [points[0]]
+    every = (len(points) - 2) / (threshold - 2)
+    previous = points[0]
+    for bucket in range(threshold - 2):
+        start = int(bucket * every) + 1
+        end = int((bucket + 1) * every) + 1
+
+        next_end = min(int((bucket + 2) * every) + 1, len(points))
+        next_points = points[end:next_end] or points[-1:]
+        mean_x = sum(x for x, _ in next_points) / len(next_points)
+        mean_y = sum(y for _, y in next_points) / len(next_points)
+
+        best_area = -1.0
+        best = points[start]
+        for point in points[start:end]:
+            area = abs(
+                (previous[0] - mean_x) * (point[1] - previous[1])
+                - (previous[0] - point[0]) * (mean_y - previous[1]),
+            )
+            if area > best_area:
+                best_area = area
+                best = point
+        sampled.append(best)
+        previous = best
+    sampled.append(points[-1])
+    return sampled
+
+
+def time_buckets(points: Sequence[Point], threshold: int) -> List[Bucket]:
+    """
+    Aggregate points into equal time buckets.
+
+    Empty buckets are skipped, so gaps in the series stay visible.
+
+    :param points: points ordered by time.
+    :param threshold: number of buckets.
+    :return: start, mean, min and max of every non-empty bucket.
+    """
+    if not points or threshold < 1:
+        return []
+    first, last = points[0][0], points[-1][0]
+    width = (last - first) / threshold or 1
+    buckets: List[Bucket] = []
+    values: List[float] = []
+    current = 0
+    for x, y in points:
+        index = min(int((x - first) / width), threshold - 1)
+        if index != current and values:
+            buckets.append(_bucket(first + current * width, values))
+            values = []
+        current = index
+        values.append(y)
+    buckets.append(_bucket(first + current * width, values))
+    return buckets
+
+
+def _bucket(start: float, values: List[float]) -> Bucket:
+    return start, sum(values) / len(values), min(values), max(values)
@@ -0,0 +1,187 @@
+import asyncio
+import hashlib
+import time
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+import ujson
+from fastapi import HTTPException
+from redis.asyncio import ConnectionPool, Redis
+from redis.exceptions import RedisError
+
+from med_backend.settings import settings
+
+# seconds between checks of a request, that is still in progress
+POLL_INTERVAL = 0.05
+
+
+def _key(scope: str, idempotency_key: str) -> str:
+    return f"idempotency:{scope}:{idempotency_key}"
+
+
+def fingerprint(payload: Any) -> str:
+    """
+    Hash of the request payload.
+
+    :param payload: JSON-ready payload of the request.
+    :return: hex digest.
+    """
+    return hashlib.sha256(ujson.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def _check_fingerprint(record: Dict[str, Any], request_fingerprint: str) -> None:
+    if record["fingerprint"] != request_fingerprint:
+        raise HTTPException(
+            status_code=422,
+            detail="Idempotency-Key was already used with another request",
+        )
+
+
+async def _wait_for_result(
+    redis: Redis,
+    key: str,
+    request_fingerprint: str,
+) -> Tuple[bool, Any]:
+    """
+    Wait until the first request with the key stores its result.
+
+    :param redis: redis connection.
+    :param key: redis key of the request.
+    :param request_fingerprint: fingerprint of the retried request.
+    :return: whether the result was stored and the result,
+        nothing is stored if the first request failed.
+    :raises HTTPException: if the first request doesn't finish in time.
+    """
+    deadline = time.monotonic() + settings.idempotency_wait
+    while time.monotonic() < deadline:
+        raw = await redis.get(key)
+        if raw is None:
+            return False, None
+        record = ujson.loads(raw)
+        _check_fingerprint(record, request_fingerprint)
+        if "result" in record:
+            return True, record["result"]
+        await asyncio.sleep(POLL_INTERVAL)
+    raise HTTPException(
+        status_code=409,
+        detail="Request with this Idempotency-Key is still in progress",
+    )
+
+
+async def _claim_or_replay(
+    redis: Redis,
+    key: str,
+    request_fingerprint: str,
+) -> Tuple[bool, Any]:
+    """
+    Claim the key or get the result of the request, that claimed it.
+
+    A claim released by a failed request is taken over.
+
+    :param redis: redis connection.
+    :param key: redis key of the request.
+    :param request_fingerprint: fingerprint of the request.
+    :return: whether the result was replayed and the result,
+        nothing is replayed if the key is claimed by this request.
+    """
+    pending = ujson.dumps({"fingerprint": request_fingerprint})
+    while True:  # noqa: WPS457
+        claimed = await redis.set(
+            key,
+            pending,
+            nx=True,
+            ex=settings.idempotency_pending_ttl,
+        )
+        if claimed:
+            return False, None
+        found, result = await _wait_for_result(redis, key, request_fingerprint)
+        if found:
+            return True, result
+
+
+async def _release(redis: Redis, key: str) -> None:
+    try:
+        await redis.delete(key)
+    except RedisError:
+        pass  # noqa: WPS420
+
+
+async def _store(redis: Redis, key: str, request_fingerprint: str, result: Any) -> None:
+    try:
+        await redis.set(
+            key,
+            ujson.dumps({"fingerprint": request_fingerprint, "result": result}),
+            ex=settings.idempotency_ttl,
+        )
+    except RedisError:
+        pass  # noqa: WPS420
+
+
+async def _run_claimed(
+    redis: Redis,
+    key: str,
+    request_fingerprint: str,
+    action: Callable[[], Awaitable[Any]],
+) -> Any:
+    """
+    Run the action and store its result under the claimed key.
+
+    The claim is released if the action fails.
+
+    :param redis: redis connection.
+    :param key: redis key of the request.
+    :param request_fingerprint: fingerprint of the request.
+    :param action: coroutine function making the change.
+    :return: JSON-ready result.
+    """
+    try:
+        result = await action()
+    except BaseException:
+        await _release(redis, key)
+        raise
+    await _store(redis, key, request_fingerprint, result)
+    return result
+
+
+async def run_once(
+    redis_pool: ConnectionPool,
+    scope: str,
+    idempotency_key: str,
+    payload: Any,
+    action: Callable[[], Awaitable[Any]],
+) -> Tuple[Any, bool]:
+    """
+    Run the action once per idempotency key.
+
+    The first request claims the key with SET NX and stores the result
+    of the action for `idempotency_ttl` seconds. Concurrent retries wait
+    for that result instead of running the action again, later retries
+    get it right away. If the action fails, the claim is released,
+    so the request can be retried.
+
+    Errors of redis are ignored and the action is run without
+    deduplication, so requests keep working without it.
+
+    :param redis_pool: redis connection pool.
+    :param scope: namespace of the key, e.g. user and endpoint.
+    :param idempotency_key: value of the Idempotency-Key header.
+    :param payload: JSON-ready payload of the request.
+    :param action: coroutine function making the change.
+    :return: JSON-ready result and whether it was replayed.
+    :raises HTTPException: if the key was used with another payload
+        or the first request is still in progress.
+    """
+    key = _key(scope, idempotency_key)
+    request_fingerprint = fingerprint(payload)
+    async with Redis(connection_pool=redis_pool) as redis:
+        try:
+            replayed, result = await _claim_or_replay(
+                redis,
+                key,
+                request_fingerprint,
+            )
+        except RedisError:
+            return await action(), False
+        if replayed:
+            return result, True
+        result = await _run_claimed(redis, key, request_fingerprint, action)
+    return result, False
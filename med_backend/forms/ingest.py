@@ -0,0 +1,258 @@
+"""
+Write-behind ingestion of submissions through a redis stream.
+
+The submit endpoint validates answers and appends them to the stream,
+`python -m med_backend worker` writes them to the database in batches.
+
+The worker keeps the id of the last written entry in redis and moves it
+only after the batch is committed, so a worker failing in between
+delivers the batch again and already stored submissions are skipped
+by their ingest_id. Entries before that id are trimmed from the stream.
+Submissions, that can't be written, are moved to a dead letter stream,
+so they don't block the ones queued after them.
+
+One worker holds a lease and consumes the stream, others
+wait and take over when the lease expires.
+"""
+import asyncio
+import logging
+import os
+import socket
+from datetime import datetime, timezone
+from typing import Callable, List, Optional, Tuple
+from uuid import UUID, uuid4
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from redis.asyncio import ConnectionPool, Redis
+from redis.exceptions import RedisError
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from med_backend.forms.crud import create_ingested_submissions
+from med_backend.forms.schemas import FormAnswer, IngestedSubmission
+from med_backend.settings import settings
+
+logger = logging.getLogger(__name__)
+
+STREAM_KEY = "ingest:submissions"
+LEASE_KEY = "ingest:lease"
+CURSOR_KEY = "ingest:cursor"
+DEAD_LETTER_KEY = "ingest:dead"
+PAYLOAD_FIELD = "submission"
+
+
+async def enqueue(
+    redis_pool: ConnectionPool,
+    form_id: int,
+    user_id: int,
+    answers: List[FormAnswer],
+) -> UUID:
+    """
+    Append the submission to the stream.
+
+    Submissions are rejected while the backlog is longer
+    than `ingest_max_backlog`, so clients back off
+    instead of growing the stream without bound.
+
+    :param redis_pool: redis connection pool.
+    :param form_id: id of the submitted form.
+    :param user_id: id of the submitting user.
+    :param answers: validated answers.
+    :return: id of the queued submission.
+    :raises HTTPException: if the backlog is full.
+    """
+    submission = IngestedSubmission(
+        ingest_id=uuid4(),
+        created_at=datetime.now(timezone.utc),
+        form_id=form_id,
+        user_id=user_id,
+        answers=answers,
+    )
+    async with Redis(connection_pool=redis_pool) as redis:
+        if await redis.xlen(STREAM_KEY) >= settings.ingest_max_backlog:
+            raise HTTPException(
+                status_code=503,
+                detail="Too many submissions, retry later",
+                headers={"Retry-After": str(settings.ingest_retry_after)},
+            )
+        await redis.xadd(STREAM_KEY, {PAYLOAD_FIELD: submission.json()})
+    return submission.ingest_id
+
+
+async def read_batch(
+    redis: Redis,
+    count: int,
+) -> Tuple[List[IngestedSubmission], Optional[bytes]]:
+    """
+    Read the oldest submissions, that are not written yet.
+
+    :param redis: redis connection.
+    :param count: maximum number of submissions.
+    :return: submissions and id of the last read entry.
+    """
+    cursor = await redis.get(CURSOR_KEY)
+    start = b"(" + cursor if cursor else "-"
+    entries = await redis.xrange(STREAM_KEY, min=start, count=count)
+    submissions = []
+    for entry_id, fields in entries:
+        try:
+            submissions.append(
+                IngestedSubmission.parse_raw(fields[PAYLOAD_FIELD.encode()])
+            )
+        except (KeyError, ValidationError):
+            logger.warning("Dropped malformed entry %s", entry_id)
+    last_id = entries[-1][0] if entries else None
+    return submissions, last_id
+
+
+async def advance(redis: Redis, last_id: bytes) -> None:
+    """
+    Mark entries up to the given one as written and trim them.
+
+    The last written entry is kept, so the stream isn't
+    trimmed beyond its end.
+
+    :param redis: redis connection.
+    :param last_id: id of the last written entry.
+    """
+    await redis.set(CURSOR_KEY, last_id)
+    await redis.xtrim(STREAM_KEY, minid=last_id)
+
+
+async def acquire_lease(redis: Redis, token: str) -> bool:
+    """
+    Take or prolong the lease of the stream consumer.
+
+    :param redis: redis connection.
+    :param token: unique name of the worker.
+    :return: whether the worker holds the lease.
+    """
+    ttl = settings.ingest_lease_ms
+    if await redis.set(LEASE_KEY, token, nx=True, px=ttl):
+        return True
+    if await redis.get(LEASE_KEY) == token.encode():
+        await redis.pexpire(LEASE_KEY, ttl)
+        return True
+    return False
+
+
+async def release_lease(redis: Redis, token: str) -> None:
+    """
+    Give the lease up, so another worker can take over right away.
+
+    :param redis: redis connection.
+    :param token: unique name of the worker.
+    """
+    if await redis.get(LEASE_KEY) == token.encode():
+        await redis.delete(LEASE_KEY)
+
+
+async def dead_letter(
+    redis: Redis,
+    submission: IngestedSubmission,
+    error: Exception,
+) -> None:
+    """
+    Move the submission, that can't be written, to the dead letter stream.
+
+    :param redis: redis connection.
+    :param submission: rejected submission.
+    :param error: error of the database.
+    """
+    logger.error("Dead-lettered submission %s: %s", submission.ingest_id, error)
+    await redis.xadd(
+        DEAD_LETTER_KEY,
+        {PAYLOAD_FIELD: submission.json(), "error": str(error)},
+        maxlen=settings.ingest_max_backlog,
+        approximate=True,
+    )
+
+
+async def _write_one_by_one(
+    redis: Redis,
+    session: AsyncSession,
+    submissions: List[IngestedSubmission],
+) -> int:
+    created = 0
+    for submission in submissions:
+        try:
+            created += await create_ingested_submissions(session, [submission])
+        except IntegrityError as error:
+            await session.rollback()
+            await dead_letter(redis, submission, error)
+    return created
+
+
+async def drain_batch(redis: Redis, session: AsyncSession) -> int:
+    """
+    Write the oldest batch of the stream to the database.
+
+    A batch violating a constraint, e.g. of a user deleted
+    after submitting, is written again one submission at a time,
+    and the violating submissions are dead-lettered.
+
+    :param redis: redis connection.
+    :param session: database session.
+    :return: number of consumed entries.
+    """
+    submissions, last_id = await read_batch(redis, settings.ingest_batch_size)
+    if last_id is None:
+        return 0
+    try:
+        created = await create_ingested_submissions(session, submissions)
+    except IntegrityError:
+        await session.rollback()
+        created = await _write_one_by_one(redis, session, submissions)
+    await advance(redis, last_id)
+    logger.debug("Ingested %d of %d submissions", created, len(submissions))
+    return len(submissions)
+
+
+async def _wait(stop: asyncio.Event, seconds: float) -> None:
+    try:
+        await asyncio.wait_for(stop.wait(), seconds)
+    except asyncio.TimeoutError:
+        pass  # noqa: WPS420
+
+
+async def _drain_leased(
+    redis: Redis,
+    session_factory: Callable[[], AsyncSession],
+    token: str,
+) -> int:
+    try:
+        if not await acquire_lease(redis, token):
+            return 0
+        async with session_factory() as session:
+            return await drain_batch(redis, session)
+    except (RedisError, SQLAlchemyError, OSError):
+        logger.exception("Failed to ingest submissions")
+    return 0
+
+
+async def run_worker(
+    redis_pool: ConnectionPool,
+    session_factory: Callable[[], AsyncSession],
+    stop: asyncio.Event,
+) -> None:
+    """
+    Consume the stream until stopped.
+
+    Full batches are drained back to back, the stream
+    is polled every `ingest_poll_interval` seconds once it's empty.
+    Failed batches are retried after the same interval.
+
+    :param redis_pool: redis connection pool.
+    :param session_factory: factory of database sessions.
+    :param stop: event to stop the worker.
+    """
+    token = f"{socket.gethostname()}:{os.getpid()}"
+    async with Redis(connection_pool=redis_pool) as redis:
+        try:
+            while not stop.is_set():
+                drained = await _drain_leased(redis, session_factory, token)
+                if drained < settings.ingest_batch_size:
+                    await _wait(stop, settings.ingest_poll_interval)
+        finally:
+            await release_lease(redis, token)
@@ -1,4 +1,7 @@
-from typing import List
+import enum
+from datetime import datetime
+from typing import Dict, List
+from uuid import UUID
 
 from pydantic import BaseModel
 
@@ -38,11 +41,30 @@ class FormAssigment(BaseModel):
     question_refs: List[QuestionRef]
 
 
+class BulkFormAssigment(BaseModel):
+    assigments: List[FormAssigment]
+
+
 class FormAnswer(BaseModel):
     field_id: int
     answer: str
 
 
+class IngestedSubmission(BaseModel):
+    """Submission queued for writing by the ingestion worker."""
+
+    ingest_id: UUID
+    created_at: datetime
+    form_id: int
+    user_id: int
+    answers: List[FormAnswer]
+
+
+class SubmissionCreated(BaseModel):
+    id: int
+    answer_ids: List[int]
+
+
 class FullAnswer(BaseModel):
     field_id: int
     question: str
@@ -54,9 +76,58 @@ class FullAnswer(BaseModel):
 
 class FullSubmission(BaseModel):
     fio: str
+    created_at: datetime
     answers: List[FullAnswer]
 
 
+class FieldStats(BaseModel):
+    field_id: int
+    question: str
+    count: int
+    min: float | None
+    max: float | None
+    mean: float | None
+    percentiles: Dict[str, float]
+
+
+class ExportFormat(str, enum.Enum):  # noqa: WPS600
+    """Formats of the submissions export."""
+
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+class RangeFlag(str, enum.Enum):  # noqa: WPS600
+    """Position of a numeric answer relative to its reference range."""
+
+    LOW = "low"
+    NORMAL = "normal"
+    HIGH = "high"
+
+
+class SeriesMethod(str, enum.Enum):  # noqa: WPS600
+    """Downsampling methods of answer time series."""
+
+    LTTB = "lttb"
+    BUCKETS = "buckets"
+
+
+class SeriesPoint(BaseModel):
+    time: datetime
+    value: float
+    # bounds of the aggregated bucket, only set by the "buckets" method
+    min: float | None
+    max: float | None
+
+
+class Series(BaseModel):
+    field_id: int
+    user_id: int
+    method: SeriesMethod
+    total: int
+    points: List[SeriesPoint]
+
+
 class BaseForm(BaseModel):
     name: str
 
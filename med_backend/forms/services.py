@@ -1,48 +1,185 @@
-from typing import List
+import csv
+import io
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
+import ujson
 from fastapi import HTTPException
+from redis.asyncio import ConnectionPool, Redis
+from redis.exceptions import RedisError
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from med_backend.forms import cache, idempotency, ingest, sketch
 from med_backend.forms.crud import (
-    create_form_assigment,
+    backfill_answer_numbers_batch,
+    build_submission_dict,
+    create_form_assigments,
     create_submission,
-    create_submission_answer,
-    create_user_form_rev_question,
     get_form,
+    get_question_stats,
+    get_question_stats_buckets,
     get_questions,
-    get_submissions,
+    get_series_points,
+    get_submission_dicts,
+    get_submission_questions,
+    submission_report_query,
 )
-from med_backend.forms.schemas import Form, FormAnswer, FormAssigment, Question
+from med_backend.forms.downsampling import lttb, time_buckets
+from med_backend.forms.schemas import (
+    ExportFormat,
+    FieldStats,
+    Form,
+    FormAnswer,
+    FormAssigment,
+    Series,
+    SeriesMethod,
+    SeriesPoint,
+    SubmissionCreated,
+)
+from med_backend.services.singleflight.group import fill_once, flights
+from med_backend.settings import settings
 
+# rows fetched from the server-side cursor per round trip
+EXPORT_BATCH_SIZE = 1000
+EXPORT_CSV_HEADER = (
+    "submission_id",
+    "created_at",
+    "fio",
+    "field_id",
+    "question",
+    "type",
+    "answer",
+    "ref_min",
+    "ref_max",
+)
+STATS_PERCENTILES = (50, 90, 95, 99)
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
 
-async def get_full_form(session: AsyncSession, form_id: int) -> Form:
+
+def dump_json(payload: Any) -> bytes:
+    """
+    Serialize payload the same way as the default response class.
+
+    :param payload: JSON-ready payload.
+    :return: response body.
+    """
+    return ujson.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+
+async def get_form_dict(session: AsyncSession, form_id: int) -> Dict[str, Any]:
     form = await get_form(session, form_id)
     if not form:
         raise HTTPException(status_code=404, detail="Form doesn't exist")
     questions = await get_questions(session, form_id)
 
-    return Form(
-        id=form_id,
-        name=form.name,
-        questions=[
-            Question(id=q.id, type=q.type, question=q.question) for q in questions
+    return {
+        "id": form_id,
+        "name": form.name,
+        "questions": [
+            {"id": q.id, "type": q.type, "question": q.question} for q in questions
         ],
+    }
+
+
+async def get_full_form(session: AsyncSession, form_id: int) -> Form:
+    return Form.parse_obj(await get_form_dict(session, form_id))
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+
+async def get_full_form_cached(
+    session: AsyncSession,
+    redis_pool: ConnectionPool,
+    form_id: int,
+    if_none_match: Optional[str] = None,
+) -> Tuple[Optional[bytes], Optional[str]]:
+    """
+    Get serialized form through the local LRU and redis caches.
+
+    The form is loaded from the database only if its current
+    version is in neither of the caches. Caches keep the response
+    body, so a hit is returned without parsing or validation.
+    Concurrent misses of the same version share one load.
+
+    Without redis the version is unknown, so the form is loaded
+    from the database and returned without an ETag.
+
+    :param session: database session.
+    :param redis_pool: redis connection pool.
+    :param form_id: id of the form.
+    :param if_none_match: value of the If-None-Match header.
+    :return: form body or None if it matches If-None-Match, and its ETag.
+    """
+    try:
+        async with Redis(connection_pool=redis_pool) as redis:
+            version = await cache.get_version(redis, form_id)
+            etag = cache.form_etag(form_id, version)
+            if _etag_matches(if_none_match, etag):
+                return None, etag
+
+            body = await cache.get_form(redis, form_id, version)
+            if body is None:
+                body = await flights.do(
+                    ("form", form_id, version),
+                    lambda: _load_form(session, redis, form_id, version),
+                )
+    except RedisError:
+        return dump_json(await get_form_dict(session, form_id)), None
+    return body, etag
+
+
+async def _load_form(
+    session: AsyncSession,
+    redis: Redis,
+    form_id: int,
+    version: int,
+) -> bytes:
+    """
+    Load the form from the database and put it to the caches.
+
+    With `singleflight_lock` enabled only one worker loads
+    the version, the others wait for it in redis.
+
+    :param session: database session.
+    :param redis: redis connection.
+    :param form_id: id of the form.
+    :param version: current version of the form.
+    :return: JSON of the form.
+    """
+
+    async def load() -> bytes:  # noqa: WPS430
+        body = dump_json(await get_form_dict(session, form_id))
+        await cache.set_form(redis, form_id, version, body)
+        return body
+
+    if not settings.singleflight_lock:
+        return await load()
+    return await fill_once(
+        redis,
+        f"form:{form_id}:{version}",
+        lambda: cache.get_form(redis, form_id, version),
+        load,
     )
 
 
-async def assign_form(session: AsyncSession, data: FormAssigment, form_id: int):
+async def assign_form(
+    session: AsyncSession,
+    data: List[FormAssigment],
+    form_id: int,
+) -> int:
     form = await get_form(session, form_id)
     if not form:
         raise HTTPException(status_code=404, detail="Form doesn't exist")
-    await create_form_assigment(session, form_id, data.user_id)
-    for field in data.question_refs:
-        await create_user_form_rev_question(
-            session,
-            field.id,
-            data.user_id,
-            field.ref_min,
-            field.ref_max,
-        )
+    return await create_form_assigments(session, form_id, data)
 
 
 async def submit_form(
@@ -50,15 +187,294 @@ async def submit_form(
     data: List[FormAnswer],
     form_id: int,
     user_id: int,
-):
-    subm = await create_submission(session, form_id, user_id)
-    for answer in data:
-        await create_submission_answer(session, subm.id, answer.field_id, answer.answer)
+) -> SubmissionCreated:
+    submission_id, answer_ids = await create_submission(
+        session,
+        form_id,
+        user_id,
+        data,
+    )
+    return SubmissionCreated(id=submission_id, answer_ids=answer_ids)
 
 
-async def get_form_submissions(session: AsyncSession, form_id: int):
+async def accept_submission(
+    session: AsyncSession,
+    redis_pool: ConnectionPool,
+    data: List[FormAnswer],
+    form_id: int,
+    user_id: int,
+) -> Dict[str, Any]:
+    """
+    Submit the form or queue the submission to the ingestion stream.
+
+    Submissions are queued when `ingest_stream` is enabled,
+    answers are validated before that in both cases.
+
+    :param session: database session.
+    :param redis_pool: redis connection pool.
+    :param data: answers.
+    :param form_id: id of the form.
+    :param user_id: id of the patient.
+    :return: created or queued submission.
+    """
+    if not settings.ingest_stream:
+        submission = await submit_form(session, data, form_id, user_id)
+        return {"message": "created", **submission.dict()}
+    await get_submission_questions(
+        session,
+        form_id,
+        user_id,
+        {answer.field_id for answer in data},
+    )
+    ingest_id = await ingest.enqueue(redis_pool, form_id, user_id, data)
+    return {"message": "accepted", "ingest_id": str(ingest_id)}
+
+
+async def submit_form_once(  # noqa: WPS211
+    session: AsyncSession,
+    redis_pool: ConnectionPool,
+    data: List[FormAnswer],
+    form_id: int,
+    user_id: int,
+    idempotency_key: str,
+) -> Tuple[Dict[str, Any], bool]:
+    """
+    Accept the submission at most once per idempotency key.
+
+    Retries with the same key get the result of the first request.
+
+    :param session: database session.
+    :param redis_pool: redis connection pool.
+    :param data: answers.
+    :param form_id: id of the form.
+    :param user_id: id of the patient.
+    :param idempotency_key: value of the Idempotency-Key header.
+    :return: result of :func:`accept_submission` and whether
+        it was made by an earlier request.
+    """
+
+    async def submit() -> Dict[str, Any]:  # noqa: WPS430
+        return await accept_submission(session, redis_pool, data, form_id, user_id)
+
+    return await idempotency.run_once(
+        redis_pool,
+        f"submit:{user_id}:{form_id}",
+        idempotency_key,
+        [answer.dict() for answer in data],
+        submit,
+    )
+
+
+async def get_form_submissions(
+    session: AsyncSession,
+    form_id: int,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> List[Dict[str, Any]]:
     form = await get_form(session, form_id)
     if not form:
         raise HTTPException(status_code=404, detail="Form doesn't exist")
-    submissions = await get_submissions(session, form_id)
+    submissions = await get_submission_dicts(session, form_id, since, until)
     return submissions
+
+
+async def get_form_stats(session: AsyncSession, form_id: int) -> List[FieldStats]:
+    """
+    Get statistics of numeric answers to every question of the form.
+
+    Statistics are maintained on submit, so the cost depends
+    on the number of questions and sketch buckets,
+    not on the number of submissions.
+
+    :param session: database session.
+    :param form_id: id of the form.
+    :return: statistics in the order of questions.
+    """
+    buckets: Dict[int, List[Tuple[int, int]]] = {}
+    for row in await get_question_stats_buckets(session, form_id):
+        buckets.setdefault(row.question_id, []).append((row.key, row.count))
+
+    stats = []
+    for row in await get_question_stats(session, form_id):
+        if not row.count:
+            stats.append(
+                FieldStats(
+                    field_id=row.id,
+                    question=row.question,
+                    count=0,
+                    percentiles={},
+                ),
+            )
+            continue
+        estimates = sketch.quantiles(
+            buckets.get(row.id, []),
+            [percentile / 100 for percentile in STATS_PERCENTILES],
+        )
+        stats.append(
+            FieldStats(
+                field_id=row.id,
+                question=row.question,
+                count=row.count,
+                min=row.min,
+                max=row.max,
+                mean=row.sum / row.count,
+                percentiles={
+                    # estimates are clamped to the exact bounds
+                    f"p{percentile}": min(max(estimate, row.min), row.max)
+                    for percentile, estimate in zip(STATS_PERCENTILES, estimates)
+                },
+            ),
+        )
+    return stats
+
+
+async def get_field_series(  # noqa: WPS211
+    session: AsyncSession,
+    form_id: int,
+    field_id: int,
+    user_id: int,
+    points: int,
+    method: SeriesMethod,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> Series:
+    """
+    Get numeric answers of the patient downsampled for a chart.
+
+    :param session: database session.
+    :param form_id: id of the form of the question.
+    :param field_id: id of the question.
+    :param user_id: id of the patient.
+    :param points: maximum number of returned points.
+    :param method: downsampling method.
+    :param since: only answers submitted at or after this time.
+    :param until: only answers submitted before this time.
+    :return: downsampled series.
+    """
+    rows = await get_series_points(session, form_id, field_id, user_id, since, until)
+    tz = rows[0].created_at.tzinfo if rows else None
+    raw = [(row.created_at.timestamp(), row.answer_number) for row in rows]
+    if method == SeriesMethod.BUCKETS:
+        series = [
+            SeriesPoint(
+                time=datetime.fromtimestamp(start, tz),
+                value=mean,
+                min=low,
+                max=high,
+            )
+            for start, mean, low, high in time_buckets(raw, points)
+        ]
+    else:
+        series = [
+            SeriesPoint(time=datetime.fromtimestamp(time, tz), value=value)
+            for time, value in lttb(raw, points)
+        ]
+    return Series(
+        field_id=field_id,
+        user_id=user_id,
+        method=method,
+        total=len(rows),
+        points=series,
+    )
+
+
+async def backfill_answer_numbers(session: AsyncSession, batch_size: int) -> int:
+    """
+    Fill numeric answers of all existing "number" answers.
+
+    Every batch is committed separately, so the backfill
+    doesn't hold long locks and can be restarted at any time.
+
+    :param session: database session.
+    :param batch_size: number of answers per batch.
+    :return: number of processed batches.
+    """
+    batches = 0
+    last_id: Optional[int] = 0
+    while True:
+        last_id = await backfill_answer_numbers_batch(session, last_id, batch_size)
+        if last_id is None:
+            return batches
+        batches += 1
+
+
+async def _stream_report_batches(
+    session: AsyncSession,
+    form_id: int,
+    since: Optional[datetime],
+    until: Optional[datetime],
+) -> AsyncIterator[List[Row]]:
+    result = await session.stream(
+        submission_report_query(form_id, since, until).execution_options(
+            yield_per=EXPORT_BATCH_SIZE,
+        ),
+    )
+    async for batch in result.partitions(EXPORT_BATCH_SIZE):
+        yield batch
+
+
+async def _export_ndjson(
+    session: AsyncSession,
+    form_id: int,
+    since: Optional[datetime],
+    until: Optional[datetime],
+) -> AsyncIterator[str]:
+    # a submission can be split between two batches,
+    # so the last group of every batch is carried over to the next one
+    pending: List[Row] = []
+    async for batch in _stream_report_batches(session, form_id, since, until):
+        lines = []
+        for row in batch:
+            if pending and pending[0].submission_id != row.submission_id:
+                lines.append(ujson.dumps(build_submission_dict(pending)))
+                pending = []
+            pending.append(row)
+        if lines:
+            yield "\n".join(lines) + "\n"
+    if pending:
+        yield ujson.dumps(build_submission_dict(pending)) + "\n"
+
+
+async def _export_csv(
+    session: AsyncSession,
+    form_id: int,
+    since: Optional[datetime],
+    until: Optional[datetime],
+) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_CSV_HEADER)
+    async for batch in _stream_report_batches(session, form_id, since, until):
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    remaining = buffer.getvalue()
+    if remaining:
+        yield remaining
+
+
+def export_form_submissions(
+    session: AsyncSession,
+    form_id: int,
+    export_format: ExportFormat,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> AsyncIterator[str]:
+    """
+    Stream all submissions of the form.
+
+    Rows are read through a server-side cursor in batches
+    of EXPORT_BATCH_SIZE, so memory usage doesn't depend on the
+    number of submissions.
+
+    :param session: database session.
+    :param form_id: id of the form.
+    :param export_format: format of the output.
+    :param since: only submissions created at or after this time.
+    :param until: only submissions created before this time.
+    :return: async iterator over chunks of the export.
+    """
+    if export_format == ExportFormat.CSV:
+        return _export_csv(session, form_id, since, until)
+    return _export_ndjson(session, form_id, since, until)
@@ -0,0 +1,91 @@
+"""
+Mergeable quantile sketch with relative accuracy.
+
+Values are counted in logarithmic buckets, as in DDSketch:
+every value in a bucket is within RELATIVE_ACCURACY of the value
+the bucket stands for. Buckets of different sketches are merged
+by adding their counts, so the sketch is kept in the database
+and updated with plain upserts.
+"""
+import math
+from typing import Iterable, List, Sequence, Tuple
+
+from sqlalchemy import Integer, case, cast, func
+from sqlalchemy.sql import ColumnElement
+
+RELATIVE_ACCURACY = 0.01
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+LOG_GAMMA = math.log(GAMMA)
+# values closer to zero share the zero bucket
+MIN_VALUE = 1e-9
+# shifts keys of positive values above zero and negative values below it
+KEY_OFFSET = 2000
+
+
+def bucket_key(value: float) -> int:
+    """
+    Get key of the bucket of the value.
+
+    Keys are ordered the same way as values.
+
+    :param value: value to count.
+    :return: key of the bucket.
+    """
+    if abs(value) < MIN_VALUE:
+        return 0
+    key = math.ceil(math.log(abs(value)) / LOG_GAMMA) + KEY_OFFSET
+    return key if value > 0 else -key
+
+
+def bucket_key_sql(value: ColumnElement) -> ColumnElement:
+    """
+    SQL version of :func:`bucket_key`.
+
+    :param value: numeric column.
+    :return: expression of the bucket key.
+    """
+    key = cast(func.ceil(func.ln(func.abs(value)) / LOG_GAMMA), Integer) + KEY_OFFSET
+    return case(
+        (func.abs(value) < MIN_VALUE, 0),
+        (value > 0, key),
+        else_=-key,
+    )
+
+
+def bucket_value(key: int) -> float:
+    """
+    Get the value the bucket stands for.
+
+    :param key: key of the bucket.
+    :return: value within RELATIVE_ACCURACY of every value in the bucket.
+    """
+    if key == 0:
+        return 0
+    exponent = abs(key) - KEY_OFFSET
+    value = 2 * GAMMA**exponent / (GAMMA + 1)
+    return value if key > 0 else -value
+
+
+def quantiles(
+    buckets: Iterable[Tuple[int, int]],
+    qs: Sequence[float],
+) -> List[float]:
+    """
+    Estimate quantiles from bucket counts.
+
+    :param buckets: pairs of bucket key and count.
+    :param qs: quantiles to estimate, from 0 to 1.
+    :return: estimated values in the order of qs.
+    """
+    ordered = sorted(buckets)
+    total = sum(count for _, count in ordered)
+    estimates = []
+    for q in qs:
+        rank = q * (total - 1)
+        seen = 0
+        for key, count in ordered:
+            seen += count
+            if seen > rank:
+                estimates.append(bucket_value(key))
+                break
+    return estimates
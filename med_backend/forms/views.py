@@ -1,49 +1,65 @@
+from datetime import datetime
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse, UJSONResponse
+from redis.asyncio import ConnectionPool
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
 from med_backend.auth.schemas import User
 from med_backend.auth.services import get_current_active_user
 from med_backend.db.dependencies import get_db_session
+from med_backend.db.pagination import MAX_PAGE_SIZE, Page
 from med_backend.forms import crud, services
+from med_backend.forms.cache import invalidate_form
 from med_backend.forms.schemas import (
     BaseForm,
+    BulkFormAssigment,
     CreateFormField,
+    ExportFormat,
+    FieldStats,
     Form,
     FormAnswer,
     FormAssigment,
     FormField,
     FullSubmission,
     ListForm,
+    Series,
+    SeriesMethod,
 )
-from med_backend.forms.services import assign_form, submit_form
+from med_backend.forms.services import assign_form
+from med_backend.services.redis.dependency import get_redis_pool
 from med_backend.users.services import get_current_active_manager
 
 router = APIRouter()
 
 
-@router.get("/all", response_model=list[ListForm])
+@router.get("/all", response_model=Page[ListForm])
 async def get_all_forms(
-    skip: int = 0,
-    limit: int = 100,
+    cursor: str | None = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
     current_user: User = Depends(get_current_active_manager),
     session: AsyncSession = Depends(get_db_session),
 ):
-    forms = await crud.get_forms(session, skip, limit)
-    return forms
+    forms, next_cursor = await crud.get_forms(session, cursor, limit)
+    return {"items": forms, "next_cursor": next_cursor}
 
 
-@router.get("/list", response_model=list[ListForm])
+@router.get("/list", response_model=Page[ListForm])
 async def get_all_user_forms(
-    skip: int = 0,
-    limit: int = 100,
+    cursor: str | None = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
     current_user: User = Depends(get_current_active_user),
     session: AsyncSession = Depends(get_db_session),
 ):
-    forms = await crud.filter_form_assigment(session, current_user.id, skip, limit)
-    return forms
+    forms, next_cursor = await crud.filter_form_assigment(
+        session,
+        current_user.id,
+        cursor,
+        limit,
+    )
+    return {"items": forms, "next_cursor": next_cursor}
 
 
 @router.post("/create", response_model=Form)
@@ -53,18 +69,28 @@ async def create_form_view(
     session: AsyncSession = Depends(get_db_session),
 ) -> Form:
     db_form = await crud.create_form(session, data, current_user.id)
-    form = await services.get_full_form(session, db_form.id)
-    return form
+    return Form(id=db_form.id, name=db_form.name, questions=[])
 
 
 @router.get("/{form_id}", response_model=Form)
 async def get_form(
     form_id: int,
+    if_none_match: str | None = Header(None),
     current_user: User = Depends(get_current_active_user),
     session: AsyncSession = Depends(get_db_session),
-) -> Form:
-    form = await services.get_full_form(session, form_id)
-    return form
+    redis_pool: ConnectionPool = Depends(get_redis_pool),
+):
+    body, etag = await services.get_full_form_cached(
+        session,
+        redis_pool,
+        form_id,
+        if_none_match,
+    )
+    headers = {"ETag": etag} if etag else None
+    if body is None:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    # the body is already serialized, response_model is only used for docs
+    return Response(body, media_type="application/json", headers=headers)
 
 
 @router.put("/{form_id}", response_model=Form)
@@ -73,48 +99,99 @@ async def update_form(
     data: BaseForm,
     current_user: User = Depends(get_current_active_manager),
     session: AsyncSession = Depends(get_db_session),
+    redis_pool: ConnectionPool = Depends(get_redis_pool),
 ) -> Form:
+    await crud.update_form(session, data, form_id, current_user.id)
+    await invalidate_form(redis_pool, form_id)
+    form = await services.get_full_form(session, form_id)
+    return form
+
+
+@router.delete("/{form_id}")
+async def delete_form(
+    form_id: int,
+    current_user: User = Depends(get_current_active_user),
+    session: AsyncSession = Depends(get_db_session),
+    redis_pool: ConnectionPool = Depends(get_redis_pool),
+):
+    await crud.delete_form(session, form_id, current_user.id)
+    await invalidate_form(redis_pool, form_id)
+    return {"detail": "deleted"}
+
+
+@router.get("/{form_id}/answers", response_model=List[FullSubmission])
+async def get_submissions(
+    form_id: int,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    current_user: User = Depends(get_current_active_manager),
+    session: AsyncSession = Depends(get_db_session),
+):
     form = await crud.get_form(session, form_id)
     if form.user_id != current_user.id:
         raise HTTPException(
             status_code=401,
             detail="You are not allowed to access this form",
         )
-    await crud.update_form(session, data, form_id)
-    form = await services.get_full_form(session, form_id)
-    return form
+    submissions = await services.get_form_submissions(
+        session,
+        form_id,
+        since,
+        until,
+    )
+    # submissions are built from typed rows, skip response_model validation
+    return UJSONResponse(submissions)
 
 
-@router.delete("/{form_id}")
-async def delete_form(
+@router.get("/{form_id}/stats", response_model=List[FieldStats])
+async def get_form_stats(
     form_id: int,
-    current_user: User = Depends(get_current_active_user),
+    current_user: User = Depends(get_current_active_manager),
     session: AsyncSession = Depends(get_db_session),
 ):
     form = await crud.get_form(session, form_id)
+    if not form:
+        raise HTTPException(status_code=404, detail="Form doesn't exist")
     if form.user_id != current_user.id:
         raise HTTPException(
             status_code=401,
             detail="You are not allowed to access this form",
         )
-    await crud.delete_form(session, form_id)
-    return {"detail": "deleted"}
+    return await services.get_form_stats(session, form_id)
 
 
-@router.get("/{form_id}/answers", response_model=List[FullSubmission])
-async def get_submissions(
+@router.get("/{form_id}/export")
+async def export_submissions(
     form_id: int,
+    export_format: ExportFormat = Query(ExportFormat.NDJSON, alias="format"),
+    since: datetime | None = None,
+    until: datetime | None = None,
     current_user: User = Depends(get_current_active_manager),
     session: AsyncSession = Depends(get_db_session),
 ):
     form = await crud.get_form(session, form_id)
+    if not form:
+        raise HTTPException(status_code=404, detail="Form doesn't exist")
     if form.user_id != current_user.id:
         raise HTTPException(
             status_code=401,
             detail="You are not allowed to access this form",
         )
-    submissions = await services.get_form_submissions(session, form_id)
-    return submissions
+    return StreamingResponse(
+        services.export_form_submissions(
+            session,
+            form_id,
+            export_format,
+            since,
+            until,
+        ),
+        media_type=services.EXPORT_MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": (
+                f'attachment; filename="form_{form_id}.{export_format.value}"'
+            ),
+        },
+    )
 
 
 @router.get("/{form_id}/fields", response_model=List[FormField])
@@ -133,14 +210,77 @@ async def create_form_field_view(
     return fields
 
 
+def _series_user_id(
+    current_user: User,
+    form_owner_id: int,
+    user_id: int | None,
+) -> int:
+    """
+    Get the patient, whose series is requested.
+
+    Managers have to pass the patient of their form,
+    patients get their own series.
+
+    :param current_user: authenticated user.
+    :param form_owner_id: id of the manager owning the form.
+    :param user_id: requested patient.
+    :return: id of the patient.
+    :raises HTTPException: if the series is not allowed or user_id is missing.
+    """
+    if current_user.is_manager:
+        if form_owner_id != current_user.id:
+            raise HTTPException(
+                status_code=401,
+                detail="You are not allowed to access this form",
+            )
+        if user_id is None:
+            raise HTTPException(status_code=422, detail="user_id is required")
+        return user_id
+    if user_id is not None and user_id != current_user.id:
+        raise HTTPException(
+            status_code=401,
+            detail="You are not allowed to access this series",
+        )
+    return current_user.id
+
+
+@router.get("/{form_id}/fields/{field_id}/series", response_model=Series)
+async def get_field_series(  # noqa: WPS211
+    form_id: int,
+    field_id: int,
+    user_id: int | None = None,
+    points: int = Query(200, ge=2, le=1000),
+    method: SeriesMethod = SeriesMethod.LTTB,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    current_user: User = Depends(get_current_active_user),
+    session: AsyncSession = Depends(get_db_session),
+):
+    field = await crud.get_form_field(session, field_id)
+    if not field or field.form_id != form_id:
+        raise HTTPException(status_code=404, detail="Field doesn't exist")
+    return await services.get_field_series(
+        session,
+        form_id,
+        field_id,
+        _series_user_id(current_user, field.form.user_id, user_id),
+        points,
+        method,
+        since,
+        until,
+    )
+
+
 @router.post("/{form_id}/fields", response_model=FormField)
 async def create_form_field_view(
     form_id: int,
     data: CreateFormField,
     current_user: User = Depends(get_current_active_manager),
     session: AsyncSession = Depends(get_db_session),
+    redis_pool: ConnectionPool = Depends(get_redis_pool),
 ):
     field = await crud.create_form_field(session, data, current_user.id, form_id)
+    await invalidate_form(redis_pool, form_id)
     return field
 
 
@@ -157,19 +297,59 @@ async def create_assigment_view(
             status_code=401,
             detail="You are not allowed to access this form",
         )
-    await assign_form(session, data, form_id)
+    await assign_form(session, [data], form_id)
     return {"message": "created"}
 
 
+@router.post("/{form_id}/assign/bulk", status_code=status.HTTP_201_CREATED)
+async def create_bulk_assigment_view(
+    form_id: int,
+    data: BulkFormAssigment,
+    current_user: User = Depends(get_current_active_manager),
+    session: AsyncSession = Depends(get_db_session),
+):
+    form = await services.get_form(session, form_id)
+    if form.user_id != current_user.id:
+        raise HTTPException(
+            status_code=401,
+            detail="You are not allowed to access this form",
+        )
+    assigned = await assign_form(session, data.assigments, form_id)
+    return {"message": "created", "assigned": assigned}
+
+
 @router.post("/{form_id}/submit")
 async def submit_form_view(
     form_id: int,
     data: List[FormAnswer],
+    response: Response,
+    idempotency_key: str | None = Header(None, max_length=255),
     current_user: User = Depends(get_current_active_user),
     session: AsyncSession = Depends(get_db_session),
+    redis_pool: ConnectionPool = Depends(get_redis_pool),
 ):
-    await submit_form(session, data, form_id, current_user.id)
-    return {"message": "created"}
+    if idempotency_key is None:
+        result = await services.accept_submission(
+            session,
+            redis_pool,
+            data,
+            form_id,
+            current_user.id,
+        )
+    else:
+        result, replayed = await services.submit_form_once(
+            session,
+            redis_pool,
+            data,
+            form_id,
+            current_user.id,
+            idempotency_key,
+        )
+        if replayed:
+            response.headers["Idempotent-Replayed"] = "true"
+    if "ingest_id" in result:
+        response.status_code = status.HTTP_202_ACCEPTED
+    return result
 
 
 @router.get("/field/{field_id}", response_model=FormField)
@@ -188,15 +368,10 @@ async def update_form_field(
     data: CreateFormField,
     current_user: User = Depends(get_current_active_manager),
     session: AsyncSession = Depends(get_db_session),
+    redis_pool: ConnectionPool = Depends(get_redis_pool),
 ):
-    field = await crud.get_form_field(session, field_id)
-    if field.form.user_id != current_user.id:
-        raise HTTPException(
-            status_code=401,
-            detail="You are not allowed to access this form",
-        )
-    await crud.update_form_field(session, data, field_id)
-    field = await crud.get_form_field(session, field_id)
+    field = await crud.update_form_field(session, data, field_id, current_user.id)
+    await invalidate_form(redis_pool, field.form_id)
     return field
 
 
@@ -205,12 +380,8 @@ async def delete_form_field(
     field_id: int,
     current_user: User = Depends(get_current_active_manager),
     session: AsyncSession = Depends(get_db_session),
+    redis_pool: ConnectionPool = Depends(get_redis_pool),
 ):
-    field = await crud.get_form_field(session, field_id)
-    if field.form.user_id != current_user.id:
-        raise HTTPException(
-            status_code=401,
-            detail="You are not allowed to access this form",
-        )
-    await crud.delete_form_field(session, field_id)
-    return {"detail": "deleted"}
+    field = await crud.delete_form_field(session, field_id, current_user.id)
+    await invalidate_form(redis_pool, field.form_id)
+    return field
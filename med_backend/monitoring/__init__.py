@@ -0,0 +1,5 @@
+"""API for runtime stats of the worker"""
+
+from med_backend.monitoring.views import router
+
+__all__ = ["router"]
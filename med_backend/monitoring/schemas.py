@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+
+
+class PoolStats(BaseModel):
+    pid: int
+    workers_count: int
+    size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    max_overflow: int
+
+
+class HashingStats(BaseModel):
+    pid: int
+    running: int
+    waiting: int
+    max_concurrency: int
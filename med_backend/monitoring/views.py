@@ -0,0 +1,35 @@
+import os
+
+from fastapi import APIRouter, Depends, Request
+
+from med_backend.auth.schemas import User
+from med_backend.monitoring.schemas import HashingStats, PoolStats
+from med_backend.services.hashing.pool import get_password_hasher
+from med_backend.settings import settings
+from med_backend.users.services import get_current_active_manager
+
+router = APIRouter()
+
+
+@router.get("/pool", response_model=PoolStats)
+async def get_pool_stats(
+    request: Request,
+    current_user: User = Depends(get_current_active_manager),
+) -> PoolStats:
+    pool = request.app.state.db_engine.sync_engine.pool
+    return PoolStats(
+        pid=os.getpid(),
+        workers_count=settings.workers_count,
+        size=pool.size(),
+        checked_in=pool.checkedin(),
+        checked_out=pool.checkedout(),
+        overflow=max(pool.overflow(), 0),
+        max_overflow=settings.db_max_overflow,
+    )
+
+
+@router.get("/hashing", response_model=HashingStats)
+async def get_hashing_stats(
+    current_user: User = Depends(get_current_active_manager),
+) -> HashingStats:
+    return HashingStats(pid=os.getpid(), **get_password_hasher().stats())
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional, Tuple
 
 from fastapi import HTTPException
 from sqlalchemy import select
@@ -6,20 +6,17 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from med_backend.db.models.posts import PostScheme
+from med_backend.db.pagination import paginate
 from med_backend.posts.schemas import PostCreate
 from med_backend.users.crud import get_user
 
 
 async def get_posts(
     session: AsyncSession,
-    skip: int = 0,
+    cursor: Optional[str] = None,
     limit: int = 100,
-) -> List[PostScheme] | None:
-    r = await session.execute(
-        select(PostScheme).offset(skip).limit(limit),
-    )
-    posts = r.scalars().all()
-    return posts
+) -> Tuple[List[PostScheme], Optional[str]]:
+    return await paginate(session, select(PostScheme), PostScheme.id, cursor, limit)
 
 
 async def get_post(session: AsyncSession, post_id: int) -> PostScheme | None:
@@ -0,0 +1,27 @@
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from med_backend.posts.crud import get_post
+from med_backend.posts.schemas import Post
+from med_backend.services.singleflight.group import flights
+
+
+async def get_post_body(session: AsyncSession, post_id: int) -> bytes:
+    """
+    Get serialized post, sharing the query with concurrent requests for it.
+
+    The post is shared already serialized, so requests
+    don't hold objects of another request's session.
+
+    :param session: database session.
+    :param post_id: id of the post.
+    :return: JSON of the post with its author.
+    """
+
+    async def load() -> bytes:  # noqa: WPS430
+        post = await get_post(session, post_id)
+        if not post:
+            raise HTTPException(status_code=404, detail="Post doesn't exist")
+        return Post.from_orm(post).json().encode("utf-8")
+
+    return await flights.do(("post", post_id), load)
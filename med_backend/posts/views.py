@@ -1,24 +1,25 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from med_backend.auth.schemas import User
 from med_backend.auth.services import get_current_active_user
 from med_backend.db.dependencies import get_db_session
-from med_backend.posts import crud
+from med_backend.db.pagination import MAX_PAGE_SIZE, Page
+from med_backend.posts import crud, services
 from med_backend.posts.schemas import Post, PostCreate, PostList
 
 router = APIRouter()
 
 
-@router.get("/all", response_model=list[PostList])
+@router.get("/all", response_model=Page[PostList])
 async def get_all_posts(
-    skip: int = 0,
-    limit: int = 100,
+    cursor: str | None = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
     current_user: User = Depends(get_current_active_user),
     session: AsyncSession = Depends(get_db_session),
 ):
-    posts = await crud.get_posts(session, skip, limit)
-    return posts
+    posts, next_cursor = await crud.get_posts(session, cursor, limit)
+    return {"items": posts, "next_cursor": next_cursor}
 
 
 @router.get("/{post_id}", response_model=Post)
@@ -27,8 +28,9 @@ async def get_post(
     current_user: User = Depends(get_current_active_user),
     session: AsyncSession = Depends(get_db_session),
 ):
-    form = await crud.get_post(session, post_id)
-    return form
+    body = await services.get_post_body(session, post_id)
+    # the body is already serialized, response_model is only used for docs
+    return Response(body, media_type="application/json")
 
 
 @router.post("/create", response_model=Post)
@@ -0,0 +1,128 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from passlib.context import CryptContext
+
+from med_backend.settings import HashExecutor, settings
+
+ReturnType = TypeVar("ReturnType")
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.password_hash_rounds,
+)
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt outside of the event loop.
+
+    Every call is executed in a thread or process pool, so a burst
+    of logins doesn't block other requests of the worker.
+    At most `max_concurrency` calls are submitted to the pool at once,
+    the rest wait in the queue, which depth is exposed in `stats`.
+    """
+
+    def __init__(self, executor: Executor, max_concurrency: int) -> None:
+        self._executor = executor
+        self._max_concurrency = max_concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.waiting = 0
+        self.running = 0
+
+    async def hash(self, password: str) -> str:
+        """
+        Hash the password.
+
+        :param password: plain password.
+        :return: bcrypt hash.
+        """
+        return await self._run(_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """
+        Check the password against the hash.
+
+        :param plain_password: plain password.
+        :param hashed_password: bcrypt hash.
+        :return: whether the password matches.
+        """
+        return await self._run(_verify, plain_password, hashed_password)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Current load of the hasher.
+
+        :return: number of running and queued calls.
+        """
+        return {
+            "running": self.running,
+            "waiting": self.waiting,
+            "max_concurrency": self._max_concurrency,
+        }
+
+    def shutdown(self) -> None:
+        """Stop the pool."""
+        self._executor.shutdown(wait=False)
+
+    async def _run(self, func: Callable[..., ReturnType], *args: Any) -> ReturnType:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            self.running -= 1
+            self._semaphore.release()
+
+
+_hasher: Optional[PasswordHasher] = None
+
+
+def get_password_hasher() -> PasswordHasher:
+    """
+    Get hasher of the current process.
+
+    The pool is created on the first call.
+
+    :return: password hasher.
+    """
+    global _hasher  # noqa: WPS420
+    if _hasher is None:
+        executor: Executor
+        if settings.password_hash_executor == HashExecutor.PROCESS:
+            executor = ProcessPoolExecutor(settings.password_hash_workers)
+        else:
+            executor = ThreadPoolExecutor(
+                settings.password_hash_workers,
+                thread_name_prefix="password_hash",
+            )
+        _hasher = PasswordHasher(  # noqa: WPS442
+            executor,
+            settings.password_hash_max_concurrency,
+        )
+    return _hasher
+
+
+def shutdown_password_hasher() -> None:
+    """Stop the pool of the current process."""
+    global _hasher  # noqa: WPS420
+    if _hasher is not None:
+        _hasher.shutdown()
+        _hasher = None  # noqa: WPS442
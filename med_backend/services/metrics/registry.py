@@ -0,0 +1,111 @@
+import os
+from typing import Tuple
+
+from fastapi import FastAPI
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+from med_backend.services.hashing.pool import get_password_hasher
+
+REQUESTS = Counter(
+    "http_requests_total",
+    "Number of handled requests.",
+    ["method", "route", "status"],
+)
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Latency of requests.",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "Number of requests being handled.",
+    ["method", "route"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "db_pool_connections",
+    "Connections of the database pool.",
+    ["state"],
+    multiprocess_mode="livesum",
+)
+REDIS_POOL_CONNECTIONS = Gauge(
+    "redis_pool_connections",
+    "Connections of the redis pool.",
+    ["state"],
+    multiprocess_mode="livesum",
+)
+SINGLEFLIGHT_CALLS = Counter(
+    "singleflight_calls_total",
+    "Coalesced reads by role: leader ran the query, shared joined one "
+    "in flight, locked waited for another worker.",
+    ["role"],
+)
+PASSWORD_HASH_CALLS = Gauge(
+    "password_hash_calls",
+    "Password hashing calls running in the pool or waiting for it.",
+    ["state"],
+    multiprocess_mode="livesum",
+)
+
+
+def is_multiprocess() -> bool:
+    """
+    Whether metrics are shared between worker processes.
+
+    :return: True if the multiprocess directory is configured.
+    """
+    return "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+
+def update_pool_gauges(app: FastAPI) -> None:
+    """
+    Store current usage of the pools of this worker.
+
+    :param app: current application.
+    """
+    engine = getattr(app.state, "db_engine", None)
+    if engine is not None:
+        pool = engine.sync_engine.pool
+        DB_POOL_CONNECTIONS.labels("size").set(pool.size())
+        DB_POOL_CONNECTIONS.labels("checked_out").set(pool.checkedout())
+        DB_POOL_CONNECTIONS.labels("overflow").set(max(pool.overflow(), 0))
+
+    redis_pool = getattr(app.state, "redis_pool", None)
+    if redis_pool is not None:
+        in_use = len(getattr(redis_pool, "_in_use_connections", ()))
+        available = len(getattr(redis_pool, "_available_connections", ()))
+        REDIS_POOL_CONNECTIONS.labels("in_use").set(in_use)
+        REDIS_POOL_CONNECTIONS.labels("available").set(available)
+
+    hashing = get_password_hasher().stats()
+    PASSWORD_HASH_CALLS.labels("running").set(hashing["running"])
+    PASSWORD_HASH_CALLS.labels("waiting").set(hashing["waiting"])
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """
+    Render metrics of all workers in prometheus text format.
+
+    :return: body and its content type.
+    """
+    if is_multiprocess():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead() -> None:
+    """Remove live gauges of the current worker."""
+    if is_multiprocess():
+        multiprocess.mark_process_dead(os.getpid())
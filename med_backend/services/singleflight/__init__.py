@@ -0,0 +1 @@
+"""Request coalescing service."""
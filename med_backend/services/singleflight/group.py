@@ -0,0 +1,191 @@
+import asyncio
+import os
+import socket
+import time
+from typing import Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from med_backend.services.metrics.registry import SINGLEFLIGHT_CALLS
+from med_backend.settings import settings
+
+ReturnType = TypeVar("ReturnType")
+
+# seconds between checks of the cache, while another worker fills it
+POLL_INTERVAL = 0.02
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls of the current process.
+
+    The first caller of a key runs the function, callers arriving
+    while it's in flight wait for its result instead of running it
+    again. Nothing is kept after the call finishes, so keys must
+    identify the state they read, e.g. include the form version,
+    to never return data older than the request.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, "asyncio.Future[object]"] = {}
+
+    async def do(
+        self,
+        key: Hashable,
+        func: Callable[[], Awaitable[ReturnType]],
+    ) -> ReturnType:
+        """
+        Run the function or join the call in flight.
+
+        The function runs in the task of the first caller, so it may use
+        the caller's database session. If that caller is cancelled,
+        waiting callers run the function on their own.
+
+        :param key: key of the call.
+        :param func: coroutine function to run.
+        :return: result of the function.
+        """
+        while True:  # noqa: WPS457
+            call = self._calls.get(key)
+            if call is None:
+                return await self._lead(key, func)
+            SINGLEFLIGHT_CALLS.labels("shared").inc()
+            try:
+                return await asyncio.shield(call)  # type: ignore
+            except asyncio.CancelledError:
+                if not call.cancelled():
+                    raise
+
+    def in_flight(self) -> int:
+        """
+        Number of calls in flight.
+
+        :return: number of keys being loaded.
+        """
+        return len(self._calls)
+
+    async def _lead(
+        self,
+        key: Hashable,
+        func: Callable[[], Awaitable[ReturnType]],
+    ) -> ReturnType:
+        SINGLEFLIGHT_CALLS.labels("leader").inc()
+        call: "asyncio.Future[object]" = asyncio.get_running_loop().create_future()
+        self._calls[key] = call
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            call.cancel()
+            raise
+        except BaseException as exc:
+            call.set_exception(exc)
+            # the exception is raised by the leader, waiters may not exist
+            call.exception()
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            del self._calls[key]  # noqa: WPS420
+
+
+async def _load_locked(
+    redis: Redis,
+    lock_key: str,
+    token: str,
+    load: Callable[[], Awaitable[ReturnType]],
+) -> ReturnType:
+    """
+    Load the value holding the lock and release the lock after it.
+
+    The lock is deleted only if it's still held by this worker.
+
+    :param redis: redis connection.
+    :param lock_key: key of the lock.
+    :param token: unique name of the lock holder.
+    :param load: coroutine function loading the value and caching it.
+    :return: the value.
+    """
+    try:
+        return await load()
+    finally:
+        try:
+            if await redis.get(lock_key) == token.encode():
+                await redis.delete(lock_key)
+        except RedisError:
+            pass  # noqa: WPS420
+
+
+async def _wait_for_value(
+    redis: Redis,
+    lock_key: str,
+    read: Callable[[], Awaitable[Optional[ReturnType]]],
+) -> Optional[ReturnType]:
+    """
+    Poll the cache while another worker holds the lock.
+
+    :param redis: redis connection.
+    :param lock_key: key of the lock.
+    :param read: coroutine function reading the cache.
+    :return: cached value or None if it didn't appear.
+    """
+    deadline = time.monotonic() + settings.singleflight_lock_wait
+    try:
+        while time.monotonic() < deadline:
+            await asyncio.sleep(POLL_INTERVAL)
+            cached = await read()
+            if cached is not None:
+                return cached
+            if not await redis.exists(lock_key):
+                return None
+    except RedisError:
+        return None
+    return None
+
+
+async def fill_once(
+    redis: Redis,
+    key: str,
+    read: Callable[[], Awaitable[Optional[ReturnType]]],
+    load: Callable[[], Awaitable[ReturnType]],
+) -> ReturnType:
+    """
+    Fill a missing cache entry from one worker at a time.
+
+    The worker taking the redis lock of the key loads the value
+    and puts it to the cache, other workers poll the cache until
+    the value appears. If the lock is released or expires
+    without a value or `singleflight_lock_wait` seconds pass,
+    they load it on their own. Errors of redis are treated
+    the same way, so the cache keeps working without the lock.
+
+    :param redis: redis connection.
+    :param key: key of the cache entry.
+    :param read: coroutine function reading the cache.
+    :param load: coroutine function loading the value and caching it.
+    :return: the value.
+    """
+    lock_key = f"lock:{key}"
+    token = f"{socket.gethostname()}:{os.getpid()}:{id(asyncio.current_task())}"
+    try:
+        locked = await redis.set(
+            lock_key,
+            token,
+            nx=True,
+            px=settings.singleflight_lock_ms,
+        )
+    except RedisError:
+        return await load()
+    if locked:
+        return await _load_locked(redis, lock_key, token, load)
+
+    SINGLEFLIGHT_CALLS.labels("locked").inc()
+    cached = await _wait_for_value(redis, lock_key, read)
+    if cached is not None:
+        return cached
+    return await load()
+
+
+# calls in flight of the current process
+flights = SingleFlight()
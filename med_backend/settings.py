@@ -20,6 +20,13 @@ class LogLevel(str, enum.Enum):  # noqa: WPS600
     FATAL = "FATAL"
 
 
+class HashExecutor(str, enum.Enum):  # noqa: WPS600
+    """Pools to run password hashing in."""
+
+    THREAD = "thread"
+    PROCESS = "process"
+
+
 class Settings(BaseSettings):
     """
     Application settings.
@@ -37,11 +44,21 @@ class Settings(BaseSettings):
     JWT_ALGORITHM: str = "HS256"
     # TODO: FIX FOR PROD
     JWT_EAT: int = 60 * 24 * 10
+    # bcrypt cost factor, every increment doubles hashing time
+    password_hash_rounds: int = 12
+    # Pool to run bcrypt in and number of its workers
+    password_hash_executor: HashExecutor = HashExecutor.THREAD
+    password_hash_workers: int = 2
+    # Hashing calls running at once, the rest wait in a queue
+    password_hash_max_concurrency: int = 2
     # Current environment
     environment: str = "dev"
 
     log_level: LogLevel = LogLevel.INFO
 
+    # Directory for metrics shared between workers
+    prometheus_dir: Path = TEMP_DIR / "prom"
+
     # Variables for the database
     db_host: str = "127.0.0.1"
     db_port: int = 5432
@@ -49,6 +66,22 @@ class Settings(BaseSettings):
     db_pass: str = "postgres"
     db_base: str = "med_backend"
     db_echo: bool = False
+    # Connections kept open by every worker and extra ones opened under load
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    # Seconds to wait for a free connection
+    db_pool_timeout: float = 30
+    # Seconds after which connections are reopened, -1 to keep them forever
+    db_pool_recycle: int = -1
+    # Check connections with a ping before using them
+    db_pool_pre_ping: bool = False
+    # Size of the asyncpg cache of prepared statements on the server
+    db_statement_cache_size: int = 100
+    # Size of the sqlalchemy cache of asyncpg prepared statements
+    db_prepared_statement_cache_size: int = 100
+    # Requests with more statements or taking longer are logged
+    db_query_count_budget: int = 20
+    request_time_budget_ms: float = 500
 
     # Variables for Redis
     redis_host: str = "med_backend-redis"
@@ -56,6 +89,43 @@ class Settings(BaseSettings):
     redis_user: Optional[str] = None
     redis_pass: Optional[str] = None
     redis_base: Optional[int] = None
+    # Seconds to keep authenticated users in redis
+    user_cache_ttl: int = 60
+    # Forms kept in memory of every worker and seconds to keep them in redis
+    form_cache_size: int = 256
+    form_cache_ttl: int = 60 * 60
+    # Seconds to keep form versions in redis, longer than cached forms
+    form_version_ttl: int = 24 * 60 * 60
+    # Seconds to keep results of requests with an Idempotency-Key
+    idempotency_ttl: int = 24 * 60 * 60
+    # Seconds a request with an Idempotency-Key may stay in progress
+    idempotency_pending_ttl: int = 30
+    # Seconds a retry waits for the request with the same key to finish
+    idempotency_wait: float = 10
+    # Queue submissions to a redis stream written by `python -m med_backend worker`
+    ingest_stream: bool = False
+    # Queued submissions, after which new ones are rejected with 503
+    ingest_max_backlog: int = 100000
+    # Seconds clients are asked to wait when the backlog is full
+    ingest_retry_after: int = 5
+    # Submissions written per transaction by the worker
+    ingest_batch_size: int = 500
+    # Seconds between polls of the empty stream
+    ingest_poll_interval: float = 0.5
+    # Milliseconds before another worker takes over the stream
+    ingest_lease_ms: int = 30000
+    # Fill missing cache entries from one worker at a time with a redis lock
+    singleflight_lock: bool = False
+    # Milliseconds the lock is held at most
+    singleflight_lock_ms: int = 5000
+    # Seconds other workers wait for the entry before loading it themselves
+    singleflight_lock_wait: float = 2
+    # Answers updated per transaction by backfill commands
+    backfill_batch_size: int = 10000
+    # Monthly partitions of submissions created ahead of time
+    partition_months_ahead: int = 3
+    # Months of submissions kept attached, older partitions are detached
+    partition_retention_months: Optional[int] = None
 
     @property
     def db_url(self) -> URL:
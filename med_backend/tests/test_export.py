@@ -0,0 +1,46 @@
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from med_backend.tests.utils import create_form, create_user
+
+
+@pytest.mark.anyio
+async def test_export_missing_form(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+) -> None:
+    """Checks that exporting a missing form answers 404."""
+    _, manager = await create_user(client, dbsession, "manager@test.com", True)
+
+    response = await client.get("/api/forms/100500/export", headers=manager)
+
+    assert response.status_code == 404
+
+
+@pytest.mark.anyio
+async def test_export_csv(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+) -> None:
+    """Checks that submissions are exported as CSV rows."""
+    _, manager = await create_user(client, dbsession, "manager@test.com", True)
+    _, patient = await create_user(client, dbsession, "patient@test.com")
+    form_id, field_ids = await create_form(client, manager, questions=2)
+    await client.post(
+        f"/api/forms/{form_id}/submit",
+        json=[{"field_id": field_id, "answer": "5"} for field_id in field_ids],
+        headers=patient,
+    )
+
+    response = await client.get(
+        f"/api/forms/{form_id}/export?format=csv",
+        headers=manager,
+    )
+
+    assert response.status_code == 200
+    # header and a row per answer
+    assert len(response.text.strip().splitlines()) == 3
@@ -0,0 +1,75 @@
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from redis.asyncio import ConnectionPool, Redis
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from med_backend.forms import cache
+from med_backend.services.redis.dependency import get_redis_pool
+from med_backend.settings import settings
+from med_backend.tests.utils import create_form, create_user
+
+
+@pytest.mark.anyio
+async def test_versions_dont_repeat_after_flush(
+    fake_redis_pool: ConnectionPool,
+) -> None:
+    """Checks that a version bumped after redis lost its data is a new one."""
+    async with Redis(connection_pool=fake_redis_pool) as redis:
+        await cache.invalidate_form(fake_redis_pool, 1)
+        used = await cache.get_version(redis, 1)
+        await redis.flushall()
+        await cache.invalidate_form(fake_redis_pool, 1)
+        assert await cache.get_version(redis, 1) > used
+
+
+@pytest.mark.anyio
+async def test_form_without_redis(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+) -> None:
+    """Checks that the form is served from the database while redis is down."""
+    _, manager = await create_user(client, dbsession, "manager@test.com", True)
+    form_id, _ = await create_form(client, manager)
+
+    broken_pool = ConnectionPool(host="127.0.0.1", port=1)
+    fastapi_app.dependency_overrides[get_redis_pool] = lambda: broken_pool
+    response = await client.get(f"/api/forms/{form_id}", headers=manager)
+
+    assert response.status_code == 200, response.text
+    assert response.json()["id"] == form_id
+    assert "ETag" not in response.headers
+
+
+@pytest.mark.anyio
+async def test_seeded_version_expires(fake_redis_pool: ConnectionPool) -> None:
+    """Checks that versions of probed forms don't stay in redis forever."""
+    async with Redis(connection_pool=fake_redis_pool) as redis:
+        await cache.get_version(redis, 100500)
+        ttl = await redis.ttl("form:100500:version")
+
+    assert settings.form_cache_ttl < ttl <= settings.form_version_ttl
+
+
+@pytest.mark.anyio
+async def test_update_without_redis(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+) -> None:
+    """Checks that the form is updated while redis is down."""
+    _, manager = await create_user(client, dbsession, "manager@test.com", True)
+    form_id, _ = await create_form(client, manager)
+
+    broken_pool = ConnectionPool(host="127.0.0.1", port=1)
+    fastapi_app.dependency_overrides[get_redis_pool] = lambda: broken_pool
+    response = await client.put(
+        f"/api/forms/{form_id}",
+        json={"name": "Renamed"},
+        headers=manager,
+    )
+
+    assert response.status_code == 200, response.text
+    response = await client.get(f"/api/forms/{form_id}", headers=manager)
+    assert response.json()["name"] == "Renamed"
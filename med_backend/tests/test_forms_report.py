@@ -0,0 +1,59 @@
+from typing import Dict, List
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from med_backend.db.instrumentation import collect_query_stats
+from med_backend.tests.utils import create_form, create_user
+
+
+async def _submit(
+    client: AsyncClient,
+    headers: Dict[str, str],
+    form_id: int,
+    field_ids: List[int],
+) -> None:
+    response = await client.post(
+        f"/api/forms/{form_id}/submit",
+        json=[{"field_id": field_id, "answer": "5"} for field_id in field_ids],
+        headers=headers,
+    )
+    assert response.status_code == 200, response.text
+
+
+async def _report_queries(
+    client: AsyncClient,
+    headers: Dict[str, str],
+    form_id: int,
+) -> int:
+    with collect_query_stats() as stats:
+        response = await client.get(f"/api/forms/{form_id}/answers", headers=headers)
+    assert response.status_code == 200, response.text
+    return stats.count
+
+
+@pytest.mark.anyio
+async def test_report_queries_dont_grow(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+) -> None:
+    """Checks that the answers report costs the same at 1 and N submissions."""
+    _, manager = await create_user(client, dbsession, "manager@test.com", True)
+    form_id, field_ids = await create_form(client, manager)
+    _, patient = await create_user(client, dbsession, "patient0@test.com")
+    await _submit(client, patient, form_id, field_ids)
+    # the first request caches the manager
+    await _report_queries(client, manager, form_id)
+    single = await _report_queries(client, manager, form_id)
+
+    for number in range(1, 4):
+        _, patient = await create_user(client, dbsession, f"patient{number}@test.com")
+        for _ in range(3):
+            await _submit(client, patient, form_id, field_ids)
+    response = await client.get(f"/api/forms/{form_id}/answers", headers=manager)
+    assert len(response.json()) == 10
+
+    assert await _report_queries(client, manager, form_id) == single
@@ -0,0 +1,74 @@
+from typing import Any, Dict
+
+import pytest
+from fastapi import HTTPException
+from redis.asyncio import ConnectionPool
+
+from med_backend.forms.idempotency import run_once
+
+
+@pytest.mark.anyio
+async def test_replay(fake_redis_pool: ConnectionPool) -> None:
+    """Checks that a retry gets the stored result without running the action."""
+    calls = []
+
+    async def action() -> Dict[str, Any]:  # noqa: WPS430
+        calls.append(1)
+        return {"id": len(calls)}
+
+    first = await run_once(fake_redis_pool, "scope", "key", [1], action)
+    retry = await run_once(fake_redis_pool, "scope", "key", [1], action)
+
+    assert first == ({"id": 1}, False)
+    assert retry == ({"id": 1}, True)
+    assert len(calls) == 1
+
+
+@pytest.mark.anyio
+async def test_replay_of_none(fake_redis_pool: ConnectionPool) -> None:
+    """Checks that an empty result is replayed like any other."""
+    calls = []
+
+    async def action() -> None:  # noqa: WPS430
+        calls.append(1)
+
+    await run_once(fake_redis_pool, "scope", "key", [1], action)
+    retry = await run_once(fake_redis_pool, "scope", "key", [1], action)
+
+    assert retry == (None, True)
+    assert len(calls) == 1
+
+
+@pytest.mark.anyio
+async def test_key_reused_with_another_payload(
+    fake_redis_pool: ConnectionPool,
+) -> None:
+    """Checks that a key can't be reused for another request."""
+
+    async def action() -> Dict[str, Any]:  # noqa: WPS430
+        return {"id": 1}
+
+    await run_once(fake_redis_pool, "scope", "key", [1], action)
+
+    with pytest.raises(HTTPException) as error:
+        await run_once(fake_redis_pool, "scope", "key", [2], action)
+    assert error.value.status_code == 422
+
+
+@pytest.mark.anyio
+async def test_failed_action_releases_key(fake_redis_pool: ConnectionPool) -> None:
+    """Checks that a request can be retried after its action failed."""
+
+    async def failing() -> Dict[str, Any]:  # noqa: WPS430
+        raise ValueError()
+
+    async def action() -> Dict[str, Any]:  # noqa: WPS430
+        return {"id": 1}
+
+    with pytest.raises(ValueError):
+        await run_once(fake_redis_pool, "scope", "key", [1], failing)
+
+    assert await run_once(fake_redis_pool, "scope", "key", [1], action) == (
+        {"id": 1},
+        False,
+    )
@@ -0,0 +1,138 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+import pytest
+from sqlalchemy import bindparam, desc, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+from med_backend.db.models.forms import FormAssignment, FormScheme, UserFormSubmission
+from med_backend.db.models.users import UserScheme
+from med_backend.forms.crud import submission_report_query
+from med_backend.users.schemas import FormResult
+
+
+async def _explain(session: AsyncSession, query: Select) -> str:
+    """
+    Plan the query with sequential scans disabled.
+
+    Without a usable index the planner still falls back to a sequential scan,
+    so its presence in the plan means an index is missing.
+
+    :param session: database session.
+    :param query: query to plan.
+    :return: text of the plan.
+    """
+    compiled = query.compile(dialect=postgresql.dialect(paramstyle="named"))
+    await session.execute(text("SET LOCAL enable_seqscan = off"))
+    r = await session.execute(
+        text(f"EXPLAIN {compiled}").bindparams(
+            *[
+                bindparam(name, compiled.params[name], type_=bind.type)
+                for bind, name in compiled.bind_names.items()
+            ],
+        ),
+    )
+    return "\n".join(r.scalars().all())
+
+
+async def _partition_indexes(session: AsyncSession, table: str) -> Dict[str, List[str]]:
+    """
+    Get definitions of indexes of every partition of the table.
+
+    :param session: database session.
+    :param table: partitioned table.
+    :return: index definitions by partition name.
+    """
+    r = await session.execute(
+        text(
+            "SELECT partition.relname, pg_get_indexdef(pg_index.indexrelid) "
+            "FROM pg_inherits "
+            "JOIN pg_class partition ON partition.oid = pg_inherits.inhrelid "
+            "LEFT JOIN pg_index ON pg_index.indrelid = partition.oid "
+            "WHERE pg_inherits.inhparent = CAST(:table AS regclass)",
+        ),
+        {"table": table},
+    )
+    indexes: Dict[str, List[str]] = {}
+    for partition, definition in r.all():
+        indexes.setdefault(partition, []).append(definition or "")
+    return indexes
+
+
+@pytest.mark.anyio
+async def test_submissions_by_form_and_time(dbsession: AsyncSession) -> None:
+    """Checks that the report reads submissions of the form by index."""
+    until = datetime.now(timezone.utc)
+    plan = await _explain(
+        dbsession,
+        submission_report_query(1, until - timedelta(days=30), until),
+    )
+    assert "Seq Scan" not in plan, plan
+    assert "Index Cond: (form_id = 1)" in plan, plan
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    "table,columns",
+    [
+        ("user_form_submission", "(form_id)"),
+        ("user_form_submission", "(user_id, form_id, created_at)"),
+        ("user_form_field_submission", "(submission_id)"),
+    ],
+)
+async def test_partitions_indexed(
+    dbsession: AsyncSession,
+    table: str,
+    columns: str,
+) -> None:
+    """Checks that every partition created by migrations has the index."""
+    indexes = await _partition_indexes(dbsession, table)
+
+    assert indexes
+    for partition, definitions in indexes.items():
+        assert any(
+            definition.endswith(f"USING btree {columns}") for definition in definitions
+        ), partition
+
+
+@pytest.mark.anyio
+async def test_assignments_by_user(dbsession: AsyncSession) -> None:
+    """Checks that forms assigned to the user are found by index."""
+    plan = await _explain(
+        dbsession,
+        select(FormScheme)
+        .join(FormAssignment, FormAssignment.form_id == FormScheme.id)
+        .where(FormAssignment.user_id == 1),
+    )
+    assert "Seq Scan" not in plan, plan
+    assert "ix_form_assignment_user_id" in plan, plan
+
+
+@pytest.mark.anyio
+async def test_latest_submission(dbsession: AsyncSession) -> None:
+    """Checks that the latest submission of the user is found by index."""
+    plan = await _explain(
+        dbsession,
+        select(UserFormSubmission)
+        .where(UserFormSubmission.user_id == 1, UserFormSubmission.form_id == 1)
+        .order_by(desc(UserFormSubmission.created_at))
+        .limit(1),
+    )
+    assert "Seq Scan" not in plan, plan
+    assert "Index Cond: ((user_id = 1) AND (form_id = 1))" in plan, plan
+
+
+@pytest.mark.anyio
+async def test_users_by_latest_result(dbsession: AsyncSession) -> None:
+    """Checks that users with abnormal results are found by index."""
+    plan = await _explain(
+        dbsession,
+        select(UserScheme)
+        .where(UserScheme.latest_form_result == FormResult.ABNORMAL)
+        .order_by(UserScheme.id)
+        .limit(100),
+    )
+    assert "Seq Scan" not in plan, plan
+    assert "ix_users_latest_form_result_id" in plan, plan
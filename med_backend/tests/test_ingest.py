@@ -0,0 +1,98 @@
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from redis.asyncio import ConnectionPool, Redis
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from med_backend.db.models.forms import UserFormSubmission
+from med_backend.forms import ingest
+from med_backend.forms.crud import create_ingested_submissions
+from med_backend.forms.schemas import FormAnswer
+from med_backend.tests.utils import create_form, create_user
+
+
+async def _count_submissions(session: AsyncSession) -> int:
+    r = await session.execute(select(func.count()).select_from(UserFormSubmission))
+    return r.scalar_one()
+
+
+@pytest.mark.anyio
+async def test_drain(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+    fake_redis_pool: ConnectionPool,
+) -> None:
+    """Checks that queued submissions are written and trimmed."""
+    _, manager = await create_user(client, dbsession, "manager@test.com", True)
+    user_id, _ = await create_user(client, dbsession, "user@test.com")
+    form_id, field_ids = await create_form(client, manager)
+    for answer in range(3):
+        await ingest.enqueue(
+            fake_redis_pool,
+            form_id,
+            user_id,
+            [FormAnswer(field_id=field_ids[0], answer=str(answer))],
+        )
+
+    async with Redis(connection_pool=fake_redis_pool) as redis:
+        assert await ingest.drain_batch(redis, dbsession) == 3
+        assert await ingest.drain_batch(redis, dbsession) == 0
+        assert await redis.xlen(ingest.STREAM_KEY) == 1
+
+    assert await _count_submissions(dbsession) == 3
+
+
+@pytest.mark.anyio
+async def test_redelivery_is_deduplicated(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+    fake_redis_pool: ConnectionPool,
+) -> None:
+    """Checks that a batch delivered again isn't written twice."""
+    _, manager = await create_user(client, dbsession, "manager@test.com", True)
+    user_id, _ = await create_user(client, dbsession, "user@test.com")
+    form_id, field_ids = await create_form(client, manager)
+    for answer in range(2):
+        await ingest.enqueue(
+            fake_redis_pool,
+            form_id,
+            user_id,
+            [FormAnswer(field_id=field_ids[0], answer=str(answer))],
+        )
+
+    async with Redis(connection_pool=fake_redis_pool) as redis:
+        submissions, _ = await ingest.read_batch(redis, 2)
+        # the worker failed after the commit, but before moving the cursor
+        assert await create_ingested_submissions(dbsession, submissions) == 2
+        assert await ingest.drain_batch(redis, dbsession) == 2
+
+    assert await _count_submissions(dbsession) == 2
+
+
+@pytest.mark.anyio
+async def test_poison_entry_is_dead_lettered(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+    fake_redis_pool: ConnectionPool,
+) -> None:
+    """Checks that a submission violating a constraint doesn't block the stream."""
+    _, manager = await create_user(client, dbsession, "manager@test.com", True)
+    user_id, _ = await create_user(client, dbsession, "user@test.com")
+    form_id, field_ids = await create_form(client, manager)
+    answers = [FormAnswer(field_id=field_ids[0], answer="5")]
+    await ingest.enqueue(fake_redis_pool, form_id, user_id, answers)
+    # user deleted after submitting
+    await ingest.enqueue(fake_redis_pool, form_id, user_id + 1000, answers)
+    await ingest.enqueue(fake_redis_pool, form_id, user_id, answers)
+
+    async with Redis(connection_pool=fake_redis_pool) as redis:
+        assert await ingest.drain_batch(redis, dbsession) == 3
+        assert await ingest.drain_batch(redis, dbsession) == 0
+        assert await redis.xlen(ingest.STREAM_KEY) == 1
+        assert await redis.xlen(ingest.DEAD_LETTER_KEY) == 1
+
+    assert await _count_submissions(dbsession) == 2
@@ -0,0 +1,52 @@
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from med_backend.db.loaders import clear_loaders, get_loader
+from med_backend.db.models.forms import FormQuestion
+from med_backend.tests.utils import create_form, create_user
+
+
+@pytest.mark.anyio
+async def test_loaders_by_relationships(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+) -> None:
+    """Checks that a loader without relationships doesn't serve one with them."""
+    _, manager = await create_user(client, dbsession, "manager@test.com", True)
+    form_id, field_ids = await create_form(client, manager, questions=1)
+    dbsession.expunge_all()
+
+    plain = get_loader(dbsession, FormQuestion)
+    assert await plain.load(field_ids[0])
+    with_form = get_loader(dbsession, FormQuestion, FormQuestion.form)
+
+    assert with_form is not plain
+    assert with_form is get_loader(dbsession, FormQuestion, FormQuestion.form)
+    field = await with_form.load(field_ids[0])
+    assert field is not None
+    assert field.form.id == form_id
+
+
+@pytest.mark.anyio
+async def test_clear_loaders(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+) -> None:
+    """Checks that clearing the model forgets rows of all its loaders."""
+    _, manager = await create_user(client, dbsession, "manager@test.com", True)
+    _, field_ids = await create_form(client, manager, questions=1)
+    loaders = [
+        get_loader(dbsession, FormQuestion),
+        get_loader(dbsession, FormQuestion, FormQuestion.form),
+    ]
+    for loader in loaders:
+        await loader.load(field_ids[0])
+
+    clear_loaders(dbsession, FormQuestion, field_ids[0])
+
+    for loader in loaders:
+        assert field_ids[0] not in loader._rows  # noqa: WPS437
@@ -0,0 +1,36 @@
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from med_backend.tests.utils import create_user
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("path", ["/api/monitoring/pool", "/api/monitoring/hashing"])
+async def test_stats_require_auth(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    path: str,
+) -> None:
+    """Checks that internal stats aren't served to anonymous users."""
+    response = await client.get(path)
+
+    assert response.status_code == 401
+
+
+@pytest.mark.anyio
+async def test_stats_require_manager(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+) -> None:
+    """Checks that internal stats are served to managers only."""
+    _, patient = await create_user(client, dbsession, "patient@test.com")
+    _, manager = await create_user(client, dbsession, "manager@test.com", True)
+
+    response = await client.get("/api/monitoring/hashing", headers=patient)
+    assert response.status_code == 401
+
+    response = await client.get("/api/monitoring/hashing", headers=manager)
+    assert response.status_code == 200
@@ -0,0 +1,45 @@
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from med_backend.tests.utils import create_form, create_user
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("limit", [0, -1, 1001])
+async def test_invalid_limit(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+    limit: int,
+) -> None:
+    """Checks that lists reject page sizes out of range."""
+    _, manager = await create_user(client, dbsession, "manager@test.com", True)
+
+    response = await client.get(f"/api/forms/all?limit={limit}", headers=manager)
+
+    assert response.status_code == 422
+
+
+@pytest.mark.anyio
+async def test_pages(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+) -> None:
+    """Checks that pages follow each other by the cursor."""
+    _, manager = await create_user(client, dbsession, "manager@test.com", True)
+    for _ in range(3):
+        await create_form(client, manager, questions=0)
+
+    first = await client.get("/api/forms/all?limit=2", headers=manager)
+    cursor = first.json()["next_cursor"]
+    second = await client.get(
+        f"/api/forms/all?limit=2&cursor={cursor}",
+        headers=manager,
+    )
+
+    assert len(first.json()["items"]) == 2
+    assert len(second.json()["items"]) == 1
+    assert second.json()["next_cursor"] is None
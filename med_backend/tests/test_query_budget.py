@@ -0,0 +1,112 @@
+from typing import Callable, ContextManager, Dict, List, Tuple
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from med_backend.db.instrumentation import QueryStats
+from med_backend.tests.utils import create_form, create_user
+
+AssertMaxQueries = Callable[[int], ContextManager[QueryStats]]
+
+
+@pytest.fixture
+async def submitted_form(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+) -> Tuple[Dict[str, str], Dict[str, str], int, List[int]]:
+    """
+    Create a form with a submission of a patient.
+
+    Both users are fetched once, so they are cached
+    and authentication doesn't touch the database.
+
+    :param fastapi_app: the application.
+    :param client: client of the app.
+    :param dbsession: database session.
+    :return: headers of the manager and the patient, form id and question ids.
+    """
+    _, manager = await create_user(client, dbsession, "manager@test.com", True)
+    _, patient = await create_user(client, dbsession, "patient@test.com")
+    form_id, field_ids = await create_form(client, manager)
+    await client.post(
+        f"/api/forms/{form_id}/submit",
+        json=[{"field_id": field_id, "answer": "5"} for field_id in field_ids],
+        headers=patient,
+    )
+    await client.get("/api/auth/me", headers=manager)
+    await client.get("/api/auth/me", headers=patient)
+    return manager, patient, form_id, field_ids
+
+
+@pytest.mark.anyio
+async def test_answers_budget(
+    client: AsyncClient,
+    submitted_form: Tuple[Dict[str, str], Dict[str, str], int, List[int]],
+    assert_max_queries: AssertMaxQueries,
+) -> None:
+    """Checks that the answers report reads the form and then all answers at once."""
+    manager, _, form_id, _ = submitted_form
+
+    with assert_max_queries(2):
+        response = await client.get(f"/api/forms/{form_id}/answers", headers=manager)
+
+    assert response.status_code == 200
+
+
+@pytest.mark.anyio
+async def test_form_budget(
+    client: AsyncClient,
+    submitted_form: Tuple[Dict[str, str], Dict[str, str], int, List[int]],
+    assert_max_queries: AssertMaxQueries,
+) -> None:
+    """Checks that the form is loaded with its questions and then served from cache."""
+    _, patient, form_id, _ = submitted_form
+
+    with assert_max_queries(2):
+        response = await client.get(f"/api/forms/{form_id}", headers=patient)
+    assert response.status_code == 200
+
+    with assert_max_queries(0):
+        response = await client.get(f"/api/forms/{form_id}", headers=patient)
+    assert response.status_code == 200
+
+
+@pytest.mark.anyio
+async def test_list_budget(
+    client: AsyncClient,
+    submitted_form: Tuple[Dict[str, str], Dict[str, str], int, List[int]],
+    assert_max_queries: AssertMaxQueries,
+) -> None:
+    """Checks that every list page is a single query."""
+    manager, patient, _, _ = submitted_form
+
+    with assert_max_queries(1):
+        response = await client.get("/api/forms/all", headers=manager)
+    assert response.status_code == 200
+
+    with assert_max_queries(1):
+        response = await client.get("/api/forms/list", headers=patient)
+    assert response.status_code == 200
+
+
+@pytest.mark.anyio
+async def test_submit_budget(
+    client: AsyncClient,
+    submitted_form: Tuple[Dict[str, str], Dict[str, str], int, List[int]],
+    assert_max_queries: AssertMaxQueries,
+) -> None:
+    """Checks that the number of submit queries doesn't depend on the answers."""
+    _, patient, form_id, field_ids = submitted_form
+
+    # 6 statements and the SAVEPOINT restart of the test session on commit
+    with assert_max_queries(8):
+        response = await client.post(
+            f"/api/forms/{form_id}/submit",
+            json=[{"field_id": field_id, "answer": "5"} for field_id in field_ids],
+            headers=patient,
+        )
+
+    assert response.status_code == 200
@@ -0,0 +1,54 @@
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from redis.asyncio import ConnectionPool, Redis
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from med_backend.services.redis.dependency import get_redis_pool
+from med_backend.tests.utils import create_user
+
+
+@pytest.mark.anyio
+async def test_password_hash_isnt_cached(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+    fake_redis_pool: ConnectionPool,
+) -> None:
+    """Checks that the cached user has no password hash."""
+    _, headers = await create_user(client, dbsession, "user@test.com")
+
+    response = await client.get("/api/auth/me", headers=headers)
+
+    assert response.status_code == 200
+    async with Redis(connection_pool=fake_redis_pool) as redis:
+        cached = await redis.get("user:user@test.com")
+    assert cached is not None
+    assert b"hashed_password" not in cached
+
+
+@pytest.mark.anyio
+async def test_update_without_redis(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+) -> None:
+    """Checks that the profile is updated while redis is down."""
+    _, headers = await create_user(client, dbsession, "user@test.com")
+
+    broken_pool = ConnectionPool(host="127.0.0.1", port=1)
+    fastapi_app.dependency_overrides[get_redis_pool] = lambda: broken_pool
+    response = await client.put(
+        "/api/auth/me",
+        json={
+            "email": "user@test.com",
+            "fullname": "New Name",
+            "disabled": False,
+            "is_manager": False,
+        },
+        headers=headers,
+    )
+
+    assert response.status_code == 200, response.text
+    response = await client.get("/api/auth/me", headers=headers)
+    assert response.json()["fullname"] == "New Name"
@@ -0,0 +1,81 @@
+from typing import Dict, List, Tuple
+
+from httpx import AsyncClient
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from med_backend.db.models.users import UserScheme
+
+
+async def create_user(
+    client: AsyncClient,
+    session: AsyncSession,
+    email: str,
+    is_manager: bool = False,
+) -> Tuple[int, Dict[str, str]]:
+    """
+    Sign up a user and log them in.
+
+    :param client: client of the app.
+    :param session: database session.
+    :param email: email of the user.
+    :param is_manager: whether the user is a manager.
+    :return: id of the user and authorization headers.
+    """
+    response = await client.post(
+        "/api/auth/signup",
+        json={
+            "email": email,
+            "password": "password",
+            "fullname": "Test User",
+            "gender": "m",
+            "born": "2000-01-01T00:00:00",
+        },
+    )
+    user_id = response.json()["id"]
+    if is_manager:
+        await session.execute(
+            update(UserScheme).where(UserScheme.id == user_id).values(is_manager=True),
+        )
+        await session.commit()
+    response = await client.post(
+        "/api/auth/token",
+        json={"email": email, "password": "password"},
+    )
+    token = response.json()["access_token"]
+    return user_id, {"Authorization": f"Bearer {token}"}
+
+
+async def create_form(
+    client: AsyncClient,
+    headers: Dict[str, str],
+    questions: int = 3,
+) -> Tuple[int, List[int]]:
+    """
+    Create a form with number questions.
+
+    :param client: client of the app.
+    :param headers: authorization headers of the manager.
+    :param questions: number of questions.
+    :return: id of the form and ids of its questions.
+    """
+    response = await client.post(
+        "/api/forms/create",
+        json={"name": "Form"},
+        headers=headers,
+    )
+    form_id = response.json()["id"]
+    field_ids = []
+    for number in range(questions):
+        response = await client.post(
+            f"/api/forms/{form_id}/fields",
+            json={
+                "type": "number",
+                "question": f"Question {number}",
+                "ref_min": 1,
+                "ref_max": 10,
+            },
+            headers=headers,
+        )
+        field_ids.append(response.json()["id"])
+    return form_id, field_ids
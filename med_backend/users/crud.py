@@ -1,72 +1,153 @@
-from typing import List
+from typing import List, Optional, Tuple
 
 from fastapi import HTTPException
 from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from med_backend.auth import schemas, services
 from med_backend.auth.schemas import UpdateUserProfile
+from med_backend.db.loaders import clear_loaders, get_loader
 from med_backend.db.models.users import UserScheme
+from med_backend.db.pagination import paginate
+from med_backend.db.returning import (
+    FOREIGN_KEY_VIOLATION,
+    UNIQUE_VIOLATION,
+    is_violation,
+    returning_one,
+)
+from med_backend.users.schemas import FormResult
 
 
 async def get_user_by_email(session: AsyncSession, email: str) -> schemas.User | None:
     r = await session.execute(select(UserScheme).where(UserScheme.email == email))
     user = r.scalars().first()
+    if user:
+        get_loader(session, UserScheme).prime(user)
     return user
 
 
 async def get_user(session: AsyncSession, pk: int) -> schemas.User | None:
-    r = await session.execute(select(UserScheme).where(UserScheme.id == pk))
-    user = r.scalars().first()
-    return user
+    return await get_loader(session, UserScheme).load(pk)
 
 
 async def get_users(
     session: AsyncSession,
-    skip: int = 0,
+    cursor: Optional[str] = None,
     limit: int = 100,
-) -> List[schemas.User] | None:
-    r = await session.execute(
-        select(UserScheme)
-        .where(UserScheme.is_manager == False)
-        .offset(skip)
-        .limit(limit),
+) -> Tuple[List[schemas.User], Optional[str]]:
+    return await paginate(
+        session,
+        select(UserScheme).where(UserScheme.is_manager.is_(False)),
+        UserScheme.id,
+        cursor,
+        limit,
     )
-    users = r.scalars().all()
-    return users
-
 
-async def create_user(session: AsyncSession, user: schemas.UserCreate) -> UserScheme:
-    if await get_user_by_email(session, user.email):
-        raise HTTPException(status_code=422, detail="Email already taken")
 
-    hashed_password = services.get_password_hash(user.password)
-    db_user = UserScheme(
-        email=user.email,
-        fullname=user.fullname,
-        gender=user.gender,
-        born=user.born.date(),
-        hashed_password=hashed_password,
-        disabled=False,
+async def get_abnormal_users(
+    session: AsyncSession,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+) -> Tuple[List[schemas.User], Optional[str]]:
+    return await paginate(
+        session,
+        select(UserScheme).where(
+            UserScheme.latest_form_result == FormResult.ABNORMAL,
+            UserScheme.is_manager.is_(False),
+        ),
+        UserScheme.id,
+        cursor,
+        limit,
     )
-    session.add(db_user)
-    await session.commit()
-    await session.refresh(db_user)
-    return db_user
 
 
-async def update_user(session: AsyncSession, user_id: int, data: UpdateUserProfile):
-    if await get_user_by_email(session, data.email):
-        raise HTTPException(status_code=422, detail="Email already taken")
-
-    await session.execute(
-        update(UserScheme).where(UserScheme.id == user_id).values(**dict(data)),
+async def create_user(session: AsyncSession, user: schemas.UserCreate) -> UserScheme:
+    hashed_password = await services.get_password_hash(user.password)
+    db_user = await returning_one(
+        session,
+        UserScheme,
+        pg_insert(UserScheme)
+        .values(
+            email=user.email,
+            fullname=user.fullname,
+            gender=user.gender,
+            born=user.born.date(),
+            hashed_password=hashed_password,
+            disabled=False,
+        )
+        .on_conflict_do_nothing(index_elements=[UserScheme.email]),
     )
+    if not db_user:
+        raise HTTPException(status_code=422, detail="Email already taken")
     await session.commit()
+    get_loader(session, UserScheme).prime(db_user)
+    return db_user
 
 
-async def delete_user(session: AsyncSession, user_id: int):
-    await session.execute(
-        delete(UserScheme).where(UserScheme.id == user_id),
+async def update_user(
+    session: AsyncSession,
+    user_id: int,
+    data: UpdateUserProfile,
+) -> Optional[Row]:
+    """
+    Update the user with one statement.
+
+    The email before the update is returned along with the user,
+    so cached users can be invalidated by it.
+    Uniqueness of the email is checked by its constraint.
+
+    :param session: database session.
+    :param user_id: id of the user.
+    :param data: new profile.
+    :return: updated user and its previous_email or None if it doesn't exist.
+    :raises HTTPException: if the email is taken by another user.
+    """
+    previous = (
+        select(UserScheme.id, UserScheme.email)
+        .where(UserScheme.id == user_id)
+        .with_for_update()
+        .subquery()
+    )
+    stmt = (
+        update(UserScheme)
+        .where(UserScheme.id == previous.c.id)
+        .values(**dict(data))
+        .returning(
+            *UserScheme.__table__.columns,
+            previous.c.email.label("previous_email"),
+        )
     )
+    try:
+        r = await session.execute(
+            select(UserScheme, previous.c.email.label("previous_email"))
+            .from_statement(stmt)
+            .execution_options(populate_existing=True),
+        )
+    except IntegrityError as error:
+        await session.rollback()
+        if is_violation(error, UNIQUE_VIOLATION):
+            raise HTTPException(status_code=422, detail="Email already taken")
+        raise
+    row = r.first()
     await session.commit()
+    return row
+
+
+async def delete_user(session: AsyncSession, user_id: int) -> Optional[UserScheme]:
+    try:
+        user = await returning_one(
+            session,
+            UserScheme,
+            delete(UserScheme).where(UserScheme.id == user_id),
+        )
+    except IntegrityError as error:
+        await session.rollback()
+        if is_violation(error, FOREIGN_KEY_VIOLATION):
+            raise HTTPException(status_code=422, detail="User is in use")
+        raise
+    await session.commit()
+    clear_loaders(session, UserScheme, user_id)
+    return user
@@ -1,9 +1,17 @@
+import enum
 from datetime import date, datetime
 
 from dateutil.relativedelta import relativedelta
 from pydantic import BaseModel, EmailStr, root_validator
 
 
+class FormResult(str, enum.Enum):  # noqa: WPS600
+    """Result of the latest submission of a patient."""
+
+    OK = "ok"
+    ABNORMAL = "abnormal"
+
+
 class ExtendedUser(BaseModel):
     id: int
     fullname: str
@@ -1,11 +1,13 @@
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
+from redis.asyncio import ConnectionPool
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
 from med_backend.auth import schemas, services
 from med_backend.db.dependencies import get_db_session
+from med_backend.services.redis.dependency import get_redis_pool
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
@@ -13,6 +15,7 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 async def get_current_active_manager(
     token: str = Depends(oauth2_scheme),
     session: AsyncSession = Depends(get_db_session),
+    redis_pool: ConnectionPool = Depends(get_redis_pool),
 ) -> schemas.User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -31,7 +34,7 @@ async def get_current_active_manager(
         token_data = schemas.TokenData(email=email)
     except JWTError:
         raise credentials_exception
-    user = await services.get_user(session, token_data.email)
+    user = await services.get_cached_user(session, redis_pool, token_data.email)
     if user is None:
         raise credentials_exception
     if not user.is_manager:
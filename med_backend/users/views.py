@@ -1,8 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from redis.asyncio import ConnectionPool
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from med_backend.auth.cache import invalidate_user
 from med_backend.auth.schemas import UpdateUserProfile, User
 from med_backend.db.dependencies import get_db_session
+from med_backend.db.pagination import MAX_PAGE_SIZE, Page
+from med_backend.services.redis.dependency import get_redis_pool
 from med_backend.users import crud
 from med_backend.users.schemas import FullUser, ListUser
 from med_backend.users.services import get_current_active_manager
@@ -10,15 +14,26 @@ from med_backend.users.services import get_current_active_manager
 router = APIRouter()
 
 
-@router.get("/list", response_model=list[ListUser])
+@router.get("/list", response_model=Page[ListUser])
 async def get_all_users(
-    skip: int = 0,
-    limit: int = 100,
+    cursor: str | None = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
     current_user: User = Depends(get_current_active_manager),
     session: AsyncSession = Depends(get_db_session),
 ):
-    users = await crud.get_users(session, skip, limit)
-    return users
+    users, next_cursor = await crud.get_users(session, cursor, limit)
+    return {"items": users, "next_cursor": next_cursor}
+
+
+@router.get("/abnormal", response_model=Page[ListUser])
+async def get_abnormal_users(
+    cursor: str | None = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    current_user: User = Depends(get_current_active_manager),
+    session: AsyncSession = Depends(get_db_session),
+):
+    users, next_cursor = await crud.get_abnormal_users(session, cursor, limit)
+    return {"items": users, "next_cursor": next_cursor}
 
 
 @router.get("/{key}", response_model=FullUser)
@@ -39,11 +54,13 @@ async def update_user(
     data: UpdateUserProfile,
     current_user: User = Depends(get_current_active_manager),
     session: AsyncSession = Depends(get_db_session),
+    redis_pool: ConnectionPool = Depends(get_redis_pool),
 ) -> User:
-    user = await crud.get_user(session, key)
-    if not user:
+    updated = await crud.update_user(session, key, data)
+    if not updated:
         raise HTTPException(status_code=404, detail="User not found")
-    await crud.update_user(session, key, data)
+    user, previous_email = updated
+    await invalidate_user(redis_pool, previous_email)
     return user
 
 
@@ -52,9 +69,10 @@ async def delete_user(
     key: int,
     current_user: User = Depends(get_current_active_manager),
     session: AsyncSession = Depends(get_db_session),
+    redis_pool: ConnectionPool = Depends(get_redis_pool),
 ):
-    user = await crud.get_user(session, key)
+    user = await crud.delete_user(session, key)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    await crud.delete_user(session, key)
+    await invalidate_user(redis_pool, user.email)
     return {"detail": "deleted"}
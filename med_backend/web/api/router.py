@@ -1,9 +1,10 @@
 from fastapi.routing import APIRouter
 
-from med_backend import auth, forms, posts, users
+from med_backend import auth, forms, monitoring, posts, users
 
 api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
 api_router.include_router(posts.router, prefix="/posts", tags=["posts"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(forms.router, prefix="/forms", tags=["forms"])
+api_router.include_router(monitoring.router, prefix="/monitoring", tags=["monitoring"])
@@ -1,11 +1,26 @@
 from importlib import metadata
 
 from fastapi import FastAPI
-from fastapi.responses import UJSONResponse
+from fastapi.responses import Response, UJSONResponse
 from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
 
+from med_backend.services.metrics.registry import render_metrics, update_pool_gauges
 from med_backend.web.api.router import api_router
 from med_backend.web.lifetime import register_shutdown_event, register_startup_event
+from med_backend.web.middleware import PrometheusMiddleware, QueryStatsMiddleware
+
+
+async def metrics(request: Request) -> Response:
+    """
+    Metrics of all workers in prometheus format.
+
+    :param request: current request.
+    :return: response with the metrics.
+    """
+    update_pool_gauges(request.app)
+    body, content_type = render_metrics()
+    return Response(body, media_type=content_type)
 
 
 def get_app() -> FastAPI:
@@ -32,12 +47,16 @@ def get_app() -> FastAPI:
 
     # Main router for the API.
     app.include_router(router=api_router, prefix="/api")
+    app.add_route("/metrics", metrics, include_in_schema=False)
 
+    app.add_middleware(QueryStatsMiddleware)
+    app.add_middleware(PrometheusMiddleware)
     app.add_middleware(
         CORSMiddleware,
         allow_origins=["*"],
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-DB-Query-Count", "Server-Timing"],
     )
     return app
@@ -9,8 +9,10 @@ from sqlalchemy.ext.asyncio import (
 )
 from sqlalchemy.orm import sessionmaker
 
-from med_backend.db.meta import meta
-from med_backend.db.models import load_all_models
+from med_backend.db.instrumentation import instrument_engine
+from med_backend.db.utils import check_schema_version
+from med_backend.services.hashing.pool import shutdown_password_hasher
+from med_backend.services.metrics.registry import mark_process_dead
 from med_backend.services.redis.lifetime import init_redis, shutdown_redis
 from med_backend.settings import settings
 
@@ -25,7 +27,20 @@ def _setup_db(app: FastAPI) -> None:  # pragma: no cover
 
     :param app: fastAPI application.
     """
-    engine = create_async_engine(str(settings.db_url), echo=settings.db_echo)
+    db_url = settings.db_url.update_query(
+        prepared_statement_cache_size=settings.db_prepared_statement_cache_size,
+    )
+    engine = create_async_engine(
+        str(db_url),
+        echo=settings.db_echo,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        connect_args={"statement_cache_size": settings.db_statement_cache_size},
+    )
+    instrument_engine(engine)
     session_factory = async_scoped_session(
         sessionmaker(
             engine,
@@ -38,15 +53,6 @@ def _setup_db(app: FastAPI) -> None:  # pragma: no cover
     app.state.db_session_factory = session_factory
 
 
-async def _create_tables() -> None:  # pragma: no cover
-    """Populates tables in the database."""
-    load_all_models()
-    engine = create_async_engine(str(settings.db_url))
-    async with engine.begin() as connection:
-        await connection.run_sync(meta.create_all)
-    await engine.dispose()
-
-
 def register_startup_event(
     app: FastAPI,
 ) -> Callable[[], Awaitable[None]]:  # pragma: no cover
@@ -63,7 +69,7 @@ def register_startup_event(
     @app.on_event("startup")
     async def _startup() -> None:  # noqa: WPS430
         _setup_db(app)
-        await _create_tables()
+        await check_schema_version(app.state.db_engine)
         init_redis(app)
         pass  # noqa: WPS420
 
@@ -85,6 +91,8 @@ def register_shutdown_event(
         await app.state.db_engine.dispose()
 
         await shutdown_redis(app)
+        shutdown_password_hasher()
+        mark_process_dead()
         pass  # noqa: WPS420
 
     return _shutdown
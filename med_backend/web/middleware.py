@@ -0,0 +1,114 @@
+import logging
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from med_backend.db.instrumentation import collect_query_stats
+from med_backend.services.metrics.registry import (
+    REQUEST_DURATION,
+    REQUESTS,
+    REQUESTS_IN_PROGRESS,
+    update_pool_gauges,
+)
+from med_backend.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStatsMiddleware:
+    """
+    Reports database usage of every request.
+
+    Number of statements and time spent in the database are sent
+    in `X-DB-Query-Count` and `Server-Timing` headers.
+    Requests exceeding `db_query_count_budget` or
+    `request_time_budget_ms` are logged.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        with collect_query_stats() as stats:
+
+            async def send_with_stats(message: Message) -> None:  # noqa: WPS430
+                if message["type"] == "http.response.start":
+                    headers = MutableHeaders(scope=message)
+                    headers.append("X-DB-Query-Count", str(stats.count))
+                    headers.append(
+                        "Server-Timing",
+                        f'db;dur={stats.duration_ms:.2f};desc="{stats.count} queries"',
+                    )
+                await send(message)
+
+            await self.app(scope, receive, send_with_stats)
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if (
+            stats.count > settings.db_query_count_budget
+            or elapsed_ms > settings.request_time_budget_ms
+        ):
+            logger.warning(
+                "%s %s took %.2f ms with %d queries (%.2f ms in the database)",
+                scope["method"],
+                scope["path"],
+                elapsed_ms,
+                stats.count,
+                stats.duration_ms,
+            )
+
+
+def _route_template(scope: Scope) -> str:
+    for route in scope["app"].routes:
+        match, _ = route.matches(scope)
+        if match != Match.NONE:
+            return route.path
+    # unknown paths are grouped to keep the number of labels bounded
+    return "<unmatched>"
+
+
+class PrometheusMiddleware:
+    """
+    Records prometheus metrics of every request.
+
+    Requests are labeled with the route template,
+    e.g. `/api/forms/{form_id}/answers`, not with the actual path.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = _route_template(scope)
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:  # noqa: WPS430
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress = REQUESTS_IN_PROGRESS.labels(method, route)
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUEST_DURATION.labels(method, route).observe(
+                time.perf_counter() - start,
+            )
+            REQUESTS.labels(method, route, status_code).inc()
+            in_progress.dec()
+            update_pool_gauges(scope["app"])